@@ -0,0 +1,10 @@
+"""benchmarks for the key result of less than 1s load times for datasets up to 1M rows
+
+Run them from the root of the repo with:
+    python -m benchmarks --output benchmark_results.json --baseline benchmarks/baseline.json
+
+Timings depend on the machine, so only compare results to a baseline recorded on the same one
+(see --save-baseline).
+"""
+from ._datasets import synthetic_gapminder
+from ._runner import run_benchmarks, compare_to_baseline, okr_misses
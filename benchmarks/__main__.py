@@ -0,0 +1,78 @@
+"""run the benchmarks from the command line, see python -m benchmarks --help"""
+from typing import List
+import argparse
+import json
+import sys
+
+from ._runner import run_benchmarks, compare_to_baseline, okr_misses, default_row_count_list, okr_max_seconds
+
+
+def main(argument_list: List[str] = None) -> int:
+    """run the benchmarks, save the results, and compare them to the baseline
+
+    Returns:
+        int: exit code, 1 if a benchmark regressed past the tolerance or the page loads miss the key result
+    """
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=list(default_row_count_list),
+        help='dataset sizes to benchmark (default: %(default)s)',
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, we keep the fastest (default: 3)')
+    parser.add_argument(
+        '--only', nargs='+', default=[],
+        help="only run the benchmarks starting with these names, e.g. --only page_load filter/",
+    )
+    parser.add_argument('--output', default='benchmark_results.json', help='where we write the results as JSON')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='how much slower than the baseline counts as a regression (default: 0.25, i.e. 25%%)',
+    )
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline too')
+    arguments = parser.parse_args(argument_list)
+
+    results = run_benchmarks(
+        row_count_list=arguments.rows,
+        repeat=arguments.repeat,
+        name_prefix_list=arguments.only,
+        log_function=print,
+    )
+    with open(arguments.output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print('\nwrote {} results to {}'.format(len(results['results']), arguments.output))
+
+    exit_code = 0
+    for result in okr_misses(results):
+        print('key result missed: page_load with {:,} rows took {:.3f}s, the goal is under {}s'.format(
+            result['rows'], result['seconds'], okr_max_seconds,
+        ))
+        exit_code = 1
+
+    if arguments.baseline and arguments.save_baseline:
+        with open(arguments.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print('saved the results as the baseline in {}'.format(arguments.baseline))
+
+    elif arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        print('\n{:<32} {:>10} {:>10} {:>10} {:>8}  {}'.format('benchmark', 'rows', 'seconds', 'baseline', 'ratio', 'status'))
+        for comparison in compare_to_baseline(results=results, baseline=baseline, tolerance=arguments.tolerance):
+            print('{:<32} {:>10,} {:>10.4f} {:>10} {:>8}  {}'.format(
+                comparison['benchmark'],
+                comparison['rows'],
+                comparison['seconds'],
+                '{:.4f}'.format(comparison['baseline_seconds']) if comparison['baseline_seconds'] else '-',
+                '{:.2f}x'.format(comparison['ratio']) if comparison['ratio'] else '-',
+                comparison['status'],
+            ))
+            if comparison['status'] == 'regression':
+                exit_code = 1
+
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
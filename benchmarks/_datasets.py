@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from turbo_dash import data
+
+
+def synthetic_gapminder(
+        row_count: int,
+        seed: int = 0,
+) -> pd.DataFrame:
+    """generate a dataframe shaped like gapminder, with as many rows as we want
+
+    Every row gets a real gapminder country (with its continent, iso_alpha, and iso_num), a year between 1952
+    and 2007, and a day of that year. lifeExp, pop, and gdpPercap wander around the values of a real gapminder
+    row for that country, so the columns have gapminder's ranges and cardinalities at any size.
+
+    Args:
+        row_count (int): how many rows we want
+        seed (:obj: `int`, optional): default `0`, seed for the random numbers, the same seed gives the same data
+
+    Returns:
+        pandas.DataFrame: columns [
+            'country', 'continent', 'year', 'lifeExp', 'pop', 'gdpPercap', 'iso_alpha', 'iso_num', 'date'
+        ]
+    """
+    random = np.random.default_rng(seed)
+    gapminder_df = data.gapminder()
+
+    # 1. grab a real row for each synthetic row, so the countries and their values line up
+    source_df = gapminder_df.iloc[random.integers(0, len(gapminder_df), size=row_count)].reset_index(drop=True)
+
+    # 2. spread the years and days out, and add some noise to the measures
+    year = random.integers(1952, 2008, size=row_count)
+    day = random.integers(0, 365, size=row_count)
+    date = (year - 1970).astype('datetime64[Y]').astype('datetime64[D]') + day
+
+    return pd.DataFrame({
+        'country': source_df['country'],
+        'continent': source_df['continent'],
+        'year': year,
+        'lifeExp': (source_df['lifeExp'] * random.normal(1.0, 0.05, size=row_count)).round(3),
+        'pop': (source_df['pop'] * random.normal(1.0, 0.1, size=row_count)).clip(lower=1).round().astype(np.int64),
+        'gdpPercap': (source_df['gdpPercap'] * random.normal(1.0, 0.1, size=row_count)).clip(lower=0),
+        'iso_alpha': source_df['iso_alpha'],
+        'iso_num': source_df['iso_num'],
+        'date': np.datetime_as_string(date, unit='D').astype(object),
+    })
@@ -0,0 +1,356 @@
+from typing import List, Dict, Any, Callable, Tuple
+import datetime
+import gc
+import platform
+import time
+import numpy as np
+import pandas as pd
+import plotly
+import dash
+
+from turbo_dash import turbo_dashboard, turbo_dashboard_page, turbo_filter, turbo_output
+from turbo_dash._lookups import _filter_type_lookup, _chart_lookup_dict, _template_lookup
+from ._datasets import synthetic_gapminder
+
+# the key result we're measuring against: less than 1s load times for datasets up to 1M rows
+okr_max_rows = 1000000
+okr_max_seconds = 1.0
+
+default_row_count_list = (10000, 100000, 1000000, 10000000)
+
+# filter type -> (column, dash input values) we benchmark it with, one value per input property
+_filter_benchmark_dict = {
+    'Checklist': ('continent', [['Asia', 'Europe']]),
+    'DatePickerRange': ('date', ['1970-01-01', '1989-12-31']),
+    'DatePickerSingle': ('date', ['1980-06-15']),
+    'Dropdown': ('country', ['Canada']),
+    'Dropdown-multi': ('country', [['Canada', 'France', 'Japan']]),
+    'Dropdown-search': ('country', [['Canada', 'France', 'Japan']]),
+    'RadioItems': ('continent', ['Asia']),
+    'RangeSlider': ('year', [[1970, 1990]]),
+    'Slider': ('year', [1980]),
+}
+
+# output type -> the turbo_output arguments we benchmark it with
+_output_benchmark_dict = {
+    'scatter': {'x': 'gdpPercap', 'y': 'lifeExp', 'color': 'continent'},
+    'line': {'x': 'year', 'y': 'lifeExp', 'color': 'continent'},
+    'area': {'x': 'year', 'y': 'pop', 'color': 'continent'},
+    'bar': {'x': 'year', 'y': 'pop', 'color': 'continent'},
+    'violin': {'x': 'continent', 'y': 'lifeExp'},
+    'scatter_3d': {'x': 'gdpPercap', 'y': 'lifeExp', 'z': 'pop', 'color': 'continent'},
+    'scatter_geo': {'locations': 'iso_alpha', 'color': 'continent', 'size': 'pop'},
+    'choropleth': {'locations': 'iso_alpha', 'color': 'lifeExp'},
+}
+
+
+def run_benchmarks(
+        row_count_list: List[int] = default_row_count_list,
+        repeat: int = 3,
+        name_prefix_list: List[str] = (),
+        seed: int = 0,
+        log_function: Callable[[str], Any] = None,
+) -> Dict[str, Any]:
+    """time the dashboard's code paths on synthetic gapminder-shaped datasets
+
+    For each dataset size, we time:
+    page_load: what a visitor waits for on the first visit to a page, its layout plus its outputs' callbacks
+    layout: creating a page with every filter type and building its html
+    filter_options/<filter type>: building one filter's html, which computes its options or bounds
+    filter/<filter type>: filtering the page's df with one filter, for every type in _filter_type_lookup
+    output/<output type>: one output's callback through the flask server, for every type in _chart_lookup_dict
+
+    Everything runs through the same code a real dashboard runs. Each run starts with cold caches, and we report
+    the fastest of repeat runs, which is the least noisy.
+
+    Args:
+        row_count_list (:obj: `List[int]`, optional): default `(10000, 100000, 1000000, 10000000)`, the dataset
+            sizes we benchmark
+        repeat (:obj: `int`, optional): default `3`, how many times we run each benchmark
+        name_prefix_list (:obj: `List[str]`, optional): default `()`, only run the benchmarks whose name starts
+            with one of these, e.g. ['output/', 'page_load']. Empty runs every benchmark.
+        seed (:obj: `int`, optional): default `0`, seed for the synthetic datasets
+        log_function (:obj: `Callable[[str], Any]`, optional): default `None`, called with each result as we
+            go, e.g. print
+
+    Returns:
+        Dict[str, Any]: with keys ['environment', 'okr', 'results'], ready for json.dump. Each result looks like
+            {'benchmark': 'filter/RangeSlider', 'rows': 10000, 'seconds': 0.001, 'mean_seconds': 0.0012, 'repeat': 3}
+    """
+    result_list = []
+    for row_count in row_count_list:
+        df = synthetic_gapminder(row_count=row_count, seed=seed)
+
+        for name, run_function in _benchmark_list(df=df):
+            if name_prefix_list and not any(name.startswith(prefix) for prefix in name_prefix_list):
+                continue
+
+            seconds_list = []
+            for _ in range(repeat):
+                gc.collect()  # don't charge one benchmark for collecting another one's garbage
+                seconds_list.append(run_function())
+
+            result = {
+                'benchmark': name,
+                'rows': row_count,
+                'seconds': min(seconds_list),
+                'mean_seconds': float(np.mean(seconds_list)),
+                'repeat': repeat,
+            }
+            result_list.append(result)
+            if log_function is not None:
+                log_function('{:<32} {:>10,} rows {:>10.4f}s'.format(name, row_count, result['seconds']))
+
+    return {
+        'environment': _environment(),
+        'okr': {'max_rows': okr_max_rows, 'max_seconds': okr_max_seconds},
+        'results': result_list,
+    }
+
+
+def compare_to_baseline(
+        results: Dict[str, Any],
+        baseline: Dict[str, Any],
+        tolerance: float = 0.25,
+) -> List[Dict[str, Any]]:
+    """compare benchmark results to a stored baseline
+
+    Timings are noisy, so a benchmark only counts as a regression if it's more than tolerance slower than the
+    baseline. Baselines are only comparable on the same machine, see the environment of each.
+
+    Args:
+        results (Dict[str, Any]): what run_benchmarks returned
+        baseline (Dict[str, Any]): what run_benchmarks returned for the baseline
+        tolerance (:obj: `float`, optional): default `0.25`, how much slower than the baseline (as a fraction)
+            a benchmark can get before we call it a regression
+
+    Returns:
+        List[Dict[str, Any]]: one comparison per result with keys
+            ['benchmark', 'rows', 'seconds', 'baseline_seconds', 'ratio', 'status'], where status is one of
+            ['faster', 'same', 'regression', 'new'], 'new' if the baseline doesn't have the benchmark
+    """
+    baseline_seconds_dict = {
+        (result['benchmark'], result['rows']): result['seconds'] for result in baseline.get('results', [])
+    }
+
+    comparison_list = []
+    for result in results['results']:
+        baseline_seconds = baseline_seconds_dict.get((result['benchmark'], result['rows']))
+        ratio = result['seconds'] / baseline_seconds if baseline_seconds else None
+
+        if ratio is None:
+            status = 'new'
+        elif ratio > 1 + tolerance:
+            status = 'regression'
+        elif ratio < 1 / (1 + tolerance):
+            status = 'faster'
+        else:
+            status = 'same'
+
+        comparison_list.append({
+            'benchmark': result['benchmark'],
+            'rows': result['rows'],
+            'seconds': result['seconds'],
+            'baseline_seconds': baseline_seconds,
+            'ratio': ratio,
+            'status': status,
+        })
+
+    return comparison_list
+
+
+def okr_misses(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """grab the page_load results that miss the key result, less than 1s for datasets up to 1M rows"""
+    return [
+        result for result in results['results']
+        if result['benchmark'] == 'page_load' and result['rows'] <= okr_max_rows and result['seconds'] >= okr_max_seconds
+    ]
+
+
+def _benchmark_list(df: pd.DataFrame) -> List[Tuple[str, Callable[[], float]]]:
+    """grab the (name, function) of every benchmark for a df, each function runs once and returns the seconds"""
+    ret = [
+        ('page_load', lambda: _time_page_load(df=df)),
+        ('layout', lambda: _time_layout(df=df)),
+    ]
+    ret.extend(
+        ('filter_options/{}'.format(filter_type), lambda filter_type=filter_type: _time_filter_options(
+            df=df, filter_type=filter_type,
+        )) for filter_type in _filter_type_lookup
+    )
+    ret.extend(
+        ('filter/{}'.format(filter_type), lambda filter_type=filter_type: _time_filter(
+            df=df, filter_type=filter_type,
+        )) for filter_type in _filter_type_lookup
+    )
+    ret.extend(
+        ('output/{}'.format(output_type), lambda output_type=output_type: _time_output(
+            df=df, output_type=output_type,
+        )) for output_type in _chart_lookup_dict
+    )
+    return ret
+
+
+def _time_page_load(df: pd.DataFrame) -> float:
+    """time the first visit to a page like app.py's first one: its layout, then its outputs' callbacks"""
+    page = turbo_dashboard_page(
+        url='/app1',
+        name='App 1',
+        df=df.copy(deep=False),  # a new df, so we don't reuse the filter options from the last run
+        menu_filter_list=[
+            turbo_filter(filter_type='Dropdown-multi', column='country'),
+            turbo_filter(filter_type='RangeSlider', column='year'),
+        ],
+        output_list=[
+            turbo_output(output_type='bar', x='year', y='pop', color='continent', hover_name='country'),
+            turbo_output(output_type='line', x='year', y='lifeExp', color='continent'),
+        ],
+    )
+    client = _client(page=page)
+
+    start = time.perf_counter()
+    _post(client=client, output='dashboard_wrapper_div.children', input_list=[
+        {'id': 'url', 'property': 'pathname', 'value': '/app1'},
+    ])
+    for output in page.output_list:  # with the values the filters start out with, the slider covers every year
+        _post_output(client=client, page=page, output=output, filter_value_list=[None, [1952, 2007]])
+
+    return time.perf_counter() - start
+
+
+def _time_layout(df: pd.DataFrame) -> float:
+    """time creating a page with every filter type and building its html"""
+    df = df.copy(deep=False)
+
+    start = time.perf_counter()
+    turbo_dashboard_page(
+        url='/app1',
+        name='App 1',
+        df=df,
+        menu_filter_list=[
+            turbo_filter(filter_type=filter_type, column=column)
+            for filter_type, (column, _) in _filter_benchmark_dict.items()
+        ],
+        output_list=[turbo_output(output_type='bar', x='year', y='pop', color='continent')],
+    ).create_html(template='turbo')
+
+    return time.perf_counter() - start
+
+
+def _time_filter_options(
+        df: pd.DataFrame,
+        filter_type: str,
+) -> float:
+    """time building one filter's html, which computes its options or bounds from the df"""
+    tf = turbo_filter(filter_type=filter_type, column=_filter_benchmark_dict[filter_type][0])
+    df = df.copy(deep=False)
+
+    start = time.perf_counter()
+    tf.create_html(template='turbo', df=df, location='menu', template_lookup_dict=_template_lookup)
+
+    return time.perf_counter() - start
+
+
+def _time_filter(
+        df: pd.DataFrame,
+        filter_type: str,
+) -> float:
+    """time filtering a page's df with one filter, the way the page's callbacks do"""
+    column, value_list = _filter_benchmark_dict[filter_type]
+    page = turbo_dashboard_page(
+        url='/app1',
+        name='App 1',
+        df=df,
+        menu_filter_list=[turbo_filter(filter_type=filter_type, column=column)],
+    )
+
+    start = time.perf_counter()
+    page.filter_dataframe(filter_value_list=tuple(value_list))
+
+    return time.perf_counter() - start
+
+
+def _time_output(
+        df: pd.DataFrame,
+        output_type: str,
+) -> float:
+    """time one output's callback through the flask server, from the request to the serialized response"""
+    page = turbo_dashboard_page(
+        url='/app1',
+        name='App 1',
+        df=df,
+        menu_filter_list=[turbo_filter(filter_type='Checklist', column='continent')],
+        output_list=[turbo_output(output_type=output_type, **_output_benchmark_dict[output_type])],
+    )
+    client = _client(page=page)
+
+    start = time.perf_counter()
+    _post_output(client=client, page=page, output=page.output_list[0], filter_value_list=[None])
+
+    return time.perf_counter() - start
+
+
+def _client(page: turbo_dashboard_page) -> Any:
+    """grab a test client for a dashboard with one page, so requests go through flask and dash like usual"""
+    app = turbo_dashboard(template='turbo', dashboard_page_list=[page]).run_dashboard(
+        app_name=__name__,
+        is_in_production=True,
+    )
+    return app.server.test_client()
+
+
+def _post_output(
+        client: Any,
+        page: turbo_dashboard_page,
+        output: turbo_output,
+        filter_value_list: List[Any],
+) -> Any:
+    """send the request for an output's callback, with one value per menu filter input"""
+    return _post(
+        client=client,
+        output='{}.{}'.format(output.component_id, output.output_component_property),
+        input_list=[
+            {'id': dash_input.component_id, 'property': dash_input.component_property, 'value': value}
+            for dash_input, value in zip(
+                [dash_input for tf in page.menu_filter_list for dash_input in tf.dash_dependencies_input_list],
+                filter_value_list,
+            )
+        ],
+    )
+
+
+def _post(
+        client: Any,
+        output: str,
+        input_list: List[Dict[str, Any]],
+) -> Any:
+    """send a dash callback request and make sure it worked, a benchmark of an error doesn't tell us much"""
+    component_id, component_property = output.rsplit('.', 1)
+    response = client.post('/_dash-update-component', json={
+        'output': output,
+        'outputs': {'id': component_id, 'property': component_property},
+        'inputs': input_list,
+        'changedPropIds': ['{}.{}'.format(dash_input['id'], dash_input['property']) for dash_input in input_list],
+    })
+    if response.status_code != 200:
+        raise RuntimeError(
+            """The callback for {} failed with status {}: {}""".format(
+                output, response.status_code, response.get_data(as_text=True)[:500],
+            )
+        )
+
+    return response
+
+
+def _environment() -> Dict[str, Any]:
+    """grab what we need to know to tell whether two sets of results are comparable"""
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.machine(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plotly': plotly.__version__,
+        'dash': dash.__version__,
+    }
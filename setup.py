@@ -12,7 +12,7 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/turbo3136/turbo_dash",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=['benchmarks', 'benchmarks.*']),
     package_data={
         "turbo_dash": [
             "package_data/*",
@@ -30,5 +30,6 @@ setuptools.setup(
         'dash-core-components>=1.7.0',
         'dash-html-components>=1.0.2',
         'plotly>=4.0.0',
+        'pyarrow>=1.0.0',
     ],
 )
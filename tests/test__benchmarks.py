@@ -0,0 +1,48 @@
+import json
+
+from turbo_dash._lookups import _filter_type_lookup, _chart_lookup_dict
+from benchmarks import synthetic_gapminder, run_benchmarks, compare_to_baseline, okr_misses
+from benchmarks.__main__ import main
+
+
+class TestBenchmarks:
+    def test_synthetic_gapminder(self):
+        df = synthetic_gapminder(row_count=5000, seed=1)
+
+        assert len(df) == 5000
+        assert df.columns.tolist() == [
+            'country', 'continent', 'year', 'lifeExp', 'pop', 'gdpPercap', 'iso_alpha', 'iso_num', 'date'
+        ]
+        assert df['year'].between(1952, 2007).all()
+        assert (df['date'].str[:4].astype(int) == df['year']).all()
+        assert df.equals(synthetic_gapminder(row_count=5000, seed=1))
+
+    def test_every_filter_and_output_type_runs(self):
+        results = run_benchmarks(row_count_list=[1000], repeat=1, name_prefix_list=['filter/', 'output/'])
+
+        assert [result['benchmark'] for result in results['results']] == \
+            ['filter/{}'.format(filter_type) for filter_type in _filter_type_lookup] \
+            + ['output/{}'.format(output_type) for output_type in _chart_lookup_dict]
+        assert all(result['rows'] == 1000 and result['seconds'] > 0 for result in results['results'])
+
+    def test_compare_to_baseline(self):
+        def results(seconds_dict):
+            return {'results': [
+                {'benchmark': name, 'rows': 1000000, 'seconds': seconds} for name, seconds in seconds_dict.items()
+            ]}
+
+        comparison_list = compare_to_baseline(
+            results=results({'page_load': 2.0, 'layout': 1.1, 'filter/Slider': 0.5, 'output/bar': 1.0}),
+            baseline=results({'page_load': 1.0, 'layout': 1.0, 'filter/Slider': 1.0}),
+        )
+        assert [comparison['status'] for comparison in comparison_list] == ['regression', 'same', 'faster', 'new']
+        assert okr_misses(results({'page_load': 2.0})) and not okr_misses(results({'page_load': 0.5}))
+
+    def test_command_line(self, tmp_path):
+        output_path, baseline_path = str(tmp_path / 'results.json'), str(tmp_path / 'baseline.json')
+        argument_list = ['--rows', '1000', '--repeat', '1', '--only', 'layout', '--output', output_path]
+
+        assert main(argument_list + ['--baseline', baseline_path, '--save-baseline']) == 0
+        assert main(argument_list + ['--baseline', baseline_path, '--tolerance', '1000']) == 0
+        with open(output_path) as results_file:
+            assert [result['benchmark'] for result in json.load(results_file)['results']] == ['layout']
@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+
+from turbo_dash._cache import lru_cache
+
+
+class TestLruCache:
+
+    def test_hit_and_miss(self):
+        cache = lru_cache(max_bytes=100)
+        assert cache.get_or_compute(key='a', compute_function=lambda: 1, size_function=lambda value: 10) == 1
+        assert cache.get_or_compute(key='a', compute_function=lambda: 2, size_function=lambda value: 10) == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = lru_cache(max_bytes=25)
+        for key in ('a', 'b'):
+            cache.get_or_compute(key=key, compute_function=lambda: key, size_function=lambda value: 10)
+        cache.get_or_compute(key='a', compute_function=lambda: 'a', size_function=lambda value: 10)  # touch a
+        cache.get_or_compute(key='c', compute_function=lambda: 'c', size_function=lambda value: 10)  # evicts b
+
+        assert len(cache) == 2
+        assert cache.current_bytes == 20
+        assert cache.get_or_compute(key='b', compute_function=lambda: 'new b', size_function=lambda value: 10) == 'new b'
+
+    def test_value_bigger_than_budget_is_not_stored(self):
+        cache = lru_cache(max_bytes=5)
+        cache.get_or_compute(key='a', compute_function=lambda: 'a', size_function=lambda value: 10)
+        assert len(cache) == 0 and cache.current_bytes == 0
+
+    def test_concurrent_requests_compute_once(self):
+        cache = lru_cache(max_bytes=100)
+        call_list = []
+
+        def compute_function():
+            call_list.append(1)
+            time.sleep(0.05)
+            return 'value'
+
+        result_list = []
+        thread_list = [
+            threading.Thread(target=lambda: result_list.append(
+                cache.get_or_compute(key='a', compute_function=compute_function, size_function=lambda value: 1)
+            )) for dummy in range(8)
+        ]
+        for thread in thread_list:
+            thread.start()
+        for thread in thread_list:
+            thread.join()
+
+        assert len(call_list) == 1
+        assert result_list == ['value'] * 8
+
+    def test_errors_are_not_cached(self):
+        cache = lru_cache(max_bytes=100)
+        with pytest.raises(ZeroDivisionError):
+            cache.get_or_compute(key='a', compute_function=lambda: 1 / 0, size_function=lambda value: 1)
+        assert cache.get_or_compute(key='a', compute_function=lambda: 1, size_function=lambda value: 1) == 1
+
+    def test_max_items(self):
+        cache = lru_cache(max_items=2)
+        for key in ('a', 'b', 'c'):
+            cache.get_or_compute(key=key, compute_function=lambda: key)
+        assert cache.stats() == {'hits': 0, 'misses': 3, 'items': 2, 'bytes': 0}
+
+    def test_ttl(self):
+        cache = lru_cache(max_items=2, ttl=0.01)
+        cache.get_or_compute(key='a', compute_function=lambda: 'old')
+        time.sleep(0.02)
+        assert cache.get_or_compute(key='a', compute_function=lambda: 'new') == 'new'
@@ -0,0 +1,64 @@
+import pytest
+import pandas as pd
+
+from turbo_dash import data, turbo_filter, turbo_output
+from turbo_dash._cube import build_aggregate_cube
+from turbo_dash._filter_engine import filter_engine
+
+
+class TestAggregateCube:
+    _df = data.gapminder()
+
+    _menu_filter_list = [
+        turbo_filter(filter_type='Checklist', column='continent'),
+        turbo_filter(filter_type='RangeSlider', column='year'),
+    ]
+
+    @pytest.mark.parametrize('values', [
+        (None, [1952, 2007]),
+        (['Europe', 'Asia'], [1960, 1990]),
+        (['Oceania'], [2000, 2007]),
+    ])
+    def test_cube_matches_raw_rows(self, values):
+        cube = build_aggregate_cube(
+            df=self._df,
+            x='year',
+            y='pop',
+            color='continent',
+            menu_filter_list=self._menu_filter_list,
+        )
+        assert len(cube) < len(self._df)
+
+        filtered_df = filter_engine(menu_filter_list=self._menu_filter_list).filter_dataframe(
+            df=self._df,
+            filter_value_list=values,
+        )
+        expected = filtered_df.groupby(['year', 'continent'], sort=False)['pop'].sum().reset_index()
+
+        pd.testing.assert_frame_equal(cube.aggregate(filter_value_list=values), expected)
+
+    def test_append_matches_the_combined_rows(self):
+        df, appended_df = self._df[self._df['year'] < 2000], self._df[self._df['year'] >= 2000]
+        cube = build_aggregate_cube(df=df, x='continent', y='pop', menu_filter_list=self._menu_filter_list)
+        expected = build_aggregate_cube(df=self._df, x='continent', y='pop', menu_filter_list=self._menu_filter_list)
+
+        # the groups the new rows add come last, the sums are the same
+        sort_column_list = ['continent', 'year']
+        pd.testing.assert_frame_equal(
+            cube.append(df=appended_df).df.sort_values(sort_column_list, ignore_index=True),
+            expected.df.sort_values(sort_column_list, ignore_index=True),
+        )
+
+    def test_non_numeric_y_has_no_cube(self):
+        assert build_aggregate_cube(df=self._df, x='year', y='country') is None
+
+    def test_only_bar_outputs_get_a_cube(self):
+        line_output = turbo_output(output_type='line', x='year', y='pop', color='continent')
+        bar_output = turbo_output(output_type='bar', x='year', y='pop', color='continent', chart_input_list=['y'])
+
+        assert line_output.build_aggregate_cube(df=self._df, menu_filter_list=self._menu_filter_list) is None
+        cube = bar_output.build_aggregate_cube(df=self._df, menu_filter_list=self._menu_filter_list)
+        assert cube is not None
+        assert bar_output._can_use_aggregate_cube(chart_input_values_list=('pop',), cube=cube)
+        assert not bar_output._can_use_aggregate_cube(chart_input_values_list=('lifeExp',), cube=cube)
+        assert not bar_output._can_use_aggregate_cube(chart_input_values_list=('pop',))
@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+import pytest
+
+from turbo_dash import data
+
+
+class TestData:
+    _df = data.gapminder()
+
+    @pytest.fixture
+    def dataset_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(data, '_columnar_cache_dir', str(tmp_path / 'cache'))
+        path = str(tmp_path / 'gapminder_copy.csv')
+        self._df.to_csv(path, index=False)
+        yield path
+        data._dataset_registry.pop('gapminder_copy', None)
+        data._dataset_dict.pop('gapminder_copy', None)
+
+    def test_gapminder(self):
+        assert self._df.columns.tolist() == [
+            'country', 'continent', 'year', 'lifeExp', 'pop', 'gdpPercap', 'iso_alpha', 'iso_num'
+        ]
+        assert len(self._df) == 1704
+        assert 'gapminder' in data.list_datasets()
+
+    def test_datasets_are_loaded_once(self):
+        df = data.gapminder()
+        assert df is not self._df  # adding a column to one doesn't add it to the other
+        assert df['pop'].to_numpy().__array_interface__ == self._df['pop'].to_numpy().__array_interface__
+
+    def test_registered_dataset_is_cached_as_columns(self, dataset_path, monkeypatch):
+        data.register_dataset(name='gapminder_copy', path=dataset_path, dtype={'continent': 'category'})
+        df = data.load_dataset('gapminder_copy')
+
+        assert isinstance(df['continent'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(df.astype({'continent': object}), self._df)
+        assert len(os.listdir(data._columnar_cache_dir)) == 1
+
+        # a new process reads the columnar copy instead of the CSV
+        data._dataset_dict.pop('gapminder_copy')
+        monkeypatch.setattr(pd, 'read_csv', None)
+        pd.testing.assert_frame_equal(data.load_dataset('gapminder_copy'), df)
+        assert len(os.listdir(data._columnar_cache_dir)) == 1
+
+    @pytest.mark.parametrize('cache_dir', ['not_a_directory/cache', ''])
+    def test_unwritable_cache_reads_the_csv(self, dataset_path, monkeypatch, tmp_path, cache_dir):
+        (tmp_path / 'not_a_directory').write_text('')
+        monkeypatch.setattr(data, '_columnar_cache_dir', str(tmp_path / cache_dir) if cache_dir else '')
+        data.register_dataset(name='gapminder_copy', path=dataset_path)
+
+        pd.testing.assert_frame_equal(data.load_dataset('gapminder_copy'), self._df)
+        assert sorted(os.listdir(tmp_path)) == ['gapminder_copy.csv', 'not_a_directory']
+
+    def test_unknown_dataset(self):
+        with pytest.raises(ValueError):
+            data.load_dataset('iris')
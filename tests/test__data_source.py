@@ -0,0 +1,336 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+
+from turbo_dash import (
+    data, csv_data_source, parquet_data_source, arrow_data_source, pickle_data_source, sql_data_source,
+    turbo_dashboard_page, turbo_filter, turbo_output,
+)
+from turbo_dash._filter_options import get_filter_options, get_slider_settings
+
+
+class TestDataSource:
+    _df = data.gapminder()
+
+    @pytest.fixture(params=['csv', 'parquet', 'arrow', 'pickle', 'sqlite'])
+    def source(self, request, tmp_path):
+        path = str(tmp_path / 'gapminder.{}'.format(request.param))
+        if request.param == 'csv':
+            self._df.to_csv(path, index=False)
+            return csv_data_source(path)
+        if request.param == 'parquet':
+            self._df.to_parquet(path)
+            return parquet_data_source(path)
+        if request.param == 'arrow':
+            return arrow_data_source.from_dataframe(df=self._df, path=path)
+        if request.param == 'sqlite':
+            with sqlite3.connect(path) as connection:
+                self._df.to_sql('gapminder', connection, index=False)
+            return sql_data_source(path=path, table='gapminder')
+        self._df.to_pickle(path)
+        return pickle_data_source(path)
+
+    def test_load_matches_the_data(self, source):
+        assert source.column_list() == self._df.columns.tolist()
+        pd.testing.assert_frame_equal(source.load(), self._df, check_dtype=False)
+
+    def test_load_some_columns(self, source):
+        df = source.load(columns=['year', 'country', 'not_a_column'])
+        assert df.columns.tolist() == ['country', 'year']  # the data's order, unknown columns ignored
+        assert source.load(columns=['year', 'country', 'not_a_column']) is df
+
+    def _page(self, source, **kwargs):
+        return turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            data_source=source,
+            menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='continent', default_value=['Asia'])],
+            output_list=[turbo_output(output_type='scatter', x='gdpPercap', y='lifeExp', color='country')],
+            **kwargs
+        )
+
+    def test_page_loads_on_first_use(self, source):
+        page = self._page(source=source)
+        assert len(source._df_cache) == 0
+
+        filtered_df = page.filter_dataframe(filter_value_list=[['Asia']])
+        assert len(source._df_cache) == (0 if source.supports_pushdown else 1)  # sql sources only read the rows
+        assert page.df.columns.tolist() == ['country', 'continent', 'lifeExp', 'gdpPercap']
+        assert set(filtered_df['continent']) == {'Asia'}
+
+    def test_page_without_pruning_loads_every_column(self, source):
+        page = self._page(source=source, prune_columns=False)
+        assert page.df.columns.tolist() == self._df.columns.tolist()
+
+    def test_page_with_column_chart_inputs_loads_every_column(self, source):
+        page = turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            data_source=source,
+            output_list=[turbo_output(output_type='scatter', x='gdpPercap', y='lifeExp', chart_input_list=['x'])],
+        )
+        assert page._referenced_column_list() is None
+
+    def test_page_with_df_and_data_source(self, source):
+        with pytest.raises(ValueError):
+            turbo_dashboard_page(url='/app1', name='App 1', df=self._df, data_source=source)
+
+
+class TestArrowDataSource:
+    _df = data.gapminder()
+
+    @pytest.mark.skipif(not os.path.exists('/proc/self/maps'), reason='needs /proc to find the mapped file')
+    def test_numeric_columns_are_views_of_the_file(self, tmp_path):
+        path = str(tmp_path / 'gapminder.arrow')
+        df = arrow_data_source.from_dataframe(df=self._df, path=path).load()
+
+        with open('/proc/self/maps') as maps:  # the address ranges of this process that are mapped to the file
+            mapped_range_list = [
+                [int(address, 16) for address in line.split()[0].split('-')]
+                for line in maps if line.rstrip().endswith(path)
+            ]
+
+        for column in ['year', 'lifeExp', 'pop']:
+            values = df[column].to_numpy()
+            address = values.__array_interface__['data'][0]
+            assert any(start <= address < stop for start, stop in mapped_range_list)
+            assert not values.flags.writeable
+
+    def test_page_filters_the_mapped_data(self, tmp_path):
+        page = turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            data_source=arrow_data_source.from_dataframe(df=self._df, path=str(tmp_path / 'gapminder.arrow')),
+            menu_filter_list=[
+                turbo_filter(filter_type='Dropdown-multi', column='continent'),
+                turbo_filter(filter_type='RangeSlider', column='year'),
+            ],
+            use_range_index=True,
+            use_category_index=True,
+        )
+        filtered_df = page.filter_dataframe(filter_value_list=(['Oceania'], [1990, 2007]))
+        expected = self._df[(self._df['continent'] == 'Oceania') & (self._df['year'] >= 1990)]
+        pd.testing.assert_frame_equal(filtered_df, expected[filtered_df.columns.tolist()])
+
+    def test_rewriting_replaces_the_file(self, tmp_path):
+        path = str(tmp_path / 'gapminder.arrow')
+        arrow_data_source.from_dataframe(df=self._df, path=path)
+        source = arrow_data_source.from_dataframe(df=self._df.head(10), path=path)
+        assert len(source.load()) == 10
+        assert [file.name for file in tmp_path.iterdir()] == ['gapminder.arrow']
+
+
+class TestSqlDataSource:
+    _df = data.gapminder()
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = str(tmp_path / 'gapminder.sqlite')
+        with sqlite3.connect(path) as connection:
+            self._df.to_sql('gapminder', connection, index=False)
+        return sql_data_source(path=path, table='gapminder', order_by='year')
+
+    def _page(self, source):
+        return turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            data_source=source,
+            menu_filter_list=[
+                turbo_filter(filter_type='Dropdown-multi', column='continent'),
+                turbo_filter(filter_type='RangeSlider', column='year'),
+            ],
+            output_list=[turbo_output(output_type='line', x='year', y='lifeExp', color='country')],
+        )
+
+    def test_page_filters_in_the_database(self, source):
+        page = self._page(source=source)
+        filtered_df = page.filter_dataframe(filter_value_list=(['Oceania'], [1990, 2007]))
+
+        expected = self._df[(self._df['continent'] == 'Oceania') & (self._df['year'] >= 1990)]
+        expected = expected[['country', 'continent', 'year', 'lifeExp']].sort_values('year', kind='stable')
+        pd.testing.assert_frame_equal(filtered_df, expected.reset_index(drop=True))
+        assert len(source._df_cache) == 0  # we never loaded the whole table
+
+    def test_filter_options_come_from_the_database(self, source):
+        page = self._page(source=source)
+        page.create_html(template='turbo')
+
+        continent_filter, year_filter = page.menu_filter_list
+        assert get_filter_options(df=page._filter_df(tf=continent_filter), column='continent') \
+            == get_filter_options(df=self._df, column='continent')
+        assert get_slider_settings(df=page._filter_df(tf=year_filter), column='year') \
+            == get_slider_settings(df=self._df, column='year')
+        assert len(source._query_cache) == 2  # one SELECT DISTINCT per filter, and nothing else
+        assert len(source._df_cache) == 0
+
+    def test_bounds(self, source):
+        assert source.bounds(column='year')['year'].tolist() == [1952, 2007]
+
+    def test_unknown_engine(self, tmp_path):
+        with pytest.raises(ValueError):
+            sql_data_source(path=str(tmp_path / 'gapminder.db'), table='gapminder', engine='postgres')
+
+    def test_cubes_need_the_data_in_memory(self, source):
+        with pytest.raises(ValueError):
+            turbo_dashboard_page(url='/app1', name='App 1', data_source=source, precompute_bar_cubes=True)
+
+
+class TestRefreshData:
+    _df = data.gapminder()
+
+    def _page(self, **kwargs):
+        return turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='continent')],
+            output_list=[turbo_output(output_type='scatter', x='gdpPercap', y='lifeExp', color='country')],
+            **kwargs
+        )
+
+    def test_refresh_swaps_in_the_new_data(self):
+        page = self._page(df=self._df)
+        old_df = page.df
+        assert len(page.filter_dataframe(filter_value_list=[['Oceania']])) == 24
+
+        page.refresh_data(df=self._df[self._df['year'] >= 2000])
+        assert page.data_version == 1
+        assert page.df is not old_df
+        assert len(page.filter_dataframe(filter_value_list=[['Oceania']])) == 4
+
+    def test_refresh_rereads_the_data_source(self, tmp_path):
+        path = str(tmp_path / 'gapminder.arrow')
+        page = self._page(data_source=arrow_data_source.from_dataframe(df=self._df, path=path))
+        assert len(page.df) == len(self._df)
+
+        arrow_data_source.from_dataframe(df=self._df.head(10), path=path)
+        thread = page.refresh_data(background=True)
+        thread.join()
+        assert len(page.df) == 10
+        assert page.data_version == 1
+
+    def test_refresh_clears_the_database_queries(self, tmp_path):
+        path = str(tmp_path / 'gapminder.sqlite')
+        with sqlite3.connect(path) as connection:
+            self._df.to_sql('gapminder', connection, index=False)
+        source = sql_data_source(path=path, table='gapminder')
+        page = self._page(data_source=source)
+        assert len(page.filter_dataframe(filter_value_list=[['Oceania']])) == 24
+        page.create_html(template='turbo')
+        assert len(source._query_cache) == 1
+
+        with sqlite3.connect(path) as connection:
+            connection.execute('''DELETE FROM gapminder WHERE year < 2000''')
+        page.refresh_data()
+        assert len(source._query_cache) == 0
+        assert len(page.filter_dataframe(filter_value_list=[['Oceania']])) == 4
+
+    def test_callbacks_in_flight_keep_their_version(self):
+        page = self._page(df=self._df)
+        page_data = page._loaded_page_data()
+
+        page.refresh_data(df=self._df.head(10))
+        assert len(page_data.df) == len(self._df)
+        assert page_data.menu_filter_engine is not page.menu_filter_engine
+
+    def test_callbacks_in_flight_keep_their_aggregate_cube(self):
+        bar_output = turbo_output(output_type='bar', x='continent', y='pop', figure_cache_size=8)
+        page = turbo_dashboard_page(url='/app1', df=self._df, output_list=[bar_output], precompute_bar_cubes=True)
+        page.refresh_data(df=self._df)
+        filter_function, data_version, cube = page._output_snapshot(output=bar_output)
+
+        page.refresh_data(df=self._df.head(10))
+        assert data_version == 1 and cube is not page._page_data.aggregate_cube_dict[bar_output]
+        figure = bar_output.create_figure(
+            filter_value_list=[],
+            chart_input_values_list=(),
+            filter_function=filter_function,
+            data_version=data_version,
+            cube=cube,
+        )
+        assert sum(figure['data'][0]['y']) == self._df['pop'].sum()  # the old version, cached under the old version
+
+    def test_nothing_to_refresh(self):
+        with pytest.raises(ValueError):
+            self._page(df=self._df).refresh_data()
+        with pytest.raises(ValueError):
+            self._page(df=self._df, refresh_interval=60)
+
+
+class TestAppendData:
+    _df = data.gapminder()
+
+    def _page(self, df, **kwargs):
+        return turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            df=df,
+            menu_filter_list=[
+                turbo_filter(filter_type='Dropdown-multi', column='country'),
+                turbo_filter(filter_type='RangeSlider', column='year'),
+            ],
+            output_list=[turbo_output(output_type='bar', x='continent', y='pop')],
+            **kwargs
+        )
+
+    @pytest.mark.parametrize('kwargs', [
+        {},
+        {'use_range_index': True, 'use_category_index': True, 'compact_dtypes': True},
+        {'cluster_column': 'year', 'precompute_bar_cubes': True},
+        {'cluster_column': 'lifeExp'},  # the new rows don't come after the old ones, so we rebuild everything
+    ])
+    def test_append_matches_the_combined_rows(self, kwargs):
+        page = self._page(df=self._df[self._df['year'] < 2000], **kwargs)
+        expected_page = self._page(df=self._df, **kwargs)
+        assert len(page.filter_dataframe(filter_value_list=(['Chile'], [1952, 2007]))) == 10
+
+        page.append_data(df=self._df[self._df['year'] >= 2000].sample(frac=1, random_state=0))
+        assert page.data_version == 1
+        for filter_value_list in [(['Chile', 'Zambia'], [1990, 2007]), (None, [2002, 2007])]:
+            filtered_df = page.filter_dataframe(filter_value_list=filter_value_list)
+            expected_df = expected_page.filter_dataframe(filter_value_list=filter_value_list)
+            assert sorted(filtered_df.index) == sorted(expected_df.index)
+        if kwargs.get('precompute_bar_cubes'):
+            assert len(page._page_data.aggregate_cube_dict[page.output_list[0]]) \
+                == len(expected_page._page_data.aggregate_cube_dict[expected_page.output_list[0]])
+
+    def test_callbacks_in_flight_keep_their_aggregate_cube(self):
+        page = self._page(df=self._df[self._df['year'] < 2000], precompute_bar_cubes=True)
+        filter_function, data_version, cube = page._output_snapshot(output=page.output_list[0])
+        cube_size = len(cube)
+
+        page.append_data(df=self._df[self._df['year'] >= 2000])
+        appended_cube = page._page_data.aggregate_cube_dict[page.output_list[0]]
+        assert appended_cube is not cube and len(cube) == cube_size < len(appended_cube)
+        assert cube.aggregate(filter_value_list=(None, [1952, 2007]))['pop'].sum() \
+            == filter_function((None, [1952, 2007]))['pop'].sum()
+
+    @pytest.mark.parametrize('appended_values, filter_value', [
+        ([40000], [39999, 40001]),  # doesn't fit in the int8 the column was compacted to
+        ([2.5], [2.4, 2.6]),  # a float appended to an int column
+    ])
+    def test_append_widens_a_compacted_range_index(self, appended_values, filter_value):
+        def create_page(use_range_index):
+            return turbo_dashboard_page(
+                url='/app1',
+                df=pd.DataFrame({'k': np.arange(100) % 50}),
+                menu_filter_list=[turbo_filter(filter_type='RangeSlider', column='k')],
+                use_range_index=use_range_index,
+                compact_dtypes=True,
+            )
+
+        page, expected_page = create_page(use_range_index=True), create_page(use_range_index=False)
+        assert page.df['k'].dtype == np.int8 and 'k' in page.menu_filter_engine.range_index_dict
+        for each_page in (page, expected_page):
+            each_page.append_data(df=pd.DataFrame({'k': appended_values}, index=[100]))
+
+        for value in (filter_value, [0, 1], [0, 50000]):
+            filtered_df = page.filter_dataframe(filter_value_list=(value,))
+            expected_df = expected_page.filter_dataframe(filter_value_list=(value,))
+            assert filtered_df.index.tolist() == expected_df.index.tolist()
+        assert len(page.filter_dataframe(filter_value_list=(filter_value,))) == 1
+
+    def test_appended_rows_need_the_page_columns(self):
+        with pytest.raises(ValueError):
+            self._page(df=self._df).append_data(df=self._df[['country', 'year']])
@@ -0,0 +1,42 @@
+import pytest
+import numpy as np
+import pandas as pd
+
+from turbo_dash._downsample import lttb_indices, downsample_dataframe
+
+
+class TestDownsample:
+    _x = np.arange(10000, dtype=float)
+    _y = np.sin(_x / 300) + (_x == 5000) * 10  # a wave with a spike in the middle
+
+    @pytest.mark.parametrize('n_out', [3, 10, 100, 1000])
+    def test_lttb_length_and_endpoints(self, n_out):
+        indices = lttb_indices(x=self._x, y=self._y, n_out=n_out)
+        assert len(indices) == n_out
+        assert indices[0] == 0 and indices[-1] == len(self._x) - 1
+        assert np.all(np.diff(indices) > 0)
+
+    def test_lttb_keeps_the_spike(self):
+        assert 5000 in lttb_indices(x=self._x, y=self._y, n_out=100)
+
+    def test_lttb_small_input_is_unchanged(self):
+        assert list(lttb_indices(x=self._x[:5], y=self._y[:5], n_out=10)) == list(range(5))
+
+    def test_downsample_each_color_group(self):
+        df = pd.DataFrame({
+            'x': np.tile(self._x, 2),
+            'y': np.tile(self._y, 2),
+            'color': np.repeat(['a', 'b'], len(self._x)),
+        })
+        downsampled_df = downsample_dataframe(df=df, x='x', y='y', color='color', max_points=50)
+
+        assert downsampled_df.groupby('color').size().to_dict() == {'a': 50, 'b': 50}
+        assert downsampled_df.index.is_monotonic_increasing
+
+    def test_downsample_datetime_x(self):
+        df = pd.DataFrame({'x': pd.date_range('2020-01-01', periods=len(self._x), freq='min'), 'y': self._y})
+        assert len(downsample_dataframe(df=df, x='x', y='y', max_points=100)) == 100
+
+    def test_non_numeric_columns_are_not_downsampled(self):
+        df = pd.DataFrame({'x': [str(value) for value in self._x], 'y': self._y})
+        assert downsample_dataframe(df=df, x='x', y='y', max_points=100) is df
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from turbo_dash import data, turbo_dashboard_page, turbo_filter
+from turbo_dash._dtypes import compact_dataframe, memory_report, convert_filter_value, append_rows
+
+
+class TestCompactDataframe:
+    _df = data.gapminder()
+
+    def test_values_stay_the_same(self):
+        compact_df = compact_dataframe(df=self._df)
+
+        assert isinstance(compact_df['continent'].dtype, pd.CategoricalDtype)
+        assert compact_df['year'].dtype == np.int16
+        assert compact_df['pop'].dtype == np.int32
+        assert compact_df['lifeExp'].dtype == np.float64
+        pd.testing.assert_frame_equal(compact_df, self._df, check_dtype=False, check_categorical=False)
+
+    def test_date_columns(self):
+        df = pd.DataFrame({'date': ['2020-01-01', '2020-02-01'], 'not_a_date': ['a', 'b']})
+        compact_df = compact_dataframe(df=df, date_column_list=['date', 'not_a_date'])
+
+        assert compact_df['date'].dtype == 'datetime64[ns]'
+        assert compact_df['not_a_date'].tolist() == ['a', 'b']
+
+    def test_memory_report(self):
+        report = memory_report(before_df=self._df, after_df=compact_dataframe(df=self._df))
+
+        assert report.loc['total', 'before_bytes'] == self._df.memory_usage(index=False, deep=True).sum()
+        assert report.loc['total', 'after_bytes'] < report.loc['total', 'before_bytes'] / 4
+        assert report.loc['year', 'after_dtype'] == 'int16'
+
+
+class TestAppendRows:
+    def test_categories_are_merged(self):
+        df = compact_dataframe(df=pd.DataFrame({'a': ['x', 'y', 'x', 'y'], 'b': [1, 2, 3, 4]}))
+        appended_df = compact_dataframe(df=pd.DataFrame({'a': ['w', 'w'], 'b': [300, 400]}, index=[4, 5]))
+        extended_df = append_rows(df=df, appended_df=appended_df)
+
+        assert extended_df['a'].cat.categories.tolist() == ['w', 'x', 'y']
+        assert extended_df['a'].tolist() == ['x', 'y', 'x', 'y', 'w', 'w']
+        assert extended_df['b'].dtype == np.int16
+        assert extended_df.index.tolist() == [0, 1, 2, 3, 4, 5]
+
+
+class TestConvertFilterValue:
+    @pytest.mark.parametrize('value, dtype, expected', [
+        (None, np.dtype('int64'), None),
+        ('', np.dtype('datetime64[ns]'), None),
+        ([], np.dtype('int16'), None),
+        (1972, np.dtype('int16'), np.int16(1972)),
+        (100000, np.dtype('int16'), 100000),  # doesn't fit, numpy can still compare it
+        ('1972', np.dtype('int16'), '1972'),
+        ([1960, 1990], np.dtype('int16'), [np.int16(1960), np.int16(1990)]),
+        ('2020-01-01', np.dtype('datetime64[ns]'), np.datetime64('2020-01-01', 'ns')),
+        ('1970-01-01', np.dtype('datetime64[ns]'), np.datetime64(0, 'ns')),
+        ('Asia', pd.CategoricalDtype(['Africa', 'Asia']), 'Asia'),
+    ])
+    def test_convert_filter_value(self, value, dtype, expected):
+        converted = convert_filter_value(value=value, dtype=dtype)
+        assert converted == expected
+        assert type(converted) is type(expected)
+
+
+class TestCompactPage:
+    _df = data.gapminder().assign(date=lambda df: df['year'].astype(str) + '-07-01')
+
+    @pytest.mark.parametrize('use_index', [False, True])
+    def test_compact_page_filters_like_the_original(self, use_index):
+        def create_page(compact_dtypes):
+            return turbo_dashboard_page(
+                url='/app1',
+                df=self._df,
+                menu_filter_list=[
+                    turbo_filter(filter_type='Dropdown-multi', column='continent'),
+                    turbo_filter(filter_type='RangeSlider', column='year'),
+                    turbo_filter(filter_type='DatePickerRange', column='date'),
+                ],
+                use_range_index=use_index,
+                use_category_index=use_index,
+                compact_dtypes=compact_dtypes,
+            )
+
+        page, compact_page = create_page(compact_dtypes=False), create_page(compact_dtypes=True)
+        assert compact_page.df['date'].dtype == 'datetime64[ns]'
+        assert compact_page.memory_report is not None and page.memory_report is None
+
+        for filter_value_list in [
+            (['Asia', 'Europe'], [1960, 1990], '1970-01-01', '1982-12-31'),
+            (None, [1952, 2007], None, '1970-01-01'),
+            (['Oceania'], [1952, 2007], '', None),
+        ]:
+            filtered_df = page.filter_dataframe(filter_value_list=filter_value_list)
+            compact_filtered_df = compact_page.filter_dataframe(filter_value_list=filter_value_list)
+            assert compact_filtered_df.index.tolist() == filtered_df.index.tolist()
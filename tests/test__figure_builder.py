@@ -0,0 +1,44 @@
+import json
+import pytest
+import plotly.io
+import plotly.express as px
+
+from turbo_dash import data
+from turbo_dash._figure_builder import build_fast_figure
+
+
+class TestFigureBuilder:
+    _df = data.gapminder()
+
+    @staticmethod
+    def _to_dict(figure):
+        return json.loads(plotly.io.to_json(figure, validate=False))
+
+    @pytest.mark.parametrize('output_type, px_function, kwargs', [
+        ('scatter', px.scatter, dict(size='gdpPercap', hover_name='country', render_mode='svg')),
+        ('scatter', px.scatter, dict(hover_data=['lifeExp'], render_mode='webgl')),
+        ('line', px.line, dict(hover_name='country', render_mode='svg')),
+        ('area', px.area, dict()),
+        ('bar', px.bar, dict(hover_data=['lifeExp', 'country'])),
+    ])
+    def test_matches_plotly_express(self, output_type, px_function, kwargs):
+        px_figure = px_function(self._df, x='year', y='pop', color='continent', template='seaborn', **kwargs)
+        fast_figure = build_fast_figure(
+            df=self._df,
+            output_type=output_type,
+            x='year',
+            y='pop',
+            color='continent',
+            chart_template='seaborn',
+            **kwargs
+        )
+        assert self._to_dict(fast_figure) == self._to_dict(px_figure)
+
+    @pytest.mark.parametrize('output_type, kwargs', [
+        ('choropleth', dict(x='year', y='pop')),  # not a supported output type
+        ('scatter', dict(x='year', y='pop', color='lifeExp')),  # continuous color
+        ('scatter', dict(x='year', y=['pop', 'lifeExp'])),  # wide-form y
+        ('line', dict(x='year', y='not a column')),
+    ])
+    def test_unsupported_figures_fall_back(self, output_type, kwargs):
+        assert build_fast_figure(df=self._df, output_type=output_type, **kwargs) is None
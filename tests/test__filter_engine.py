@@ -0,0 +1,288 @@
+import sqlite3
+import pytest
+import numpy as np
+import pandas as pd
+
+from turbo_dash import data, turbo_filter, turbo_dashboard_page, sql_data_source
+from turbo_dash._filter_engine import filter_engine, sql_filter_engine
+from turbo_dash._filter_index import build_range_index, build_category_index, search_index
+from turbo_dash._filter_options import get_filter_options
+
+
+class TestFilterEngine:
+    _df = data.gapminder()
+
+    _filter_and_values_list = [
+        (turbo_filter(filter_type='Checklist', column='continent'), (['Europe', 'Asia'],)),
+        (turbo_filter(filter_type='Checklist', column='continent'), ([],)),
+        (turbo_filter(filter_type='Dropdown', column='country'), ('Canada',)),
+        (turbo_filter(filter_type='Dropdown', column='country'), (None,)),
+        (turbo_filter(filter_type='Dropdown-multi', column='country'), (['Canada', 'France'],)),
+        (turbo_filter(filter_type='Dropdown-search', column='country'), (['Canada', 'France'],)),
+        (turbo_filter(filter_type='RadioItems', column='continent'), ('Africa',)),
+        (turbo_filter(filter_type='RangeSlider', column='year'), ([1960, 1990],)),
+        (turbo_filter(filter_type='Slider', column='year'), (1972,)),
+        (turbo_filter(filter_type='Slider', column='year'), ('1972',)),
+    ]
+
+    @staticmethod
+    def _expected(df, tf, values):
+        """filter the df the slow way, one copy per filter"""
+        ret = df
+        for value in values:
+            if tf.filter_type in ('Checklist', 'Dropdown-multi', 'Dropdown-search'):
+                ret = ret[ret[tf.column].isin(value)] if value else ret
+            elif tf.filter_type == 'RangeSlider':
+                ret = ret[(ret[tf.column] >= value[0]) & (ret[tf.column] <= value[1])]
+            else:
+                ret = ret[ret[tf.column] == value] if value else ret
+        return ret
+
+    @pytest.mark.parametrize('tf, values', _filter_and_values_list)
+    def test_single_filter_matches_pandas(self, tf, values):
+        engine = filter_engine(menu_filter_list=[tf])
+        expected = self._expected(self._df, tf, values)
+        pd.testing.assert_frame_equal(engine.filter_dataframe(df=self._df, filter_value_list=values), expected)
+
+    def test_combined_filters_match_pandas(self):
+        menu_filter_list = [
+            turbo_filter(filter_type='Checklist', column='continent'),
+            turbo_filter(filter_type='Dropdown-multi', column='country'),
+            turbo_filter(filter_type='RangeSlider', column='year'),
+        ]
+        values = (['Europe', 'Americas'], ['Canada', 'France', 'Japan'], [1960, 1990])
+        engine = filter_engine(menu_filter_list=menu_filter_list)
+
+        expected = self._df
+        for tf, value in zip(menu_filter_list, values):
+            expected = self._expected(expected, tf, (value,))
+
+        pd.testing.assert_frame_equal(engine.filter_dataframe(df=self._df, filter_value_list=values), expected)
+
+    @pytest.mark.parametrize('tf, values, expected_index', [
+        (turbo_filter(filter_type='DatePickerRange', column='date'), ('2020-01-15', None), [2, 3]),
+        (turbo_filter(filter_type='DatePickerRange', column='date'), (None, '2020-02-01'), [0, 2]),
+        (turbo_filter(filter_type='RangeSlider', column='date'), (['2020-01-01', '2020-02-15'],), [0, 2]),
+    ])
+    def test_missing_values_are_not_matched(self, tf, values, expected_index):
+        for missing_value in (None, np.nan):
+            df = pd.DataFrame({'date': ['2020-01-01', missing_value, '2020-02-01', '2020-03-01']})
+            filtered_df = filter_engine(menu_filter_list=[tf]).filter_dataframe(df=df, filter_value_list=values)
+            assert filtered_df.index.tolist() == expected_index
+
+    def test_no_filter_returns_original_df(self):
+        engine = filter_engine(menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='country')])
+        assert engine.filter_dataframe(df=self._df, filter_value_list=(None,)) is self._df
+
+    def test_wrong_number_of_values(self):
+        engine = filter_engine(menu_filter_list=[turbo_filter(filter_type='RangeSlider', column='year')])
+        with pytest.raises(ValueError):
+            engine.filter_dataframe(df=self._df, filter_value_list=())
+
+
+class TestSqlFilterEngine:
+    _df = data.gapminder()
+
+    @pytest.fixture
+    def source(self, tmp_path):
+        path = str(tmp_path / 'gapminder.sqlite')
+        with sqlite3.connect(path) as connection:
+            self._df.to_sql('gapminder', connection, index=False)
+        return sql_data_source(path=path, table='gapminder')
+
+    # sqlite compares '1972' to an integer column as a number, so we leave out the string Slider value
+    @pytest.mark.parametrize('tf, values', TestFilterEngine._filter_and_values_list[:-1])
+    def test_single_filter_matches_pandas(self, source, tf, values):
+        engine = sql_filter_engine(menu_filter_list=[tf])
+        expected = TestFilterEngine._expected(self._df, tf, values).reset_index(drop=True)
+        pd.testing.assert_frame_equal(engine.filter_dataframe(data_source=source, filter_value_list=values), expected)
+
+    def test_where_clause(self):
+        engine = sql_filter_engine(menu_filter_list=[
+            turbo_filter(filter_type='Checklist', column='continent'),
+            turbo_filter(filter_type='DatePickerRange', column='da"te'),
+            turbo_filter(filter_type='RangeSlider', column='year'),
+        ])
+        assert engine.where_clause(filter_value_list=(['Europe', 'Asia'], None, '2020-01-01', [1960, 1990])) == (
+            '("continent" IN (?, ?)) AND ("da""te" <= ?) AND ("year" >= ? AND "year" <= ?)',
+            ['Europe', 'Asia', '2020-01-01', 1960, 1990],
+        )
+        assert engine.where_clause(filter_value_list=([], None, None, [1960, 1990]))[0] == \
+            '("year" >= ? AND "year" <= ?)'
+
+    def test_no_filter(self):
+        engine = sql_filter_engine(menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='country')])
+        assert engine.where_clause(filter_value_list=(None,)) == (None, [])
+
+    def test_wrong_number_of_values(self):
+        engine = sql_filter_engine(menu_filter_list=[turbo_filter(filter_type='RangeSlider', column='year')])
+        with pytest.raises(ValueError):
+            engine.where_clause(filter_value_list=())
+
+
+class TestRangeIndex:
+    _df = data.gapminder()
+
+    _menu_filter_list = [
+        turbo_filter(filter_type='Dropdown-multi', column='country'),
+        turbo_filter(filter_type='RangeSlider', column='year'),
+        turbo_filter(filter_type='RangeSlider', column='pop'),
+    ]
+
+    _values_list = [
+        (['Canada', 'France', 'Japan'], [1960, 1990], [0, 1e12]),
+        (None, [1960, 1990], [1e6, 5e7]),
+        (None, [1990, 1960], [0, 1e12]),
+        (None, [1950, 2010], [0, 1e12]),
+    ]
+
+    @staticmethod
+    def _expected(df, values):
+        ret = df
+        if values[0]:
+            ret = ret[ret['country'].isin(values[0])]
+        ret = ret[(ret['year'] >= values[1][0]) & (ret['year'] <= values[1][1])]
+        return ret[(ret['pop'] >= values[2][0]) & (ret['pop'] <= values[2][1])]
+
+    @pytest.mark.parametrize('values', _values_list)
+    def test_range_index_matches_pandas(self, values):
+        page = turbo_dashboard_page(df=self._df, menu_filter_list=self._menu_filter_list, use_range_index=True)
+        assert set(page.menu_filter_engine.range_index_dict) == {'year', 'pop'}
+
+        filtered_df = page.menu_filter_engine.filter_dataframe(df=page.df, filter_value_list=values)
+        pd.testing.assert_frame_equal(filtered_df, self._expected(self._df, values))
+
+    @pytest.mark.parametrize('values', _values_list)
+    def test_clustered_range_index_matches_pandas(self, values):
+        page = turbo_dashboard_page(df=self._df, menu_filter_list=self._menu_filter_list, cluster_column='year')
+        assert page.menu_filter_engine.range_index_dict['year'].is_clustered
+
+        filtered_df = page.menu_filter_engine.filter_dataframe(df=page.df, filter_value_list=values)
+        pd.testing.assert_frame_equal(filtered_df.sort_index(), self._expected(self._df, values))
+
+    def test_datepickerrange_open_bounds(self):
+        df = pd.DataFrame({'date': ['2020-01-0{}'.format(day) for day in range(1, 10)]})
+        index = build_range_index(df=df, column='date')
+
+        assert list(index.positions(low='2020-01-03', high=None)) == list(range(2, 9))
+        assert list(index.positions(low=None, high='2020-01-03')) == [0, 1, 2]
+
+    def test_unsortable_column_is_not_indexed(self):
+        assert build_range_index(df=pd.DataFrame({'a': ['x', None, 'y']}), column='a') is None
+
+    def test_append_matches_a_new_index(self):
+        df = pd.DataFrame({'a': [3.0, 1.0, np.nan, 2.0, 1.0, 5.0, np.nan, 0.0, 2.0]})
+        index = build_range_index(df=df.head(5), column='a').append(values=df['a'].to_numpy()[5:])
+        expected = build_range_index(df=df, column='a')
+
+        np.testing.assert_array_equal(index._order, expected._order)
+        assert list(index.positions(low=1.0, high=2.0)) == [1, 3, 4, 8]
+
+    def test_append_to_a_clustered_index(self):
+        index = build_range_index(df=pd.DataFrame({'a': [1, 2, 2]}), column='a', is_clustered=True)
+
+        assert index.append(values=np.array([2, 3])).positions(low=2, high=2) == slice(1, 4)
+        assert index.append(values=np.array([3, 1])) is None  # the rows aren't sorted anymore
+
+
+class TestCategoryIndex:
+    _df = data.gapminder()
+
+    _menu_filter_list = [
+        turbo_filter(filter_type='Checklist', column='continent'),
+        turbo_filter(filter_type='Dropdown-multi', column='country'),
+        turbo_filter(filter_type='Dropdown', column='iso_alpha'),
+        turbo_filter(filter_type='RangeSlider', column='year'),
+    ]
+
+    _values_list = [
+        (['Europe', 'Americas'], ['Canada', 'France', 'Japan'], None, [1960, 1990]),
+        (['Europe', 'Asia', 'Africa'], None, None, [1950, 2010]),
+        (None, ['Canada', 'not a country'], 'CAN', [1950, 2010]),
+        (['Oceania'], ['Canada'], None, [1950, 2010]),
+        (None, None, 'FRA', [1972, 1972]),
+    ]
+
+    @staticmethod
+    def _expected(df, values):
+        ret = df
+        if values[0]:
+            ret = ret[ret['continent'].isin(values[0])]
+        if values[1]:
+            ret = ret[ret['country'].isin(values[1])]
+        if values[2]:
+            ret = ret[ret['iso_alpha'] == values[2]]
+        return ret[(ret['year'] >= values[3][0]) & (ret['year'] <= values[3][1])]
+
+    @pytest.mark.parametrize('use_range_index', [False, True])
+    @pytest.mark.parametrize('values', _values_list)
+    def test_category_index_matches_pandas(self, values, use_range_index):
+        page = turbo_dashboard_page(
+            df=self._df,
+            menu_filter_list=self._menu_filter_list,
+            use_category_index=True,
+            use_range_index=use_range_index,
+        )
+        assert set(page.menu_filter_engine.category_index_dict) == {'continent', 'country', 'iso_alpha'}
+
+        filtered_df = page.menu_filter_engine.filter_dataframe(df=page.df, filter_value_list=values)
+        pd.testing.assert_frame_equal(filtered_df, self._expected(self._df, values))
+
+    def test_missing_values_are_not_matched(self):
+        index = build_category_index(df=pd.DataFrame({'a': ['x', None, 'y', 'x']}), column='a')
+
+        assert list(index.positions(value_list=['x'])) == [0, 3]
+        assert list(index.positions(value_list=['y', 'x'])) == [0, 2, 3]
+        assert list(index.positions(value_list=['z'])) == []
+
+    def test_append_matches_a_new_index(self):
+        df = pd.DataFrame({'a': ['x', None, 'y', 'x', 'z', None, 'y', 'w', 'x']})
+        index = build_category_index(df=df.head(4), column='a').append(values=df['a'].to_numpy()[4:])
+        expected = build_category_index(df=df, column='a')
+
+        np.testing.assert_array_equal(index._order, expected._order)
+        for value_list in (['x'], ['y', 'w'], ['z', 'not a value'], [None]):
+            assert list(index.positions(value_list=value_list)) == list(expected.positions(value_list=value_list))
+
+
+class TestSearchIndex:
+    _index = search_index(option_list=get_filter_options(df=data.gapminder(), column='iso_num', label_column='country'))
+
+    @staticmethod
+    def _labels(option_list):
+        return [option['label'] for option in option_list]
+
+    def test_prefix_matches_come_first(self):
+        assert self._labels(self._index.search(search_value='can', limit=3)) \
+            == ['Canada', 'Central African Republic', 'Dominican Republic']
+        assert self._labels(self._index.search(search_value='ZIM')) == ['Zimbabwe']
+
+    def test_substring_matches_fill_up_the_results(self):
+        labels = self._labels(self._index.search(search_value='land', limit=50))
+        assert labels == ['Finland', 'Iceland', 'Ireland', 'Netherlands', 'New Zealand', 'Poland', 'Swaziland',
+                          'Switzerland', 'Thailand']
+        assert len(self._index.search(search_value='land', limit=2)) == 2
+
+    def test_no_search_value_or_no_match(self):
+        assert self._index.search(search_value=None) == []
+        assert self._index.search(search_value='') == []
+        assert self._index.search(search_value='not a country') == []
+
+    def test_options_for_values(self):
+        assert self._index.options_for_values(value_list=[124, 12345]) == [{'label': 'Canada', 'value': 124}]
+        assert self._index.options_for_values(value_list=None) == []
+
+
+class TestFilteredDataframeCache:
+    _df = data.gapminder()
+
+    def test_page_reuses_filtered_df(self):
+        page = turbo_dashboard_page(
+            df=self._df,
+            menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='country')],
+        )
+        first = page.filter_dataframe(filter_value_list=(['Canada', 'France'],))
+        second = page.filter_dataframe(filter_value_list=(['Canada', 'France'],))
+
+        assert first is second
+        assert page.filter_dataframe(filter_value_list=(None,)) is self._df
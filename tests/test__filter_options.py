@@ -0,0 +1,87 @@
+import gc
+import pytest
+import numpy as np
+import pandas as pd
+
+from turbo_dash import data, turbo_filter
+from turbo_dash import _filter_options
+from turbo_dash._filter_options import get_filter_options, get_slider_settings, get_search_index, extend_filter_options
+from turbo_dash._lookups import _template_lookup
+
+
+class TestFilterOptions:
+    _df = data.gapminder()
+
+    @staticmethod
+    def _groupby_options(df, column, label_column):
+        return [{'label': label, 'value': value} for (label, value), _ in df.groupby([label_column, column])]
+
+    @pytest.mark.parametrize('column, label_column', [
+        ('country', 'country'),
+        ('year', 'year'),
+        ('iso_num', 'country'),
+        ('country', 'iso_alpha'),
+    ])
+    def test_matches_groupby(self, column, label_column):
+        assert get_filter_options(df=self._df, column=column, label_column=label_column) \
+            == self._groupby_options(df=self._df, column=column, label_column=label_column)
+
+    def test_missing_values_are_left_out(self):
+        df = pd.DataFrame({'value': [1.0, np.nan, 2.0, 1.0], 'label': ['a', 'b', None, 'a']})
+        assert get_filter_options(df=df, column='value', label_column='label') == [{'label': 'a', 'value': 1.0}]
+
+    def test_options_are_cached_per_dataframe(self):
+        df = self._df.copy()
+        options = get_filter_options(df=df, column='continent')
+        assert get_filter_options(df=df, column='continent') is options
+        assert get_filter_options(df=df.copy(), column='continent') is not options
+
+        key = (id(df), 'options', 'continent', 'continent')
+        del df
+        gc.collect()
+        assert key not in _filter_options._filter_options_dict
+
+    def test_slider_marks_every_value_under_max_marks(self):
+        slider_settings = get_slider_settings(df=self._df, column='year', max_marks=50)
+        assert list(slider_settings['marks']) == [str(year) for year in sorted(self._df['year'].unique())]
+        assert slider_settings['step'] is None
+
+    @pytest.mark.parametrize('values, expected_step', [
+        (np.arange(0, 100000, 5), 5),
+        (np.linspace(0.0, 1.0, 10001), 0.001),
+    ])
+    def test_slider_marks_are_thinned(self, values, expected_step):
+        slider_settings = get_slider_settings(df=pd.DataFrame({'value': values}), column='value', max_marks=20)
+        assert len(slider_settings['marks']) == 20
+        assert slider_settings['minimum'] == values[0] and slider_settings['maximum'] == values[-1]
+        assert slider_settings['step'] == pytest.approx(expected_step)
+
+    @pytest.mark.parametrize('values', [np.linspace(0.0, 1.0, 10001), np.array([0, 3, 100, 103, 200, 203] * 10)])
+    def test_only_range_sliders_get_a_step(self, values):
+        df = pd.DataFrame({'value': values})
+        html_dict = {
+            filter_type: turbo_filter(filter_type=filter_type, column='value', max_marks=3).create_html(
+                template='turbo', df=df, location='menu', template_lookup_dict=_template_lookup,
+            ).children[1]
+            for filter_type in ('Slider', 'RangeSlider')
+        }
+
+        assert html_dict['RangeSlider'].step is not None
+        assert html_dict['Slider'].step is None
+        assert all(float(mark) in set(values) for mark in html_dict['Slider'].marks)
+
+    def test_extend_filter_options_matches_the_combined_df(self):
+        df, appended_df = self._df[self._df['year'] < 2000], self._df[self._df['year'] >= 2000]
+        extended_df = pd.concat([df, appended_df])
+        options = get_filter_options(df=df, column='country')
+        year_options = get_filter_options(df=df, column='year')
+        get_slider_settings(df=df, column='year', max_marks=5)
+        index = get_search_index(df=df, column='country')
+
+        extend_filter_options(df=df, appended_df=appended_df, extended_df=extended_df)
+        assert get_filter_options(df=extended_df, column='country') is options  # no new countries
+        assert get_search_index(df=extended_df, column='country') is index
+        assert get_filter_options(df=extended_df, column='year') is not year_options
+        assert get_filter_options(df=extended_df, column='year') == get_filter_options(df=self._df, column='year')
+        assert get_slider_settings(df=extended_df, column='year', max_marks=5) \
+            == get_slider_settings(df=self._df, column='year', max_marks=5)
@@ -1,5 +1,5 @@
 import pytest
-from turbo_dash._helpers import generate_random_string
+from turbo_dash._helpers import generate_random_string, generate_component_id_suffix, make_hashable
 
 
 class TestHelpers:
@@ -14,3 +14,20 @@ class TestHelpers:
     def test_lowercase_or_digit(self, length):
         test_string = generate_random_string(length=length)
         assert all(character.isdigit() or character.islower() for character in test_string)
+
+    @pytest.mark.parametrize('value, expected', [
+        (None, None),
+        ('Canada', 'Canada'),
+        ([1960, 1990], (1960, 1990)),
+        ((['a', 'b'], None), (('a', 'b'), None)),
+        ({'b': [1], 'a': 2}, (('a', 2), ('b', (1,)))),
+    ])
+    def test_make_hashable(self, value, expected):
+        assert make_hashable(value) == expected
+        hash(make_hashable(value))
+
+    def test_generate_component_id_suffix(self):
+        suffix = generate_component_id_suffix('/app1', 0, 'RangeSlider', 'year')
+        assert suffix == generate_component_id_suffix('/app1', 0, 'RangeSlider', 'year')
+        assert suffix != generate_component_id_suffix('/app1', 1, 'RangeSlider', 'year')
+        assert len(suffix) == 16
@@ -0,0 +1,91 @@
+import pytest
+
+from turbo_dash import data, turbo_dashboard, turbo_dashboard_page, turbo_filter, turbo_output
+from turbo_dash._metrics import metrics_registry, default_registry
+
+
+class TestMetricsRegistry:
+    def test_render_histogram(self):
+        registry = metrics_registry()
+        registry.observe('turbo_dash_layout_seconds', 0.003, page='/app1')
+        registry.observe('turbo_dash_layout_seconds', 0.25, page='/app1')
+        registry.observe('turbo_dash_layout_seconds', 60, page='/app1')
+        lines = registry.render().splitlines()
+
+        assert lines[:2] == [
+            '# HELP turbo_dash_layout_seconds seconds it took to route a url to its page layout',
+            '# TYPE turbo_dash_layout_seconds histogram',
+        ]
+        assert 'turbo_dash_layout_seconds_bucket{page="/app1",le="0.0025"} 0' in lines
+        assert 'turbo_dash_layout_seconds_bucket{page="/app1",le="0.005"} 1' in lines
+        assert 'turbo_dash_layout_seconds_bucket{page="/app1",le="0.25"} 2' in lines  # the buckets are inclusive
+        assert 'turbo_dash_layout_seconds_bucket{page="/app1",le="+Inf"} 3' in lines
+        assert 'turbo_dash_layout_seconds_sum{page="/app1"} 60.253' in lines
+        assert 'turbo_dash_layout_seconds_count{page="/app1"} 3' in lines
+
+    def test_time_and_escaping(self):
+        registry = metrics_registry()
+        with pytest.raises(KeyError):
+            with registry.time('turbo_dash_callback_phase_seconds', output='say "hi"\n', phase='filter'):
+                raise KeyError('timed anyway')
+
+        assert 'turbo_dash_callback_phase_seconds_count{output="say \\"hi\\"\\n",phase="filter"} 1' \
+            in registry.render().splitlines()
+        registry.clear()
+        assert registry.render() == ''
+
+    def test_unknown_histogram(self):
+        with pytest.raises(ValueError):
+            metrics_registry().observe('turbo_dash_made_up_seconds', 1)
+
+
+class TestMetricsRoute:
+    _df = data.gapminder()
+
+    @pytest.fixture
+    def registry(self):
+        default_registry.clear()
+        yield default_registry
+        default_registry.is_enabled = False
+        default_registry.clear()
+
+    @pytest.mark.parametrize('figure_cache_size', [0, 16])
+    def test_callbacks_and_layouts_are_timed(self, registry, figure_cache_size):
+        page = turbo_dashboard_page(
+            url='/app1',
+            name='App 1',
+            df=self._df,
+            menu_filter_list=[turbo_filter(filter_type='Dropdown-multi', column='continent')],
+            output_list=[turbo_output(output_type='scatter', x='gdpPercap', y='lifeExp', figure_cache_size=figure_cache_size)],
+        )
+        client = turbo_dashboard(template='turbo', dashboard_page_list=[page], metrics_route='/metrics').run_dashboard(
+            app_name=__name__,
+            is_in_production=True,
+        ).server.test_client()
+
+        output = page.output_list[0]
+        response = client.post('/_dash-update-component', json={
+            'output': '{}.figure'.format(output.component_id),
+            'outputs': {'id': output.component_id, 'property': 'figure'},
+            'inputs': [{'id': page.menu_filter_list[0].component_id, 'property': 'value', 'value': ['Asia']}],
+            'changedPropIds': [],
+        })
+        assert response.status_code == 200
+        client.post('/_dash-update-component', json={
+            'output': 'dashboard_wrapper_div.children',
+            'outputs': {'id': 'dashboard_wrapper_div', 'property': 'children'},
+            'inputs': [{'id': 'url', 'property': 'pathname', 'value': '/app1'}],
+            'changedPropIds': ['url.pathname'],
+        })
+
+        metrics = client.get('/metrics')
+        assert metrics.content_type.startswith('text/plain; version=0.0.4')
+        lines = metrics.get_data(as_text=True).splitlines()
+        labels = 'output="{}",page="/app1"'.format(output.component_id)
+        for phase in ('filter', 'figure', 'serialize'):
+            assert 'turbo_dash_callback_phase_seconds_count{{{},phase="{}"}} 1'.format(labels, phase) in lines
+        assert 'turbo_dash_output_rows_sum{{{}}} 396.0'.format(labels) in lines
+        assert 'turbo_dash_filter_rows_sum{page="/app1",stage="before"} 1704.0' in lines
+        assert 'turbo_dash_filter_rows_sum{page="/app1",stage="after"} 396.0' in lines
+        assert 'turbo_dash_payload_bytes_count{{{}}} 1'.format(labels) in lines
+        assert 'turbo_dash_layout_seconds_count{page="/app1"} 1' in lines
@@ -0,0 +1,90 @@
+import gzip
+import pytest
+
+from turbo_dash import data, turbo_dashboard, turbo_dashboard_page, turbo_filter
+
+
+class TestTurboDashboard:
+    _df = data.gapminder()
+
+    def _dashboard(self, **kwargs):
+        return turbo_dashboard(
+            template='turbo',
+            dashboard_page_list=[
+                turbo_dashboard_page(
+                    url='/app1',
+                    name='App 1',
+                    df=self._df,
+                    menu_filter_list=[turbo_filter(filter_type='RangeSlider', column='year')],
+                ),
+            ],
+            **kwargs
+        )
+
+    def test_layouts_are_built_once_on_first_visit(self):
+        dashboard = self._dashboard()
+        urls_names_and_html = dashboard._urls_names_and_html(template=dashboard.template)
+        assert len(dashboard._layout_cache) == 0
+
+        first_html = dashboard._page_html(urls_names_and_html=urls_names_and_html, url='/app1')
+        assert dashboard._page_html(urls_names_and_html=urls_names_and_html, url='/app1') is first_html
+        assert dashboard._layout_cache.stats()['misses'] == 1
+
+    def test_layouts_are_rebuilt_after_a_refresh(self):
+        dashboard = self._dashboard()
+        urls_names_and_html = dashboard._urls_names_and_html(template=dashboard.template)
+        first_html = dashboard._page_html(urls_names_and_html=urls_names_and_html, url='/app1')
+
+        dashboard.dashboard_page_list[0].refresh_data(df=self._df[self._df['year'] >= 2000])
+        assert dashboard._page_html(urls_names_and_html=urls_names_and_html, url='/app1') is not first_html
+        assert dashboard._layout_cache.stats()['misses'] == 2
+
+    def test_prewarm_layouts_at_startup(self):
+        dashboard = self._dashboard(prewarm_layouts='startup')
+        dashboard._prewarm_layouts(urls_names_and_html=dashboard._urls_names_and_html(template=dashboard.template))
+        assert len(dashboard._layout_cache) == len(dashboard.dashboard_page_list)
+
+    def test_serialized_layouts_match_dash(self):
+        body = {
+            'output': 'dashboard_wrapper_div.children',
+            'outputs': {'id': 'dashboard_wrapper_div', 'property': 'children'},
+            'inputs': [{'id': 'url', 'property': 'pathname', 'value': '/app1'}],
+            'changedPropIds': ['url.pathname'],
+        }
+        response_list = []
+        for serialize_layouts in (False, True):
+            dashboard = self._dashboard(serialize_layouts=serialize_layouts)
+            client = dashboard.run_dashboard(app_name=__name__, is_in_production=True).server.test_client()
+            response_list.append(client.post('/_dash-update-component', json=body))
+            response_list.append(client.post('/_dash-update-component', json=body, headers={'Accept-Encoding': 'gzip'}))
+        dash_response, dash_gzipped_response, serialized_response, serialized_gzipped_response = response_list
+
+        assert serialized_response.data == dash_response.data
+        assert len(dashboard._serialized_layout_cache) == 1
+        for gzipped_response in (dash_gzipped_response, serialized_gzipped_response):
+            assert gzipped_response.headers['Content-Encoding'] == 'gzip'
+            assert gzip.decompress(gzipped_response.data) == dash_response.data
+
+    def test_dropdown_search_callback(self):
+        search_filter = turbo_filter(filter_type='Dropdown-search', column='country', max_search_results=2)
+        app = turbo_dashboard(
+            template='turbo',
+            dashboard_page_list=[
+                turbo_dashboard_page(url='/app1', name='App 1', df=self._df, menu_filter_list=[search_filter]),
+            ],
+        ).run_dashboard(app_name=__name__, is_in_production=True)
+
+        response = app.server.test_client().post('/_dash-update-component', json={
+            'output': '{}.options'.format(search_filter.component_id),
+            'outputs': {'id': search_filter.component_id, 'property': 'options'},
+            'inputs': [{'id': search_filter.component_id, 'property': 'search_value', 'value': 'ger'}],
+            'state': [{'id': search_filter.component_id, 'property': 'value', 'value': ['Canada']}],
+            'changedPropIds': ['{}.search_value'.format(search_filter.component_id)],
+        })
+        options = response.get_json()['response'][search_filter.component_id]['options']
+
+        assert [option['label'] for option in options] == ['Canada', 'Germany', 'Algeria']
+
+    def test_unknown_prewarm_layouts(self):
+        with pytest.raises(ValueError):
+            self._dashboard(prewarm_layouts='always')
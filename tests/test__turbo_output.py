@@ -0,0 +1,61 @@
+import pytest
+
+from turbo_dash import data, turbo_output
+
+
+class TestTurboOutput:
+    _df = data.gapminder()
+
+    @pytest.mark.parametrize('render_mode, webgl_threshold, row_count, expected', [
+        ('auto', 1000, 1000, 'svg'),
+        ('auto', 1000, 1001, 'webgl'),
+        ('auto', 50000, 1704, 'svg'),
+        ('svg', 1000, 1704, 'svg'),
+        ('webgl', 1000, 10, 'webgl'),
+    ])
+    def test_render_mode(self, render_mode, webgl_threshold, row_count, expected):
+        output = turbo_output(
+            output_type='scatter',
+            x='gdpPercap',
+            y='lifeExp',
+            render_mode=render_mode,
+            webgl_threshold=webgl_threshold,
+        )
+        figure = output._assemble_chart_object_from_filtered_df_and_chart_input_list(
+            df=self._df.head(row_count),
+            chart_input_values_list=(),
+        )
+        assert figure.data[0].type == ('scattergl' if expected == 'webgl' else 'scatter')
+
+    def test_unknown_render_mode(self):
+        with pytest.raises(ValueError):
+            turbo_output(output_type='scatter', render_mode='canvas')
+
+    def test_fast_figure_builder(self):
+        output = turbo_output(output_type='bar', x='year', y='pop', color='continent', figure_builder='fast')
+        figure = output._assemble_chart_object_from_filtered_df_and_chart_input_list(
+            df=self._df,
+            chart_input_values_list=(),
+        )
+        assert isinstance(figure, dict)
+        assert [trace['name'] for trace in figure['data']] == list(self._df['continent'].unique())
+
+    def test_unknown_figure_builder(self):
+        with pytest.raises(ValueError):
+            turbo_output(output_type='scatter', figure_builder='graph_objects')
+
+    def test_component_ids_are_deterministic(self):
+        def create_output():
+            return turbo_output(output_type='line', x='year', y='lifeExp', chart_input_list=['y'])
+
+        output, same_output = create_output(), create_output()
+        assert output.component_id == same_output.component_id
+        assert output.chart_input_turbo_filter_list[0].component_id \
+            == same_output.chart_input_turbo_filter_list[0].component_id
+
+        # the same output on a different page gets a different id, and so do its chart inputs
+        other_page_id = same_output.set_component_id(scope='/app2', position=0)
+        assert other_page_id != output.component_id
+        assert same_output.dash_dependencies_output.component_id == other_page_id
+        assert same_output.chart_input_turbo_filter_list[0].component_id \
+            != output.chart_input_turbo_filter_list[0].component_id
@@ -2,6 +2,9 @@
 
 # import stuff so the package has access to it
 from . import data
+from ._data_source import (
+    data_source, csv_data_source, parquet_data_source, arrow_data_source, pickle_data_source, sql_data_source,
+)
 from ._turbo_dashboard import turbo_dashboard
 from ._turbo_dashboard_page import turbo_dashboard_page
 from ._turbo_filter import turbo_filter
@@ -0,0 +1,159 @@
+from typing import Any, Callable, Dict, Hashable
+from collections import OrderedDict
+import threading
+import time
+
+
+class lru_cache(object):
+    """thread-safe least-recently-used cache with a byte budget, an optional size bound, and an optional TTL
+
+    Each distinct key is only computed once: if another thread asks for a key that's already being computed,
+    it waits for that result instead of computing it again.
+
+    Methods:
+        get_or_compute: grab the value for a key, computing and storing it if we don't have it
+        clear: remove everything from the cache
+        stats: grab the hit/miss counters and the size of the cache
+    """
+
+    def __init__(
+            self,
+            max_bytes: int = None,
+            max_items: int = None,
+            ttl: float = None,
+    ):
+        """create the cache
+
+        Args:
+            max_bytes (:obj: `int`, optional): default `None`, the most bytes we'll keep in the cache before evicting
+                the least recently used values, `None` means there's no byte budget, anything <= 0 means we
+                don't keep anything
+            max_items (:obj: `int`, optional): default `None`, the most values we'll keep in the cache before evicting
+                the least recently used values, `None` means there's no limit
+            ttl (:obj: `float`, optional): default `None`, how many seconds a value stays valid after we compute it,
+                `None` means values don't expire
+        """
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.ttl = ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._value_dict = OrderedDict()  # key -> (value, size in bytes, expiry time), least recently used first
+        self._in_flight_dict = {}  # key -> _in_flight_value for keys that are being computed right now
+
+    def __len__(self) -> int:
+        return len(self._value_dict)
+
+    def get_or_compute(
+            self,
+            key: Hashable,
+            compute_function: Callable[[], Any],
+            size_function: Callable[[Any], int] = None,
+    ) -> Any:
+        """grab the value for a key, computing and storing it if we don't have it
+
+        Args:
+            key (Hashable): the key for the value we want
+            compute_function (Callable[[], Any]): function that computes the value if it's not in the cache
+            size_function (:obj: `Callable[[Any], int]`, optional): default `None`, function that returns the size
+                of a value in bytes, only needed if we have a byte budget
+
+        Returns:
+            Any: the cached or computed value
+        """
+        with self._lock:
+            if key in self._value_dict:
+                value, size, expires_at = self._value_dict[key]
+                if expires_at is None or expires_at > time.monotonic():
+                    self._value_dict.move_to_end(key)
+                    self.hits += 1
+                    return value
+
+                # it's expired, so forget it and compute it again
+                del self._value_dict[key]
+                self.current_bytes -= size
+
+            in_flight = self._in_flight_dict.get(key)
+            is_computing = in_flight is None  # if nobody's computing it, it's our job
+            if is_computing:
+                self.misses += 1
+                in_flight = self._in_flight_dict[key] = _in_flight_value()
+            else:
+                self.hits += 1
+
+        if not is_computing:
+            # somebody else is computing it, wait for them and use their result
+            in_flight.event.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.value
+
+        try:
+            in_flight.value = compute_function()
+            self._store(
+                key=key,
+                value=in_flight.value,
+                size=size_function(in_flight.value) if size_function is not None else 0,
+            )
+            return in_flight.value
+        except Exception as error:
+            in_flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight_dict[key]
+            in_flight.event.set()
+
+    def clear(self) -> None:
+        """remove everything from the cache"""
+        with self._lock:
+            self._value_dict.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """grab the hit/miss counters and the size of the cache
+
+        Returns:
+            Dict[str, int]: dict with keys ['hits', 'misses', 'items', 'bytes']
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'items': len(self._value_dict),
+                'bytes': self.current_bytes,
+            }
+
+    """protected methods"""
+    def _store(
+            self,
+            key: Hashable,
+            value: Any,
+            size: int,
+    ) -> None:
+        """store a value and evict the least recently used values until we're back under budget"""
+        if self.max_bytes is not None and size > self.max_bytes:  # it would evict everything and still not fit
+            return
+        if self.max_items is not None and self.max_items <= 0:
+            return
+
+        with self._lock:
+            self._value_dict[key] = (value, size, time.monotonic() + self.ttl if self.ttl is not None else None)
+            self.current_bytes += size
+
+            while (self.max_bytes is not None and self.current_bytes > self.max_bytes) \
+                    or (self.max_items is not None and len(self._value_dict) > self.max_items):
+                evicted_size = self._value_dict.popitem(last=False)[1][1]
+                self.current_bytes -= evicted_size
+
+
+class _in_flight_value(object):
+    """a value that one thread is computing and other threads are waiting for"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
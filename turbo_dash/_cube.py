@@ -0,0 +1,116 @@
+from typing import List, Any, Tuple, Optional
+import pandas as pd
+
+from ._turbo_filter import turbo_filter
+from ._filter_engine import filter_engine
+
+
+class aggregate_cube(object):
+    """pre-aggregated group-by cube we can answer bar charts from instead of the raw rows
+
+    The cube sums y over every combination of x, color, and the menu filter columns. Since every menu filter
+    column is still in the cube, we can run the menu filters on it, then sum over whatever's left to get one
+    row per (x, color). That's usually orders of magnitude smaller than the table it came from.
+
+    Methods:
+        aggregate: filter the cube and sum it up to one row per (x, color)
+        append: grab the cube for the rows we aggregated plus some more
+    """
+
+    def __init__(
+            self,
+            df: pd.DataFrame,
+            x: str,
+            y: str,
+            color: str = None,
+            menu_filter_list: List[turbo_filter] = (),
+    ):
+        """create the cube
+
+        Args:
+            df (pandas.DataFrame): dataframe we want to aggregate
+            x (str): column for the x-axis
+            y (str): numeric column we sum
+            color (:obj: `str`, optional): default `None`, column for the color
+            menu_filter_list (:obj: `list`, optional): default `()`, list of turbo_filter objects we'll filter on
+        """
+        self.x = x
+        self.y = y
+        self.color = color
+        self.menu_filter_list = menu_filter_list
+
+        self.output_dimension_list = [column for column in (self.x, self.color) if column is not None]
+        self.dimension_list = list(dict.fromkeys(  # de-duplicate the columns, but keep them in order
+            self.output_dimension_list + [tf.column for tf in self.menu_filter_list]
+        ))
+        self.df = self._sum(df=df, dimension_list=self.dimension_list)
+        self._filter_engine = filter_engine(menu_filter_list=self.menu_filter_list)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def aggregate(
+            self,
+            filter_value_list: Tuple[Any, ...],
+    ) -> pd.DataFrame:
+        """filter the cube and sum it up to one row per (x, color)
+
+        Args:
+            filter_value_list (Tuple[Any, ...]): values of the menu filters' dash inputs
+
+        Returns:
+            pandas.DataFrame: with the x, color, and y columns
+        """
+        filtered_df = self._filter_engine.filter_dataframe(df=self.df, filter_value_list=filter_value_list)
+        return self._sum(df=filtered_df, dimension_list=self.output_dimension_list)
+
+    def append(
+            self,
+            df: pd.DataFrame,
+    ) -> 'aggregate_cube':
+        """grab the cube for the rows we aggregated plus the rows in df, leaving this cube alone
+
+        Sums add up, so we only sum the new rows together with the cube, instead of the whole table again.
+
+        Args:
+            df (pandas.DataFrame): the new rows
+
+        Returns:
+            aggregate_cube
+        """
+        return aggregate_cube(
+            df=pd.concat([self.df, df[self.dimension_list + [self.y]]], ignore_index=True),
+            x=self.x,
+            y=self.y,
+            color=self.color,
+            menu_filter_list=self.menu_filter_list,
+        )
+
+    """protected methods"""
+    def _sum(
+            self,
+            df: pd.DataFrame,
+            dimension_list: List[str],
+    ) -> pd.DataFrame:
+        """sum y by the dimensions, keeping missing values and the order the dimensions first show up in"""
+        return df.groupby(dimension_list, dropna=False, observed=True, sort=False)[self.y].sum().reset_index()
+
+
+def build_aggregate_cube(
+        df: pd.DataFrame,
+        x: str,
+        y: str,
+        color: str = None,
+        menu_filter_list: List[turbo_filter] = (),
+) -> Optional[aggregate_cube]:
+    """build an aggregate_cube if the columns allow it
+
+    Returns:
+        aggregate_cube, or None if x or y is missing or y isn't numeric. Those outputs use the raw rows.
+    """
+    if not isinstance(x, str) or not isinstance(y, str) or y not in df.columns:
+        return None
+    if not pd.api.types.is_numeric_dtype(df[y]):
+        return None
+
+    return aggregate_cube(df=df, x=x, y=y, color=color, menu_filter_list=menu_filter_list)
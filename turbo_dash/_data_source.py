@@ -0,0 +1,443 @@
+from typing import List, Any, Sequence
+import os
+import pathlib
+import sqlite3
+import tempfile
+import threading
+import pandas as pd
+
+from ._cache import lru_cache
+from ._helpers import quote_sql_identifier
+
+
+class data_source(object):
+    """data for a turbo_dashboard_page that's loaded the first time the page needs it, instead of at import time
+
+    Subclasses only need to know how to read their columns (_read) and list their columns (column_list). Loading
+    is thread-safe and memoized, so every callback that needs the data before it's loaded waits for one read.
+
+    Methods:
+        load: grab the data as a dataframe, reading it the first time we need it
+        column_list: grab the names of the columns, without reading the data if we can help it
+        clear: forget the data we've read, so the next load reads it again
+    """
+
+    supports_pushdown = False  # whether a page can send its filters to this source instead of loading everything
+
+    def __init__(self):
+        self._df_cache = lru_cache()  # column tuple (or None for every column) -> dataframe
+
+    def load(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        """grab the data as a dataframe, reading it the first time we need it
+
+        Args:
+            columns (:obj: `List[str]`, optional): default `None`, the columns we want, `None` reads every column.
+                Names that aren't columns of the data are ignored, and the columns keep the data's order.
+
+        Returns:
+            pandas.DataFrame
+        """
+        return self._df_cache.get_or_compute(
+            key=tuple(columns) if columns is not None else None,
+            compute_function=lambda: self._read(columns=columns),
+        )
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns, without reading the data if we can help it"""
+        raise NotImplementedError
+
+    def clear(self) -> bool:
+        """forget the data we've read, so the next load reads it again (e.g. after the file changed)
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+        """
+        self._df_cache.clear()
+        return True
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        """read the columns we want, see load"""
+        raise NotImplementedError
+
+
+class csv_data_source(data_source):
+    """data from a CSV file (compressed or not), read with pandas.read_csv"""
+
+    def __init__(
+            self,
+            path: str,
+            **read_csv_kwargs: Any
+    ):
+        """
+
+        Args:
+            path (str): path or url of the CSV file
+            **read_csv_kwargs: any other arguments for pandas.read_csv, like dtype or parse_dates
+        """
+        super().__init__()
+        self.path = path
+        self.read_csv_kwargs = read_csv_kwargs
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns from the header"""
+        return pd.read_csv(self.path, nrows=0, **self.read_csv_kwargs).columns.tolist()
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        column_set = set(columns) if columns is not None else None
+        return pd.read_csv(
+            self.path,
+            usecols=(lambda column: column in column_set) if column_set is not None else None,
+            **self.read_csv_kwargs
+        )
+
+
+class parquet_data_source(data_source):
+    """data from a Parquet file, read with pandas.read_parquet (requires pyarrow or fastparquet)
+
+    Parquet stores each column separately, so reading a subset of the columns only reads those columns.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            **read_parquet_kwargs: Any
+    ):
+        """
+
+        Args:
+            path (str): path of the Parquet file
+            **read_parquet_kwargs: any other arguments for pandas.read_parquet, like engine
+        """
+        super().__init__()
+        self.path = path
+        self.read_parquet_kwargs = read_parquet_kwargs
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns from the file's schema"""
+        import pyarrow.parquet
+
+        return [
+            column for column in pyarrow.parquet.read_schema(self.path).names
+            if not column.startswith('__index_level_')  # pandas stores unnamed indexes as columns
+        ]
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        if columns is not None:
+            column_set = set(columns)
+            columns = [column for column in self.column_list() if column in column_set]
+
+        return pd.read_parquet(self.path, columns=columns, **self.read_parquet_kwargs)
+
+
+class arrow_data_source(data_source):
+    """data from an uncompressed Arrow IPC (Feather v2) file, memory-mapped read-only
+
+    Numeric columns come back as zero-copy views of the mapped file, so every process serving the app (e.g.
+    each gunicorn worker) shares one copy of them in the OS page cache instead of holding its own. Text columns
+    are still converted to python objects in each process.
+
+    The views are read-only, anything that needs a modified copy of a column (like a page's cluster_column
+    sort) makes its own copy.
+
+    Methods:
+        from_dataframe: write a df to an Arrow file and grab a data source for it
+    """
+
+    def __init__(
+            self,
+            path: str,
+    ):
+        """
+
+        Args:
+            path (str): path of the Arrow IPC / Feather v2 file, it must be uncompressed to be memory-mapped
+        """
+        super().__init__()
+        self.path = path
+
+    @classmethod
+    def from_dataframe(
+            cls,
+            df: pd.DataFrame,
+            path: str,
+    ) -> 'arrow_data_source':
+        """write a df to an uncompressed Arrow file and grab a data source for it
+
+        The file is written next to its final path and then moved into place, so a process mapping the file
+        never sees it half written.
+
+        Args:
+            df (pandas.DataFrame): the data
+            path (str): where we write the file, it's replaced if it already exists
+
+        Returns:
+            arrow_data_source
+        """
+        import pyarrow.feather
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.arrow')
+        os.close(file_descriptor)
+        try:
+            pyarrow.feather.write_feather(df, temporary_path, compression='uncompressed')
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+        return cls(path=path)
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns from the file's schema"""
+        return [
+            column for column in self._read_table().schema.names
+            if not column.startswith('__index_level_')  # pandas stores unnamed indexes as columns
+        ]
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        table = self._read_table()
+        if columns is not None:
+            column_set = set(columns)
+            table = table.select([column for column in self.column_list() if column in column_set])
+
+        # split_blocks keeps every column in its own block, which lets pandas use the mapped buffers as they are
+        return table.to_pandas(split_blocks=True)
+
+    def _read_table(self) -> Any:
+        """map the file and grab it as a pyarrow.Table, this doesn't read any data"""
+        import pyarrow
+        import pyarrow.ipc
+
+        return pyarrow.ipc.open_file(pyarrow.memory_map(self.path, 'r')).read_all()
+
+
+class pickle_data_source(data_source):
+    """data from a pickled dataframe, read with pandas.read_pickle
+
+    A pickle can only be read all at once, so selecting columns only drops the other columns after reading.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            **read_pickle_kwargs: Any
+    ):
+        """
+
+        Args:
+            path (str): path of the pickle file
+            **read_pickle_kwargs: any other arguments for pandas.read_pickle, like compression
+        """
+        super().__init__()
+        self.path = path
+        self.read_pickle_kwargs = read_pickle_kwargs
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns, which means reading the whole pickle"""
+        return self.load().columns.tolist()
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        df = pd.read_pickle(self.path, **self.read_pickle_kwargs)
+        if columns is None:
+            return df
+
+        column_set = set(columns)
+        return df[[column for column in df.columns if column in column_set]]
+
+
+class sql_data_source(data_source):
+    """data in a table of an embedded database file (SQLite or DuckDB)
+
+    Pages using this source never load the whole table: their menu filters are compiled into a parameterized
+    WHERE clause (see sql_filter_engine) and only the filtered rows of the columns they use are read into pandas.
+    The filter options and slider bounds come from SELECT DISTINCT / MIN / MAX queries.
+
+    Each thread gets its own read-only connection, since connections can't be shared between threads.
+
+    Methods:
+        query: select some columns of the rows matching a WHERE clause
+        distinct: grab the distinct combinations of some columns
+        bounds: grab the min and max of a column
+    """
+
+    supports_pushdown = True
+    _engine_list = ['sqlite', 'duckdb']
+
+    def __init__(
+            self,
+            path: str,
+            table: str,
+            engine: str = 'sqlite',
+            order_by: str = None,
+    ):
+        """
+
+        Args:
+            path (str): path of the database file
+            table (str): name of the table (or view) with the data
+            engine (:obj: `str`, optional): default `'sqlite'`, the database engine. Options include:
+                ['sqlite', 'duckdb'], duckdb needs the duckdb package installed.
+            order_by (:obj: `str`, optional): default `None`, column we order the rows by. Without one, the
+                order of the rows is up to the database, which matters for outputs like line charts.
+        """
+        if engine not in self._engine_list:
+            raise ValueError(
+                '''engine ({}) must be one of {}'''.format(engine, self._engine_list)
+            )
+
+        super().__init__()
+        self.path = path
+        self.table = table
+        self.engine = engine
+        self.order_by = order_by
+
+        self._query_cache = lru_cache()  # ('distinct', columns) or ('bounds', column) -> dataframe
+        self._thread_local = threading.local()
+        self._duckdb_connection = None
+        self._duckdb_connection_lock = threading.Lock()
+
+    def column_list(self) -> List[str]:
+        """grab the names of the columns from an empty query"""
+        cursor = self._connection().execute('SELECT * FROM {} LIMIT 0'.format(quote_sql_identifier(self.table)))
+        return [description[0] for description in cursor.description]
+
+    def clear(self) -> bool:
+        """forget the data and query results we've read, so the next query reads the table again"""
+        self._query_cache.clear()
+        return super().clear()
+
+    def query(
+            self,
+            columns: List[str] = None,
+            where_clause: str = None,
+            parameters: Sequence[Any] = (),
+    ) -> pd.DataFrame:
+        """select some columns of the rows matching a WHERE clause
+
+        Args:
+            columns (:obj: `List[str]`, optional): default `None`, the columns we want, `None` selects every column.
+                Names that aren't columns of the table are ignored, and the columns keep the table's order.
+            where_clause (:obj: `str`, optional): default `None`, condition with ? placeholders, without the WHERE
+                keyword. `None` selects every row.
+            parameters (:obj: `Sequence[Any]`, optional): default `()`, values for the placeholders
+
+        Returns:
+            pandas.DataFrame
+        """
+        if columns is not None:
+            column_set = set(columns)
+            columns = [column for column in self.column_list() if column in column_set]
+
+        statement = 'SELECT {} FROM {}'.format(
+            ', '.join(quote_sql_identifier(column) for column in columns) if columns is not None else '*',
+            quote_sql_identifier(self.table),
+        )
+        if where_clause is not None:
+            statement += ' WHERE {}'.format(where_clause)
+        if self.order_by is not None:
+            statement += ' ORDER BY {}'.format(quote_sql_identifier(self.order_by))
+
+        return self._read_sql(statement=statement, parameters=parameters)
+
+    def distinct(
+            self,
+            columns: List[str],
+    ) -> pd.DataFrame:
+        """grab the distinct combinations of some columns, e.g. a filter's values and labels
+
+        Args:
+            columns (List[str]): the columns we want, duplicates are ignored
+
+        Returns:
+            pandas.DataFrame: one row per combination, computed once per set of columns
+        """
+        columns = list(dict.fromkeys(columns))
+        statement = 'SELECT DISTINCT {} FROM {}'.format(
+            ', '.join(quote_sql_identifier(column) for column in columns),
+            quote_sql_identifier(self.table),
+        )
+        return self._query_cache.get_or_compute(
+            key=('distinct', tuple(columns)),
+            compute_function=lambda: self._read_sql(statement=statement),
+        )
+
+    def bounds(
+            self,
+            column: str,
+    ) -> pd.DataFrame:
+        """grab the min and max of a column, e.g. for a date picker
+
+        Args:
+            column (str): the column we want
+
+        Returns:
+            pandas.DataFrame: two rows, the min and the max of the column, computed once per column
+        """
+        statement = 'SELECT MIN({0}) AS {0} FROM {1} UNION ALL SELECT MAX({0}) AS {0} FROM {1}'.format(
+            quote_sql_identifier(column),
+            quote_sql_identifier(self.table),
+        )
+        return self._query_cache.get_or_compute(
+            key=('bounds', column),
+            compute_function=lambda: self._read_sql(statement=statement),
+        )
+
+    """protected methods"""
+    def _read(
+            self,
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        return self.query(columns=columns)
+
+    def _read_sql(
+            self,
+            statement: str,
+            parameters: Sequence[Any] = (),
+    ) -> pd.DataFrame:
+        """run a statement and grab the result as a dataframe"""
+        if self.engine == 'duckdb':
+            return self._connection().execute(statement, list(parameters)).df()
+
+        return pd.read_sql_query(statement, self._connection(), params=list(parameters))
+
+    def _connection(self) -> Any:
+        """grab this thread's read-only connection, opening it the first time this thread needs it"""
+        connection = getattr(self._thread_local, 'connection', None)
+        if connection is not None:
+            return connection
+
+        if self.engine == 'duckdb':
+            import duckdb
+
+            # duckdb only lets a process open a file once, so every thread gets a cursor on a shared connection
+            with self._duckdb_connection_lock:
+                if self._duckdb_connection is None:
+                    self._duckdb_connection = duckdb.connect(self.path, read_only=True)
+                connection = self._duckdb_connection.cursor()
+        else:
+            connection = sqlite3.connect('{}?mode=ro'.format(pathlib.Path(self.path).absolute().as_uri()), uri=True)
+
+        self._thread_local.connection = connection
+        return connection
@@ -0,0 +1,114 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+def lttb_indices(
+        x: np.ndarray,
+        y: np.ndarray,
+        n_out: int,
+) -> np.ndarray:
+    """pick the points to keep with Largest-Triangle-Three-Buckets downsampling
+
+    1. always keep the first and last points
+    2. split the rest of the points into n_out - 2 buckets
+    3. from each bucket, keep the point that makes the largest triangle with the point we kept from the previous
+        bucket and the average point of the next bucket
+
+    The bucket averages and the triangle areas are computed with numpy, we only loop over the buckets since
+    each bucket depends on the point we picked from the one before it.
+
+    Args:
+        x (numpy.ndarray): x values as floats, sorted ascending
+        y (numpy.ndarray): y values as floats
+        n_out (int): how many points we want to keep
+
+    Returns:
+        numpy.ndarray: sorted positions of the points we keep
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # 1 and 2
+    bucket_edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.intp) + 1
+    bucket_edges[-1] = n - 1
+    bucket_starts = bucket_edges[:-1]
+    bucket_sizes = np.diff(bucket_edges)
+
+    # the average point of each bucket, plus the last point standing in for the bucket after the last one
+    average_x = np.append(np.add.reduceat(x[:-1], bucket_starts) / bucket_sizes, x[-1])
+    average_y = np.append(np.add.reduceat(y[:-1], bucket_starts) / bucket_sizes, y[-1])
+
+    # 3
+    ret = np.empty(n_out, dtype=np.intp)
+    ret[0] = 0
+    ret[-1] = n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = bucket_edges[bucket], bucket_edges[bucket + 1]
+        area = np.abs(
+            (x[previous] - average_x[bucket + 1]) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (average_y[bucket + 1] - y[previous])
+        )
+        previous = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        ret[bucket + 1] = previous
+
+    return ret
+
+
+def downsample_dataframe(
+        df: pd.DataFrame,
+        x: str,
+        y: str,
+        color: str = None,
+        max_points: int = None,
+) -> pd.DataFrame:
+    """downsample each color group of a dataframe to at most max_points rows with LTTB
+
+    Args:
+        df (pandas.DataFrame): dataframe we want to downsample
+        x (str): column for the x-axis, must be numeric or datetime
+        y (str): column for the y-axis, must be numeric
+        color (:obj: `str`, optional): default `None`, column we group by, each group is its own trace
+        max_points (:obj: `int`, optional): default `None`, the most points we'll keep per trace
+
+    Returns:
+        pandas.DataFrame: the downsampled rows in their original order, or the original df if we can't
+            (or don't need to) downsample it
+    """
+    if not max_points or not isinstance(x, str) or not isinstance(y, str) or len(df) <= max_points:
+        return df
+    if x not in df.columns or y not in df.columns or (color is not None and color not in df.columns):
+        return df
+
+    x_values = _as_float_array(df[x])
+    y_values = _as_float_array(df[y])
+    if x_values is None or y_values is None:
+        return df
+
+    # sort the rows by group and then by x so each group is one contiguous, sorted run
+    group_codes = pd.factorize(df[color])[0] if color is not None else np.zeros(len(df), dtype=np.intp)
+    order = np.lexsort((x_values, group_codes))
+    group_edges = np.flatnonzero(np.diff(group_codes[order])) + 1
+
+    keep_list = []
+    for group_order in np.split(order, group_edges):
+        group_keep = lttb_indices(x=x_values[group_order], y=y_values[group_order], n_out=max_points)
+        keep_list.append(group_order[group_keep])
+
+    keep = np.concatenate(keep_list)
+    if len(keep) == len(df):
+        return df
+
+    keep.sort()
+    return df.take(keep)
+
+
+def _as_float_array(series: pd.Series) -> Optional[np.ndarray]:
+    """grab a column as floats, or None if it's not numeric or datetime"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return None
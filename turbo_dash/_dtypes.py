@@ -0,0 +1,157 @@
+from typing import List, Any
+import numpy as np
+import pandas as pd
+
+# text columns with at most this fraction of distinct values become categoricals
+_category_max_unique_fraction = 0.5
+
+
+def compact_dataframe(
+        df: pd.DataFrame,
+        date_column_list: List[str] = (),
+        category_max_unique_fraction: float = _category_max_unique_fraction,
+) -> pd.DataFrame:
+    """store a dataframe in smaller dtypes, without changing any of its values
+
+    1. parse the date columns (e.g. the columns of DatePickerRange filters) to datetime64
+    2. turn low-cardinality text columns into categoricals, so each value is stored once with integer codes
+    3. downcast integer columns to the smallest integer dtype that holds them
+
+    Float columns keep their dtype, float32 would change the values we plot.
+
+    Args:
+        df (pandas.DataFrame): the dataframe we want to compact, we don't modify it
+        date_column_list (:obj: `List[str]`, optional): default `()`, text columns we parse to datetime64. If a
+            column doesn't parse, we leave it alone.
+        category_max_unique_fraction (:obj: `float`, optional): default `0.5`, text columns with at most this
+            fraction of distinct values become categoricals
+
+    Returns:
+        pandas.DataFrame: a new dataframe, sharing the columns we didn't change with df
+    """
+    column_dict = {}
+    for column in df.columns:
+        values = df[column]
+
+        # 1
+        if column in date_column_list and values.dtype == object:
+            try:
+                column_dict[column] = pd.to_datetime(values)
+            except (ValueError, TypeError):  # not a date column after all
+                column_dict[column] = values
+            continue
+
+        # 2
+        if values.dtype == object and _is_text(values):
+            is_low_cardinality = values.nunique(dropna=True) <= category_max_unique_fraction * len(values)
+            column_dict[column] = values.astype('category') if is_low_cardinality else values
+            continue
+
+        # 3
+        if pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_extension_array_dtype(values.dtype):
+            column_dict[column] = pd.to_numeric(values, downcast='integer') if len(values) else values
+            continue
+
+        column_dict[column] = values
+
+    return pd.DataFrame(column_dict, index=df.index, copy=False)
+
+
+def memory_report(
+        before_df: pd.DataFrame,
+        after_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """compare the memory used by each column of a dataframe before and after compact_dataframe
+
+    Returns:
+        pandas.DataFrame: indexed by column (plus a 'total' row), with columns
+            ['before_dtype', 'after_dtype', 'before_bytes', 'after_bytes']
+    """
+    before_bytes = before_df.memory_usage(index=False, deep=True)
+    after_bytes = after_df.memory_usage(index=False, deep=True)
+
+    report = pd.DataFrame({
+        'before_dtype': before_df.dtypes.astype(str),
+        'after_dtype': after_df.dtypes.astype(str),
+        'before_bytes': before_bytes,
+        'after_bytes': after_bytes,
+    })
+    report.loc['total'] = ['', '', int(before_bytes.sum()), int(after_bytes.sum())]
+
+    return report
+
+
+def convert_filter_value(
+        value: Any,
+        dtype: Any,
+) -> Any:
+    """convert a value coming from a dash input to a numpy scalar matching the column we compare it to
+
+    Dash sends dates as strings and numbers as python ints or floats. Date strings can't be compared to a
+    datetime64 column at all, and matching scalars let numpy compare without casting the whole column.
+
+    Args:
+        value (Any): the value from the dash input, or a list of them
+        dtype (Any): dtype of the column we'll compare the value to
+
+    Returns:
+        the converted value, or the value as it was if we don't know how to convert it. Empty values
+        (e.g. None, '' or []) come back as None, since none of them filter anything.
+    """
+    if value is None or (isinstance(value, (str, list, tuple)) and not value):
+        return None
+
+    if isinstance(value, (list, tuple)):
+        return [convert_filter_value(value=item, dtype=dtype) for item in value]
+
+    if not isinstance(dtype, np.dtype):  # extension dtypes, like categoricals, compare to python values just fine
+        return value
+
+    if dtype.kind == 'M' and isinstance(value, str):
+        try:
+            return pd.Timestamp(value).to_datetime64().astype(dtype)
+        except ValueError:  # not a date, let the comparison decide what to do
+            return value
+
+    is_int = isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+    if dtype.kind in 'iu' and is_int and np.iinfo(dtype).min <= value <= np.iinfo(dtype).max:
+        return dtype.type(value)
+
+    return value
+
+
+def append_rows(
+        df: pd.DataFrame,
+        appended_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """append rows to a dataframe without losing the dtypes compact_dataframe gave it
+
+    pandas.concat turns categoricals with different categories into object columns, so we merge their categories
+    instead, in sorted order like astype('category'). Every other column gets a dtype that fits both sides.
+
+    Args:
+        df (pandas.DataFrame): the dataframe we're appending to, we don't modify it
+        appended_df (pandas.DataFrame): the new rows, with (at least) the columns of df
+
+    Returns:
+        pandas.DataFrame: a new dataframe with df's columns, df's rows, then appended_df's rows
+    """
+    column_dict = {}
+    for column in df.columns:
+        values, appended_values = df[column], appended_df[column]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            column_dict[column] = pd.api.types.union_categoricals(
+                [values.array, appended_values.astype('category').array],
+                sort_categories=True,
+            )
+            continue
+
+        column_dict[column] = pd.concat([values, appended_values], ignore_index=True).array
+
+    return pd.DataFrame(column_dict, index=df.index.append(appended_df.index), copy=False)
+
+
+def _is_text(values: pd.Series) -> bool:
+    """check whether an object column only holds strings (and missing values)"""
+    return pd.api.types.infer_dtype(values, skipna=True) == 'string'
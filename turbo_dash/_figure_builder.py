@@ -0,0 +1,192 @@
+from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
+import pandas as pd
+import plotly.io
+import plotly.express as px
+
+from ._lookups import get_fast_trace
+
+# the serialized template and colorway for each chart template, we only build these once
+_template_layout_dict = {}
+
+# plotly express defaults we mimic
+_max_marker_size = 20
+_default_colorway = px.colors.qualitative.D3
+
+
+def build_fast_figure(
+        df: pd.DataFrame,
+        output_type: str,
+        x: str,
+        y: str,
+        color: str = None,
+        size: str = None,
+        hover_name: str = None,
+        hover_data: List[str] = (),
+        chart_template: str = None,
+        render_mode: str = 'svg',
+) -> Optional[Dict[str, Any]]:
+    """build a figure dict straight from the dataframe, without plotly express
+
+    plotly express spends most of its time processing and validating arguments. For the simple cases, we can
+    build the traces ourselves from a vectorized group-by on the color column and reuse a pre-built template.
+
+    1. make sure this is a case we can handle, otherwise return None so the caller can use plotly express
+    2. group the rows by color
+    3. create a trace for each group and wrap them with the layout
+
+    Args:
+        df (pandas.DataFrame): the (filtered) dataframe we're plotting
+        output_type (str): one of the output types with a 'fast_trace' in _lookups._chart_lookup_dict
+        x (str): column for the x-axis
+        y (str): column for the y-axis
+        color (:obj: `str`, optional): default `None`, column with discrete values we split the traces by
+        size (:obj: `str`, optional): default `None`, numeric column for the marker size of scatter outputs
+        hover_name (:obj: `str`, optional): default `None`, column we show in bold at the top of the hover label
+        hover_data (:obj: `List[str]`, optional): default `()`, extra columns we show in the hover label
+        chart_template (:obj: `str`, optional): default `None`, plotly template name, `None` uses plotly's default
+        render_mode (:obj: `str`, optional): default `'svg'`, 'svg' or 'webgl'
+
+    Returns:
+        dict with 'data' and 'layout' keys, or None if we can't build this figure without plotly express
+    """
+    # 1
+    trace_spec = get_fast_trace(output_type)
+    hover_data = list(hover_data) if hover_data else []
+    if trace_spec is None or not _is_supported(df=df, x=x, y=y, color=color, size=size,
+                                               hover_name=hover_name, hover_data=hover_data):
+        return None
+    if size is not None and output_type != 'scatter':
+        return None
+
+    template_json, colorway = _template_layout(chart_template=chart_template)
+
+    # 2
+    x_values = df[x].to_numpy()
+    y_values = df[y].to_numpy()
+    size_values = df[size].to_numpy() if size is not None else None
+    hover_name_values = df[hover_name].to_numpy() if hover_name is not None else None
+    customdata = np.column_stack([df[column].to_numpy(dtype=object) for column in hover_data]) \
+        if hover_data else None
+
+    group_list = _group_positions(df=df, color=color)
+    if group_list is None:
+        return None
+
+    # 3
+    trace_type = trace_spec['type']
+    if trace_type == 'scatter' and render_mode == 'webgl' and 'stackgroup' not in trace_spec:
+        trace_type = 'scattergl'
+
+    hovertemplate_prefix = '<b>%{hovertext}</b><br><br>' if hover_name is not None else ''
+    hovertemplate_suffix = ''.join([
+        '{}=%{{x}}<br>{}=%{{y}}'.format(x, y),
+        '<br>{}=%{{marker.size}}'.format(size) if size is not None else '',
+        ''.join('<br>{}=%{{customdata[{}]}}'.format(column, index) for index, column in enumerate(hover_data)),
+        '<extra></extra>',
+    ])
+    sizeref = np.nanmax(size_values) / (_max_marker_size ** 2) if size is not None and len(df) else None
+
+    data = []
+    for group_index, (group_name, positions) in enumerate(group_list):
+        trace_color = colorway[group_index % len(colorway)]
+        trace = {key: dict(value) if isinstance(value, dict) else value for key, value in trace_spec.items()}
+        trace.update({
+            'type': trace_type,
+            'x': x_values[positions],
+            'y': y_values[positions],
+            'hovertemplate': hovertemplate_prefix + (
+                '{}={}<br>'.format(color, group_name) if color is not None else ''
+            ) + hovertemplate_suffix,
+            'legendgroup': '' if group_name is None else str(group_name),
+            'name': '' if group_name is None else str(group_name),
+            'showlegend': color is not None,
+        })
+
+        if trace_type == 'scattergl':  # WebGL traces don't have an orientation
+            del trace['orientation']
+        if trace_spec.get('mode') == 'lines':
+            trace.setdefault('line', {})['color'] = trace_color
+        else:
+            trace.setdefault('marker', {})['color'] = trace_color
+        if trace_spec['type'] == 'bar':
+            trace['offsetgroup'] = trace['legendgroup']
+        if size is not None:
+            trace['marker'].update({'size': size_values[positions], 'sizemode': 'area', 'sizeref': sizeref})
+        if hover_name_values is not None:
+            trace['hovertext'] = hover_name_values[positions]
+        if customdata is not None:
+            trace['customdata'] = customdata[positions]
+
+        data.append(trace)
+
+    layout = {
+        'template': template_json,  # shared by every figure with this template, so we never modify it
+        'xaxis': {'anchor': 'y', 'domain': [0.0, 1.0], 'title': {'text': x}},
+        'yaxis': {'anchor': 'x', 'domain': [0.0, 1.0], 'title': {'text': y}},
+        'legend': {'title': {'text': color}, 'tracegroupgap': 0} if color is not None else {'tracegroupgap': 0},
+        'margin': {'t': 60},
+    }
+    if size is not None:
+        layout['legend']['itemsizing'] = 'constant'
+    if trace_spec['type'] == 'bar':
+        layout['barmode'] = 'relative'
+
+    return {'data': data, 'layout': layout}
+
+
+def _is_supported(
+        df: pd.DataFrame,
+        x: Any,
+        y: Any,
+        color: Any,
+        size: Any,
+        hover_name: Any,
+        hover_data: List[Any],
+) -> bool:
+    """check that every argument is a single column in the df, and that color is discrete"""
+    column_list = [x, y] + [column for column in (color, size, hover_name) if column is not None] + hover_data
+    if not all(isinstance(column, str) and column in df.columns for column in column_list):
+        return False
+
+    # plotly express uses a continuous color scale for numeric colors, we leave those to plotly express
+    if color is not None and pd.api.types.is_numeric_dtype(df[color]):
+        return False
+    if size is not None and not pd.api.types.is_numeric_dtype(df[size]):
+        return False
+
+    return True
+
+
+def _group_positions(
+        df: pd.DataFrame,
+        color: str = None,
+) -> Optional[List[Tuple[Any, np.ndarray]]]:
+    """split the row positions by color, in the order each color first shows up, like plotly express does
+
+    Returns:
+        List[Tuple[Any, numpy.ndarray]]: (color value, row positions) for each color, or None if the color
+            column has missing values
+    """
+    if color is None:
+        return [(None, np.arange(len(df)))]
+
+    codes, uniques = pd.factorize(df[color])
+    if len(codes) and codes.min() < 0:  # missing colors, let plotly express decide what to do with them
+        return None
+
+    order = np.argsort(codes, kind='stable')
+    edges = np.searchsorted(codes[order], np.arange(len(uniques) + 1), side='left')
+    return [(uniques[index], order[edges[index]:edges[index + 1]]) for index in range(len(uniques))]
+
+
+def _template_layout(chart_template: str = None) -> Tuple[Dict[str, Any], List[str]]:
+    """grab the serialized template and its colorway, building them the first time we see the template"""
+    template_name = chart_template if chart_template is not None else plotly.io.templates.default
+
+    if template_name not in _template_layout_dict:
+        template_json = plotly.io.templates[template_name].to_plotly_json()
+        colorway = template_json.get('layout', {}).get('colorway') or _default_colorway
+        _template_layout_dict[template_name] = (template_json, list(colorway))
+
+    return _template_layout_dict[template_name]
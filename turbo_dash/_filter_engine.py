@@ -0,0 +1,345 @@
+from typing import List, Dict, Any, Callable, Tuple, Optional, Union
+import numpy as np
+import pandas as pd
+
+from ._helpers import quote_sql_identifier
+from ._dtypes import convert_filter_value
+from ._turbo_filter import turbo_filter
+from ._filter_index import range_index, category_index
+
+
+class filter_engine(object):
+    """compiles a list of turbo_filter objects into a single filter we can apply to a dataframe
+
+    Instead of applying each filter to the dataframe one after another (which creates a new, filtered copy of
+    the dataframe for every filter), we evaluate each filter on the numpy array of its column, combine the
+    results into one set of row positions, and only materialize the filtered dataframe once at the end.
+
+    Filters on indexed columns are answered from the index first. The remaining filters are then only evaluated
+    on the rows the indexes kept, so the cost of a selective filter depends on the size of the result.
+
+    Methods:
+        positions: grab the row positions that pass every filter
+        filter_dataframe: filter a dataframe based on a list of filter values
+    """
+
+    def __init__(
+            self,
+            menu_filter_list: List[turbo_filter] = (),
+            range_index_dict: Dict[str, range_index] = None,
+            category_index_dict: Dict[str, category_index] = None,
+    ):
+        """compile the menu filters for a page
+
+        Args:
+            menu_filter_list (:obj: `list`, optional): default `()`, list of turbo_filter objects
+            range_index_dict (:obj: `Dict[str, range_index]`, optional): default `None`, sorted indexes by column
+                name for the dataframe we'll filter, used to answer RangeSlider and DatePickerRange filters
+            category_index_dict (:obj: `Dict[str, category_index]`, optional): default `None`, categorical code
+                indexes by column name for the dataframe we'll filter, used to answer Checklist, Dropdown,
+                Dropdown-multi, Dropdown-search, and RadioItems filters
+        """
+        self.menu_filter_list = menu_filter_list
+        self.range_index_dict = range_index_dict if range_index_dict is not None else {}
+        self.category_index_dict = category_index_dict if category_index_dict is not None else {}
+
+        self._filter_value_slice_list, self._filter_value_count = _filter_value_slices(self.menu_filter_list)
+
+    def __len__(self) -> int:
+        """the number of filter values this engine expects"""
+        return self._filter_value_count
+
+    def positions(
+            self,
+            df: pd.DataFrame,
+            filter_value_list: Tuple[Any, ...],
+    ) -> Optional[Union[slice, np.ndarray]]:
+        """grab the row positions that pass every filter
+
+        1. answer whatever filters we can from the indexes and intersect the results
+        2. evaluate the rest of the filters with masks, only on the rows the indexes kept
+        3. combine the two
+
+        Args:
+            df (pandas.DataFrame): dataframe we want to filter
+            filter_value_list (Tuple[Any, ...]): list of values we'll filter the df on, in the same order
+                as the dash inputs of the menu filters
+
+        Returns:
+            slice or sorted numpy.ndarray of row positions, or None if none of the values filter anything
+
+        Raises:
+            ValueError if filter_value_list doesn't have one value per filter input property
+        """
+        if len(filter_value_list) != len(self):
+            raise ValueError(
+                '''filter_value_list ({}) and the inputs of menu_filter_list ({}) must be the same size'''
+                .format(filter_value_list, [tf.component_id for tf in self.menu_filter_list])
+            )
+
+        # 1
+        candidates = None
+        mask_filter_list = []  # (column, mask function, value) for everything we couldn't answer with an index
+        for tf, value_slice in zip(self.menu_filter_list, self._filter_value_slice_list):
+            value_list = self._convert_values(df=df, column=tf.column, value_list=filter_value_list[value_slice])
+            is_indexed, index_positions = self._index_positions(tf=tf, value_list=value_list)
+
+            if not is_indexed:
+                mask_filter_list.extend(
+                    (tf.column, mask_function, value)
+                    for mask_function, value in zip(tf.filter_input_mask_function_list, value_list)
+                )
+            elif index_positions is not None:
+                candidates = index_positions if candidates is None else _intersect(candidates, index_positions)
+
+        # 2
+        combined_mask = None
+        column_values_dict = {}  # grab each column's numpy array once, even if multiple filters use it
+        for column, mask_function, filter_value in mask_filter_list:
+            if column not in column_values_dict:
+                values = _column_values(df[column])
+                column_values_dict[column] = values if candidates is None else values[candidates]
+
+            filter_mask = self._apply_mask_function(
+                mask_function=mask_function,
+                values=column_values_dict[column],
+                value=filter_value,
+            )
+            if filter_mask is None:  # this value doesn't filter anything
+                continue
+
+            combined_mask = filter_mask if combined_mask is None \
+                else np.logical_and(combined_mask, filter_mask, out=combined_mask)
+
+        # 3
+        if combined_mask is None:
+            return candidates
+        if candidates is None:
+            return np.flatnonzero(combined_mask)
+        return _as_position_array(candidates)[combined_mask]
+
+    def filter_dataframe(
+            self,
+            df: pd.DataFrame,
+            filter_value_list: Tuple[Any, ...],
+    ) -> pd.DataFrame:
+        """filter a dataframe based on a list of filter values
+
+        Args:
+            df (pandas.DataFrame): dataframe we want to filter
+            filter_value_list (Tuple[Any, ...]): list of values we'll filter the df on
+
+        Returns:
+            pandas.DataFrame: the original df if nothing was filtered, otherwise a single filtered copy
+        """
+        row_positions = self.positions(df=df, filter_value_list=filter_value_list)
+
+        if row_positions is None:
+            return df
+
+        if isinstance(row_positions, slice):
+            if row_positions.start == 0 and row_positions.stop >= len(df):
+                return df
+            return df.iloc[row_positions]
+
+        return df.take(row_positions)
+
+    """protected methods"""
+    def _index_positions(
+            self,
+            tf: turbo_filter,
+            value_list: Tuple[Any, ...],
+    ) -> Tuple[bool, Optional[Union[slice, np.ndarray]]]:
+        """try to answer a filter from an index
+
+        Returns:
+            Tuple[bool, positions]: whether the filter was answered by an index, and the row positions it kept
+                (None if the values don't filter anything)
+        """
+        if tf.filter_range_bounds_function is not None and tf.column in self.range_index_dict:
+            bounds = tf.filter_range_bounds_function(value_list)
+            if bounds is None:
+                return True, None
+
+            try:
+                return True, self.range_index_dict[tf.column].positions(low=bounds[0], high=bounds[1])
+            except (TypeError, ValueError):  # the value can't be compared to the index, let the mask deal with it
+                return False, None
+
+        if tf.filter_category_values_function is not None and tf.column in self.category_index_dict:
+            category_values = tf.filter_category_values_function(value_list)
+            if category_values is None:
+                return True, None
+
+            try:
+                return True, self.category_index_dict[tf.column].positions(value_list=category_values)
+            except (TypeError, ValueError):  # the value can't be looked up in the index, let the mask deal with it
+                return False, None
+
+        return False, None
+
+    @staticmethod
+    def _convert_values(
+            df: pd.DataFrame,
+            column: str,
+            value_list: Tuple[Any, ...],
+    ) -> List[Any]:
+        """convert a filter's values from the dash inputs to match the dtype of its column"""
+        dtype = df[column].dtype if column in df.columns else None
+        return [convert_filter_value(value=value, dtype=dtype) for value in value_list]
+
+    @staticmethod
+    def _apply_mask_function(
+            mask_function: Callable[[np.ndarray, Any], Optional[np.ndarray]],
+            values: np.ndarray,
+            value: Any,
+    ) -> Optional[np.ndarray]:
+        """run a mask function and make sure we get back a writable boolean array with one element per row"""
+        filter_mask = mask_function(values, value)
+        if filter_mask is None:
+            return None
+
+        filter_mask = np.asarray(filter_mask, dtype=bool)
+        if filter_mask.ndim == 0:  # comparing against a value of a different type can give us a single bool
+            return np.full(len(values), bool(filter_mask))
+
+        return filter_mask.copy() if not filter_mask.flags.writeable else filter_mask
+
+
+class sql_filter_engine(object):
+    """compiles a list of turbo_filter objects into a parameterized WHERE clause for a sql_data_source
+
+    This is the filter_engine for data that lives in a database: instead of evaluating masks on numpy arrays,
+    every filter value becomes a clause with ? placeholders, so the database does the filtering and we only
+    load the rows (and columns) we need into pandas.
+
+    Methods:
+        where_clause: compile the filter values into a WHERE clause and its parameters
+        filter_dataframe: query the filtered rows from a sql_data_source
+    """
+
+    def __init__(
+            self,
+            menu_filter_list: List[turbo_filter] = (),
+    ):
+        """compile the menu filters for a page
+
+        Args:
+            menu_filter_list (:obj: `list`, optional): default `()`, list of turbo_filter objects
+        """
+        self.menu_filter_list = menu_filter_list
+        self._filter_value_slice_list, self._filter_value_count = _filter_value_slices(self.menu_filter_list)
+
+    def __len__(self) -> int:
+        """the number of filter values this engine expects"""
+        return self._filter_value_count
+
+    def where_clause(
+            self,
+            filter_value_list: Tuple[Any, ...],
+    ) -> Tuple[Optional[str], List[Any]]:
+        """compile the filter values into a WHERE clause and its parameters
+
+        Args:
+            filter_value_list (Tuple[Any, ...]): list of values we'll filter on, in the same order
+                as the dash inputs of the menu filters
+
+        Returns:
+            Tuple[str, List[Any]]: the clauses joined with AND (without the WHERE keyword) and the parameters for
+                its placeholders, or (None, []) if none of the values filter anything
+
+        Raises:
+            ValueError if filter_value_list doesn't have one value per filter input property
+        """
+        if len(filter_value_list) != len(self):
+            raise ValueError(
+                '''filter_value_list ({}) and the inputs of menu_filter_list ({}) must be the same size'''
+                .format(filter_value_list, [tf.component_id for tf in self.menu_filter_list])
+            )
+
+        clause_list = []
+        parameter_list = []
+        for tf, value_slice in zip(self.menu_filter_list, self._filter_value_slice_list):
+            for clause_function, value in zip(tf.filter_sql_clause_function_list, filter_value_list[value_slice]):
+                clause_and_parameters = clause_function(quote_sql_identifier(tf.column), value)
+                if clause_and_parameters is None:  # this value doesn't filter anything
+                    continue
+
+                clause_list.append('({})'.format(clause_and_parameters[0]))
+                parameter_list.extend(clause_and_parameters[1])
+
+        if not clause_list:
+            return None, []
+        return ' AND '.join(clause_list), parameter_list
+
+    def filter_dataframe(
+            self,
+            data_source: Any,
+            filter_value_list: Tuple[Any, ...],
+            columns: List[str] = None,
+    ) -> pd.DataFrame:
+        """query the filtered rows from a sql_data_source
+
+        Args:
+            data_source (turbo_dash.sql_data_source): where the data lives
+            filter_value_list (Tuple[Any, ...]): list of values we'll filter on
+            columns (:obj: `List[str]`, optional): default `None`, the columns we want, `None` selects every column
+
+        Returns:
+            pandas.DataFrame
+        """
+        where_clause, parameter_list = self.where_clause(filter_value_list=filter_value_list)
+        return data_source.query(columns=columns, where_clause=where_clause, parameters=parameter_list)
+
+
+def _filter_value_slices(menu_filter_list: List[turbo_filter]) -> Tuple[List[slice], int]:
+    """find where each filter's values start and stop in the list of dash input values
+
+    Each menu filter can have 1 or more input properties associated with it
+    (e.g. DatePickerRange has [start_date, end_date]).
+
+    Returns:
+        Tuple[List[slice], int]: a slice for each filter and the total number of values
+    """
+    filter_value_slice_list = []
+    start = 0
+    for tf in menu_filter_list:
+        stop = start + len(tf.filter_input_mask_function_list)
+        filter_value_slice_list.append(slice(start, stop))
+        start = stop
+
+    return filter_value_slice_list, start
+
+
+def _column_values(values: pd.Series) -> Union[np.ndarray, pd.Categorical]:
+    """grab a column's values for the mask functions
+
+    Categoricals stay categoricals, they compare their codes instead of creating an array of python objects.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.array
+    return values.to_numpy()
+
+
+def _as_position_array(positions: Union[slice, np.ndarray]) -> np.ndarray:
+    """turn a slice of row positions into an array of row positions"""
+    if isinstance(positions, slice):
+        return np.arange(positions.start, positions.stop)
+    return positions
+
+
+def _intersect(
+        left: Union[slice, np.ndarray],
+        right: Union[slice, np.ndarray],
+) -> Union[slice, np.ndarray]:
+    """intersect two sets of sorted row positions, each either a slice or a sorted array"""
+    if isinstance(left, slice) and isinstance(right, slice):
+        start = max(left.start, right.start)
+        return slice(start, max(start, min(left.stop, right.stop)))
+
+    if isinstance(left, slice) or isinstance(right, slice):
+        positions, bounds = (right, left) if isinstance(left, slice) else (left, right)
+        start, stop = np.searchsorted(positions, [bounds.start, bounds.stop], side='left')
+        return positions[start:stop]
+
+    return np.intersect1d(left, right, assume_unique=True)
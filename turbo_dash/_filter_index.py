@@ -0,0 +1,351 @@
+from typing import List, Dict, Any, Optional, Union
+import numpy as np
+import pandas as pd
+
+
+class range_index(object):
+    """sorted index on a single column so we can answer range filters with a binary search
+
+    If the dataframe is physically sorted (clustered) by the column, a range filter is just a contiguous slice
+    of rows. Otherwise we keep the row positions in sorted order of the column and return the (sorted) row
+    positions inside the range. Either way, the cost depends on the size of the result, not the size of the table.
+
+    Methods:
+        positions: grab the row positions with values between low and high (inclusive)
+        append: grab the index for the values with more rows appended to the end
+    """
+
+    def __init__(
+            self,
+            values: np.ndarray,
+            is_clustered: bool = False,
+    ):
+        """create the index
+
+        Args:
+            values (numpy.ndarray): the values of the column we're indexing
+            is_clustered (:obj: `bool`, optional): default `False`, set to `True` if the values are already sorted
+                so we don't need to keep track of the sort order
+
+        Raises:
+            TypeError if the values can't be sorted (e.g. strings mixed with missing values)
+        """
+        self.is_clustered = is_clustered
+
+        if self.is_clustered:
+            self._order = None
+            self._sorted_values = values
+        else:
+            self._order = np.argsort(values, kind='stable')
+            self._sorted_values = values[self._order]
+
+    def __len__(self) -> int:
+        return len(self._sorted_values)
+
+    def positions(
+            self,
+            low: Any = None,
+            high: Any = None,
+    ) -> Union[slice, np.ndarray]:
+        """grab the row positions with values between low and high (inclusive)
+
+        Args:
+            low (:obj: `Any`, optional): default `None`, lower bound, `None` means there's no lower bound
+            high (:obj: `Any`, optional): default `None`, upper bound, `None` means there's no upper bound
+
+        Returns:
+            slice if the index is clustered, otherwise a sorted numpy.ndarray of row positions
+        """
+        start = 0 if low is None else int(np.searchsorted(self._sorted_values, low, side='left'))
+        stop = len(self) if high is None else int(np.searchsorted(self._sorted_values, high, side='right'))
+        stop = max(start, stop)
+
+        if self.is_clustered:
+            return slice(start, stop)
+
+        return np.sort(self._order[start:stop])
+
+    def append(
+            self,
+            values: np.ndarray,
+    ) -> Optional['range_index']:
+        """grab the index for the values with more rows appended to the end, leaving this index alone
+
+        Instead of sorting every value again, we only sort the new values and merge them into the sorted values
+        we already have, which is a single pass over the index.
+
+        Args:
+            values (numpy.ndarray): the values of the appended rows
+
+        Returns:
+            range_index, or None if this index is clustered and the new values don't come after the old ones in
+                order. The rows aren't sorted by the column anymore, so the index has to be built from scratch.
+
+        Raises:
+            TypeError if the values can't be sorted with the values we have
+        """
+        if self.is_clustered:
+            if len(values) and len(self) and not (np.all(values[:-1] <= values[1:]) and self._sorted_values[-1] <= values[0]):
+                return None
+            return _new_range_index(sorted_values=np.concatenate([self._sorted_values, values]), order=None)
+
+        order = np.argsort(values, kind='stable')
+        sorted_values = values[order]
+        # new values go after the old values they're equal to, just like a stable sort of all of them would
+        insert_at = np.searchsorted(self._sorted_values, sorted_values, side='right')
+        # np.insert casts the new values to our dtype, so widen it first if they don't fit (e.g. compacted ints)
+        old_sorted_values = self._sorted_values.astype(np.result_type(self._sorted_values, sorted_values), copy=False)
+
+        return _new_range_index(
+            sorted_values=np.insert(old_sorted_values, insert_at, sorted_values),
+            order=np.insert(self._order, insert_at, order + len(self)),
+        )
+
+
+def _new_range_index(
+        sorted_values: np.ndarray,
+        order: Optional[np.ndarray],
+) -> range_index:
+    """create a range_index from values we already sorted, `None` for the order if they're clustered"""
+    index = range_index.__new__(range_index)
+    index.is_clustered = order is None
+    index._order = order
+    index._sorted_values = sorted_values
+    return index
+
+
+def build_range_index(
+        df: pd.DataFrame,
+        column: str,
+        is_clustered: bool = False,
+) -> Optional[range_index]:
+    """build a range_index for a column in a dataframe
+
+    Args:
+        df (pandas.DataFrame): dataframe with the column we want to index
+        column (str): the column we want to index
+        is_clustered (:obj: `bool`, optional): default `False`, whether the df is already sorted by this column
+
+    Returns:
+        range_index, or None if the column can't be sorted. Filters on that column will use a mask instead.
+    """
+    try:
+        return range_index(values=df[column].to_numpy(), is_clustered=is_clustered)
+    except TypeError:
+        return None
+
+
+class category_index(object):
+    """categorical code index on a single column so we can answer equality and isin filters without hashing strings
+
+    The column is factorized into integer codes once, and we keep the (sorted) row positions for each code.
+    Selecting a value is then a lookup of its code and its list of row positions, and selecting multiple values
+    is a union of those position lists.
+
+    Methods:
+        positions: grab the row positions with a value in value_list
+        append: grab the index for the values with more rows appended to the end
+    """
+
+    # if the union of position lists is more than this fraction of the table, we build a bitmap instead of sorting
+    _bitmap_fraction = 1 / 16
+
+    def __init__(
+            self,
+            values: np.ndarray,
+    ):
+        """create the index
+
+        Args:
+            values (numpy.ndarray): the values of the column we're indexing
+        """
+        codes, uniques = pd.factorize(values)  # missing values get a code of -1
+        self._length = len(codes)
+        self._code_lookup = pd.Index(uniques)
+
+        # sorting the row positions by code gives us each code's row positions in one contiguous, sorted block
+        self._order = np.argsort(codes, kind='stable')
+        self._offsets = np.searchsorted(codes[self._order], np.arange(len(uniques) + 1), side='left')
+
+    def __len__(self) -> int:
+        return self._length
+
+    def positions(
+            self,
+            value_list: List[Any],
+    ) -> np.ndarray:
+        """grab the row positions with a value in value_list
+
+        Args:
+            value_list (List[Any]): the values we want to keep
+
+        Returns:
+            numpy.ndarray: sorted row positions
+        """
+        codes = self._code_lookup.get_indexer(pd.unique(np.asarray(value_list, dtype=object)))
+        codes = codes[codes >= 0]  # values that aren't in the column don't match anything
+
+        position_list = [self._order[self._offsets[code]:self._offsets[code + 1]] for code in codes]
+        if not position_list:
+            return np.array([], dtype=np.intp)
+        if len(position_list) == 1:
+            return position_list[0]
+
+        # each position list is disjoint, so the union is just all of them back in row order
+        positions = np.concatenate(position_list)
+        if len(positions) > self._length * self._bitmap_fraction:
+            bitmap = np.zeros(self._length, dtype=bool)
+            bitmap[positions] = True
+            return np.flatnonzero(bitmap)
+
+        positions.sort()
+        return positions
+
+    def append(
+            self,
+            values: np.ndarray,
+    ) -> 'category_index':
+        """grab the index for the values with more rows appended to the end, leaving this index alone
+
+        1. find the codes of the new values, giving values we haven't seen yet the next codes
+        2. sort the new rows by code and insert each one at the end of its code's block of row positions
+
+        Args:
+            values (numpy.ndarray): the values of the appended rows
+
+        Returns:
+            category_index
+        """
+        # 1
+        codes = self._code_lookup.get_indexer(values)
+        is_new = (codes < 0) & ~pd.isna(values)
+        new_codes, new_uniques = pd.factorize(values[is_new])
+        codes[is_new] = new_codes + len(self._code_lookup)
+        code_count = len(self._code_lookup) + len(new_uniques)
+
+        # 2
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        # each code's block now ends where the next one starts, the blocks of the new codes start out empty
+        offsets = np.concatenate([
+            self._offsets,
+            np.full(code_count - len(self._code_lookup), self._length, dtype=self._offsets.dtype),
+        ])
+
+        index = category_index.__new__(category_index)
+        index._length = self._length + len(values)
+        index._code_lookup = self._code_lookup.append(pd.Index(new_uniques)) if len(new_uniques) else self._code_lookup
+        index._order = np.insert(self._order, offsets[sorted_codes + 1], order + self._length)
+        index._offsets = offsets + np.searchsorted(sorted_codes, np.arange(code_count + 1), side='left')
+        return index
+
+
+def build_category_index(
+        df: pd.DataFrame,
+        column: str,
+) -> Optional[category_index]:
+    """build a category_index for a column in a dataframe
+
+    Args:
+        df (pandas.DataFrame): dataframe with the column we want to index
+        column (str): the column we want to index
+
+    Returns:
+        category_index, or None if the column can't be factorized. Filters on that column will use a mask instead.
+    """
+    try:
+        return category_index(values=df[column].to_numpy())
+    except TypeError:
+        return None
+
+
+class search_index(object):
+    """case-insensitive prefix and substring index over the labels of a filter's options
+
+    The labels are case-folded and sorted once, so a prefix search is two binary searches. If there aren't enough
+    prefix matches, we fill up the results with labels that contain the search value somewhere else. For those,
+    we keep every label joined into one string, so finding the next match is a single (C speed) str.find.
+
+    Methods:
+        search: grab the options whose label matches a search value
+        options_for_values: grab the options for a list of values
+    """
+
+    # sorts after any character a label can have, so key + this is an upper bound for every label starting with key
+    _max_character = '\U0010ffff'
+
+    def __init__(
+            self,
+            option_list: List[Dict[str, Any]],
+    ):
+        """create the index
+
+        Args:
+            option_list (List[Dict[str, Any]]): list of {'label': label, 'value': value} options we'll search
+        """
+        self.option_list = option_list
+
+        # newlines separate the labels in the joined string, so they can't be part of a label
+        key_list = [str(option['label']).casefold().replace('\n', ' ') for option in self.option_list]
+        keys = np.array(key_list, dtype=str)
+        self._order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self._order]
+
+        self._joined_keys = '\n'.join(key_list)
+        self._key_starts = np.zeros(len(key_list) + 1, dtype=np.int64)  # where each label starts in the joined string
+        np.cumsum([len(key) + 1 for key in key_list], out=self._key_starts[1:])
+        self._option_by_value_dict = {}
+        for option in self.option_list:
+            self._option_by_value_dict.setdefault(option['value'], option)
+
+    def __len__(self) -> int:
+        return len(self.option_list)
+
+    def search(
+            self,
+            search_value: str,
+            limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """grab the options whose label matches a search value
+
+        1. options whose label starts with the search value, in alphabetical order
+        2. if we still need more, options whose label contains the search value somewhere after the start
+
+        Args:
+            search_value (str): what the user typed
+            limit (:obj: `int`, optional): default `50`, the most options we'll return
+
+        Returns:
+            List[Dict[str, Any]]: the matching options
+        """
+        key = str(search_value).casefold().replace('\n', ' ') if search_value is not None else ''
+        if not key or limit <= 0:
+            return []
+
+        # 1
+        start, stop = np.searchsorted(self._sorted_keys, [key, key + self._max_character], side='left')
+        positions = self._order[start:min(stop, start + limit)]
+
+        # 2
+        position_list = positions.tolist()
+        start = 0
+        while len(position_list) < limit:
+            found_at = self._joined_keys.find(key, start)
+            if found_at < 0:
+                break
+
+            position = int(np.searchsorted(self._key_starts, found_at, side='right')) - 1
+            if found_at > self._key_starts[position]:  # matches at the start of a label were prefix matches
+                position_list.append(position)
+            start = self._key_starts[position + 1]  # only count each label once
+
+        return [self.option_list[position] for position in position_list]
+
+    def options_for_values(
+            self,
+            value_list: List[Any],
+    ) -> List[Dict[str, Any]]:
+        """grab the options for a list of values, e.g. the ones that are already selected"""
+        return [
+            self._option_by_value_dict[value] for value in value_list or [] if value in self._option_by_value_dict
+        ]
@@ -0,0 +1,311 @@
+from typing import List, Dict, Any, Tuple, Callable, Hashable
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+from ._filter_index import search_index
+
+# (id(df), ...) -> filter options, so filters and pages sharing a df only compute them once
+_filter_options_dict = {}
+_filter_options_lock = threading.Lock()
+_tracked_dataframe_id_set = set()  # ids of the dfs we'll forget about once they're garbage collected
+
+# how many steps a slider on a continuous column gets when it has too many distinct values to mark each one
+_continuous_step_count = 1000
+
+
+def get_filter_options(
+        df: pd.DataFrame,
+        column: str,
+        label_column: str = None,
+) -> List[Dict[str, Any]]:
+    """grab the {'label': label, 'value': value} options for a filter, computing them once per df
+
+    The options are cached by the df's identity, so this assumes a df isn't modified in place after we've
+    built a filter from it. Once the df is garbage collected, we forget its options.
+
+    Args:
+        df (pandas.DataFrame): dataframe for the filter
+        column (str): column of the df used for the values of the options
+        label_column (:obj: `str`, optional): default `None`, column of the df used for the labels of the options,
+            `None` uses column
+
+    Returns:
+        List[Dict[str, Any]]: one option per distinct (label, value) pair, sorted by label and then value.
+            Missing labels and values are left out.
+    """
+    label_column = label_column if label_column is not None else column
+
+    return _get_or_compute_for_dataframe(
+        df=df,
+        key=('options', column, label_column),
+        compute_function=lambda: _option_list(df=df, column=column, label_column=label_column),
+    )
+
+
+def get_slider_settings(
+        df: pd.DataFrame,
+        column: str,
+        max_marks: int = 50,
+) -> Dict[str, Any]:
+    """grab the min, max, marks, and step for a Slider or RangeSlider, computing them once per df
+
+    If the column has at most max_marks distinct values, every value gets a mark and the slider snaps to the
+    marks (step=None). Otherwise, we only mark max_marks evenly spaced values and let the step drive the
+    slider, so the layout doesn't grow with the number of distinct values:
+    integer columns step by the greatest common divisor of the gaps between their values, other columns split
+    the range into _continuous_step_count steps.
+
+    The step can land between the values in the column, which is fine for a RangeSlider's bounds. A Slider
+    filters on equality, so it ignores the step and snaps to the marks, which are all values in the column.
+
+    Args:
+        df (pandas.DataFrame): dataframe for the filter
+        column (str): column of the df used for the values of the slider
+        max_marks (:obj: `int`, optional): default `50`, the most marks we'll put on the slider
+
+    Returns:
+        Dict[str, Any]: dict with keys ['minimum', 'maximum', 'marks', 'step']
+    """
+    return _get_or_compute_for_dataframe(
+        df=df,
+        key=('slider', column, max_marks),
+        compute_function=lambda: _slider_settings(
+            values=_get_or_compute_for_dataframe(
+                df=df,
+                key=('unique', column),
+                compute_function=lambda: np.sort(df[column].dropna().unique()),  # grab the values in order
+            ),
+            max_marks=max_marks,
+        ),
+    )
+
+
+def get_search_index(
+        df: pd.DataFrame,
+        column: str,
+        label_column: str = None,
+) -> search_index:
+    """grab the search_index over a filter's options, building it once per df
+
+    Args:
+        df (pandas.DataFrame): dataframe for the filter
+        column (str): column of the df used for the values of the options
+        label_column (:obj: `str`, optional): default `None`, column of the df used for the labels of the options,
+            `None` uses column
+
+    Returns:
+        search_index
+    """
+    label_column = label_column if label_column is not None else column
+
+    return _get_or_compute_for_dataframe(
+        df=df,
+        key=('search', column, label_column),
+        compute_function=lambda: search_index(
+            option_list=get_filter_options(df=df, column=column, label_column=label_column),
+        ),
+    )
+
+
+def extend_filter_options(
+        df: pd.DataFrame,
+        appended_df: pd.DataFrame,
+        extended_df: pd.DataFrame,
+) -> bool:
+    """carry the filter options we computed for a df over to the df with rows appended to it
+
+    Instead of computing them from every row of extended_df again, we only look at the appended rows:
+
+    1. merge the distinct options and slider values of the appended rows into the ones we have
+    2. rebuild the slider settings and search indexes from those, search indexes only if their options changed
+
+    Args:
+        df (pandas.DataFrame): dataframe we already computed filter options for
+        appended_df (pandas.DataFrame): the rows appended to df
+        extended_df (pandas.DataFrame): df with the rows appended, which we'll cache the filter options for
+
+    Returns:
+        bool: True if successful, raises errors otherwise
+    """
+    with _filter_options_lock:
+        cached_dict = {key[1:]: value for key, value in _filter_options_dict.items() if key[0] == id(df)}
+
+    # 1
+    for key, value in cached_dict.items():
+        if key[0] == 'options':
+            _, column, label_column = key
+            _get_or_compute_for_dataframe(
+                df=extended_df,
+                key=key,
+                compute_function=lambda: _extend_option_list(
+                    option_list=value, appended_df=appended_df, column=column, label_column=label_column,
+                ),
+            )
+        elif key[0] == 'unique':
+            _, column = key
+            _get_or_compute_for_dataframe(
+                df=extended_df,
+                key=key,
+                compute_function=lambda: _extend_sorted_values(
+                    values=value, appended_values=np.sort(appended_df[column].dropna().unique()),
+                ),
+            )
+
+    # 2
+    for key, value in cached_dict.items():
+        if key[0] == 'slider':
+            _, column, max_marks = key
+            get_slider_settings(df=extended_df, column=column, max_marks=max_marks)
+        elif key[0] == 'search':
+            _, column, label_column = key
+            if get_filter_options(df=extended_df, column=column, label_column=label_column) is value.option_list:
+                _get_or_compute_for_dataframe(df=extended_df, key=key, compute_function=lambda: value)
+
+    return True
+
+
+def _option_list(
+        df: pd.DataFrame,
+        column: str,
+        label_column: str,
+) -> List[Dict[str, Any]]:
+    """compute the options for a filter, see get_filter_options"""
+    return [
+        {'label': label, 'value': value}
+        for label, value in zip(*_unique_label_value_pairs(df=df, column=column, label_column=label_column))
+    ]
+
+
+def _extend_option_list(
+        option_list: List[Dict[str, Any]],
+        appended_df: pd.DataFrame,
+        column: str,
+        label_column: str,
+) -> List[Dict[str, Any]]:
+    """merge the options of the appended rows into option_list, or grab option_list itself if they're all in it"""
+    known_pair_set = {(option['label'], option['value']) for option in option_list}
+    appended_pair_list = [
+        (label, value)
+        for label, value in zip(*_unique_label_value_pairs(df=appended_df, column=column, label_column=label_column))
+        if (label, value) not in known_pair_set
+    ]
+    if not appended_pair_list:
+        return option_list
+
+    # sorting the (much smaller) table of options gives us the same order as the whole df would
+    label_list = [option['label'] for option in option_list] + [label for label, _ in appended_pair_list]
+    value_list = [option['value'] for option in option_list] + [value for _, value in appended_pair_list]
+    option_df = pd.DataFrame({column: value_list}) if label_column == column \
+        else pd.DataFrame({'label': label_list, 'value': value_list})
+
+    return _option_list(
+        df=option_df,
+        column=column if label_column == column else 'value',
+        label_column=label_column if label_column == column else 'label',
+    )
+
+
+def _extend_sorted_values(
+        values: np.ndarray,
+        appended_values: np.ndarray,
+) -> np.ndarray:
+    """merge sorted distinct values into sorted distinct values, grabbing values itself if there's nothing new"""
+    appended_values = appended_values[~np.isin(appended_values, values)]
+    if not len(appended_values):
+        return values
+
+    values = values.astype(np.result_type(values, appended_values), copy=False)  # e.g. bigger integers
+    return np.insert(values, np.searchsorted(values, appended_values), appended_values)
+
+
+def _slider_settings(
+        values: np.ndarray,
+        max_marks: int,
+) -> Dict[str, Any]:
+    """compute the min, max, marks, and step for a slider from its sorted distinct values, see get_slider_settings"""
+    is_thinned = len(values) > max_marks
+
+    if is_thinned:  # keep max_marks evenly spaced values, always including the first and last
+        mark_positions = np.linspace(0, len(values) - 1, num=max(max_marks, 2)).round().astype(np.intp)
+        mark_values = values[np.unique(mark_positions)]
+    else:
+        mark_values = values
+
+    step = None
+    if is_thinned and pd.api.types.is_integer_dtype(values.dtype):
+        step = int(np.gcd.reduce(np.diff(values)))
+    elif is_thinned and pd.api.types.is_float_dtype(values.dtype):
+        step = float(values[-1] - values[0]) / _continuous_step_count
+
+    # todo: support different columns for labels and values
+    return {
+        'minimum': values[0],
+        'maximum': values[-1],
+        'marks': {str(val): {'label': str(val), 'style': {'transform': 'rotate(45deg)'}} for val in mark_values},
+        'step': step,
+    }
+
+
+def _get_or_compute_for_dataframe(
+        df: pd.DataFrame,
+        key: Tuple[Hashable, ...],
+        compute_function: Callable[[], Any],
+) -> Any:
+    """grab the cached value for a df and key, computing and caching it if we don't have it"""
+    key = (id(df),) + key
+
+    with _filter_options_lock:
+        if key in _filter_options_dict:
+            return _filter_options_dict[key]
+
+    value = compute_function()
+
+    with _filter_options_lock:
+        if id(df) not in _tracked_dataframe_id_set:
+            _tracked_dataframe_id_set.add(id(df))
+            weakref.finalize(df, _forget_dataframe, id(df))
+        _filter_options_dict[key] = value
+
+    return value
+
+
+def _unique_label_value_pairs(
+        df: pd.DataFrame,
+        column: str,
+        label_column: str,
+) -> Tuple[List[Any], List[Any]]:
+    """find the distinct (label, value) pairs, sorted by label and then value
+
+    This gives us the same pairs as iterating over df.groupby([label_column, column]), but instead of creating
+    a group for each pair, we factorize both columns into sorted integer codes and find the unique combinations
+    of codes with numpy.
+
+    Returns:
+        Tuple[List[Any], List[Any]]: the labels and the values of each pair
+    """
+    value_codes, value_uniques = pd.factorize(df[column], sort=True)
+    if label_column == column:
+        codes = np.unique(value_codes[value_codes >= 0])
+        values = value_uniques.take(codes).tolist()
+        return values, values
+
+    label_codes, label_uniques = pd.factorize(df[label_column], sort=True)
+    is_present = (label_codes >= 0) & (value_codes >= 0)  # missing values are -1, groupby leaves them out
+
+    # the codes are sorted like the uniques, so sorting the combined codes sorts by label and then value
+    combined_codes = np.unique(
+        label_codes[is_present].astype(np.int64) * len(value_uniques) + value_codes[is_present]
+    )
+    label_codes, value_codes = np.divmod(combined_codes, max(len(value_uniques), 1))
+
+    return label_uniques.take(label_codes).tolist(), value_uniques.take(value_codes).tolist()
+
+
+def _forget_dataframe(dataframe_id: int) -> None:
+    """remove every cached option for a df that was garbage collected"""
+    with _filter_options_lock:
+        _tracked_dataframe_id_set.discard(dataframe_id)
+        for key in [key for key in _filter_options_dict if key[0] == dataframe_id]:
+            del _filter_options_dict[key]
@@ -1,3 +1,5 @@
+from typing import Any, Hashable
+import hashlib
 import string
 import random
 
@@ -6,3 +8,25 @@ def generate_random_string(length: int = 16) -> str:
     return ''.join(
         [random.choice(string.ascii_lowercase + string.digits) for n in range(length)]
     )
+
+
+def generate_component_id_suffix(*id_parts: Any, length: int = 16) -> str:
+    """create a string that only depends on id_parts, so every process running the app agrees on it
+
+    Python's built-in hash() is salted differently in each process, so we hash the repr with hashlib instead.
+    """
+    return hashlib.sha1(repr(id_parts).encode('utf-8')).hexdigest()[:length]
+
+
+def make_hashable(value: Any) -> Hashable:
+    """turn a value from a dash input (which can be a list or dict) into something we can use as a dict key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(make_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, make_hashable(item)) for key, item in value.items()))
+    return value
+
+
+def quote_sql_identifier(identifier: str) -> str:
+    """quote a table or column name so we can put it in a sql statement, doubling any quotes inside it"""
+    return '"{}"'.format(str(identifier).replace('"', '""'))
@@ -1,4 +1,7 @@
 from collections import OrderedDict
+import operator
+import numpy as np
+import pandas as pd
 import plotly.express as px
 
 """templates"""
@@ -134,67 +137,144 @@ _template_lookup = {
 }
 
 """filters"""
+# each mask function takes the numpy array of a column's values and the value coming from the dash input
+# (converted to match the column by _dtypes.convert_filter_value, so empty values are None)
+# and returns a boolean numpy array of the rows to keep, or None if this value doesn't filter anything
+# range filters also have a range_bounds_function that takes the list of dash input values for the filter
+# and returns the (low, high) bounds we can look up in a sorted index, or None if they don't filter anything
+# equality and isin filters have a category_values_function that takes the same list of dash input values
+# and returns the list of values we can look up in a categorical index, or None if they don't filter anything
+# each sql clause function mirrors its mask function for sql data sources, it takes the quoted column name and the
+# value coming from the dash input and returns a (clause, parameters) tuple, or None if it doesn't filter anything
 _filter_type_lookup = {
     'Checklist': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column].isin(value)] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: _isin(values, value) if value else None,
         ],
+        'sql_clause_function_list': [
+            lambda column, value: _sql_in(column, value) if value else None,
+        ],
+        'category_values_function': lambda value_list: value_list[0] if value_list[0] else None,
     },
 
     'DatePickerRange': {
         'input_property_list': ['start_date', 'end_date'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column] >= value] if value else dataframe,  # start
-            lambda dataframe, column, value: dataframe[dataframe[column] <= value] if value else dataframe,  # end
+        'mask_function_list': [
+            lambda values, value: _compare(values, operator.ge, value) if value is not None else None,  # start
+            lambda values, value: _compare(values, operator.le, value) if value is not None else None,  # end
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{} >= ?'.format(column), [value]) if value else None,  # start
+            lambda column, value: ('{} <= ?'.format(column), [value]) if value else None,  # end
         ],
+        'range_bounds_function':
+            lambda value_list: tuple(value_list) if any(value is not None for value in value_list) else None,
     },
 
     'DatePickerSingle': {
         'input_property_list': ['date'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column] == value] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: values == value if value is not None else None,
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{} = ?'.format(column), [value]) if value else None,
         ],
     },
 
     'Dropdown': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column] == value] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: values == value if value else None,
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{} = ?'.format(column), [value]) if value else None,
         ],
+        'category_values_function': lambda value_list: [value_list[0]] if value_list[0] else None,
     },
 
     'Dropdown-multi': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column].isin(value)] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: _isin(values, value) if value else None,
         ],
+        'sql_clause_function_list': [
+            lambda column, value: _sql_in(column, value) if value else None,
+        ],
+        'category_values_function': lambda value_list: value_list[0] if value_list[0] else None,
+    },
+
+    'Dropdown-search': {
+        'input_property_list': ['value'],
+        'mask_function_list': [
+            lambda values, value: _isin(values, value) if value else None,
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: _sql_in(column, value) if value else None,
+        ],
+        'category_values_function': lambda value_list: value_list[0] if value_list[0] else None,
     },
 
     'RadioItems': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column] == value] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: values == value if value else None,
         ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{} = ?'.format(column), [value]) if value else None,
+        ],
+        'category_values_function': lambda value_list: [value_list[0]] if value_list[0] else None,
     },
 
     'RangeSlider': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value:
-            dataframe[(dataframe[column] >= value[0]) & (dataframe[column] <= value[1])],
+        'mask_function_list': [
+            lambda values, value: _compare(values, operator.ge, value[0]) & _compare(values, operator.le, value[1]),
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{0} >= ? AND {0} <= ?'.format(column), [value[0], value[1]]),
         ],
+        'range_bounds_function': lambda value_list: (value_list[0][0], value_list[0][1]),
     },
 
     'Slider': {
         'input_property_list': ['value'],
-        'lambda_function_list': [
-            lambda dataframe, column, value: dataframe[dataframe[column] == value] if value else dataframe,
+        'mask_function_list': [
+            lambda values, value: values == value if value else None,
+        ],
+        'sql_clause_function_list': [
+            lambda column, value: ('{} = ?'.format(column), [value]) if value else None,
         ],
     },
 
 }
 
+
+def _isin(values, value):
+    """hash based membership test for a numpy array, equivalent to pandas.Series.isin"""
+    return pd.Series(values, copy=False).isin(value).to_numpy()
+
+
+def _compare(values, compare, value):
+    """compare a numpy array to a value, missing values never match, equivalent to comparing a pandas.Series
+
+    Numeric and datetime arrays already do that with NaN and NaT, but an array of python objects with None or NaN
+    in it raises a TypeError, so we only compare the values that are there.
+    """
+    if values.dtype != object:
+        return compare(values, value)
+
+    is_present = ~pd.isna(values)
+    ret = np.zeros(len(values), dtype=bool)
+    ret[is_present] = compare(values[is_present], value)
+    return ret
+
+
+def _sql_in(column, value):
+    """parameterized membership test for a sql column, equivalent to _isin"""
+    return '{} IN ({})'.format(column, ', '.join(['?'] * len(value))), list(value)
+
+
 """filter type from chart input type"""
 _chart_input_to_filter_type_lookup = {
     'output_type': 'Dropdown',
@@ -210,30 +290,50 @@ _chart_input_to_filter_type_lookup = {
     'projection': 'Dropdown',
 }
 
+# chart inputs whose options are the columns of the df, so the user can pick any column for them
+_column_chart_input_list = ['x', 'y', 'z', 'color', 'size', 'hover_name', 'hover_data', 'locations']
+
 """plotly objects"""
+# 'fast_trace' holds the trace properties for the output types the fast figure builder can draw without plotly express
 _chart_lookup_dict = OrderedDict([
     (
         'scatter', {
             'object': px.scatter,
             'inputs': ['data_frame', 'x', 'y', 'color', 'size', 'hover_data', 'template'],
+            'fast_trace': {
+                'type': 'scatter', 'mode': 'markers', 'xaxis': 'x', 'yaxis': 'y', 'marker': {'symbol': 'circle'},
+                'orientation': 'v',
+            },
         }
     ),
     (
         'line', {
             'object': px.line,
             'inputs': ['data_frame', 'x', 'y', 'color', 'hover_data', 'template'],
+            'fast_trace': {
+                'type': 'scatter', 'mode': 'lines', 'xaxis': 'x', 'yaxis': 'y', 'marker': {'symbol': 'circle'},
+                'line': {'dash': 'solid'}, 'orientation': 'v',
+            },
         }
     ),
     (
         'area', {
             'object': px.area,
             'inputs': ['data_frame', 'x', 'y', 'color', 'hover_data', 'template'],
+            'fast_trace': {
+                'type': 'scatter', 'mode': 'lines', 'xaxis': 'x', 'yaxis': 'y', 'marker': {'symbol': 'circle'},
+                'stackgroup': '1', 'orientation': 'v', 'fillpattern': {'shape': ''},
+            },
         }
     ),
     (
         'bar', {
             'object': px.bar,
             'inputs': ['data_frame', 'x', 'y', 'color', 'hover_data', 'template'],
+            'fast_trace': {
+                'type': 'bar', 'orientation': 'v', 'xaxis': 'x', 'yaxis': 'y', 'alignmentgroup': 'True',
+                'textposition': 'auto', 'marker': {'pattern': {'shape': ''}},
+            },
         }
     ),
     (
@@ -372,6 +472,11 @@ def get_chart_inputs(chart_string):
     return _get_chart_dict_value(chart_string, key='inputs')
 
 
+def get_fast_trace(chart_string):
+    """return the trace properties the fast figure builder uses for the chart_string, None if it's not supported"""
+    return _chart_lookup_dict.get(chart_string, {}).get('fast_trace')
+
+
 def get_arg_options(arg_string):
     """return a list of argument options corresponding to the arg_string"""
     return _arg_options_lookup_dict.get(arg_string)
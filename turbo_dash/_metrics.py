@@ -0,0 +1,163 @@
+from typing import Any, Dict, Iterator, Tuple
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+# name -> (help text, bucket upper bounds) for every histogram we keep
+_histogram_definition_dict = {
+    'turbo_dash_callback_phase_seconds': (
+        'seconds an output callback spent in each phase: filter, figure, or serialize',
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    'turbo_dash_layout_seconds': (
+        'seconds it took to route a url to its page layout',
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    'turbo_dash_filter_rows': (
+        'rows of a page before and after the menu filters, each time we filter',
+        (10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000),
+    ),
+    'turbo_dash_output_rows': (
+        'rows an output built its figure from',
+        (10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000),
+    ),
+    'turbo_dash_payload_bytes': (
+        'bytes of the serialized figure an output sent to the browser',
+        (1000, 10000, 100000, 1000000, 10000000, 100000000),
+    ),
+}
+
+
+class metrics_registry(object):
+    """thread-safe histograms of where the dashboard spends its time, in the Prometheus text format
+
+    Each process keeps its own registry, so with several gunicorn workers every scrape only sees the requests
+    the worker that answered it served.
+
+    Methods:
+        observe: add a value to a histogram
+        time: time a block of code and add the seconds it took to a histogram
+        render: grab every histogram in the Prometheus text exposition format
+        clear: forget everything we've observed
+    """
+
+    def __init__(self):
+        """create the registry"""
+        # serializing the figures just to time them costs something, so we only do it if somebody's looking
+        self.is_enabled = False
+
+        self._lock = threading.Lock()
+        # (name, ((label, value), ...)) -> [count per bucket, sum, count]
+        self._histogram_dict = {}
+
+    def observe(
+            self,
+            name: str,
+            value: float,
+            **labels: Any
+    ) -> bool:
+        """add a value to a histogram
+
+        Args:
+            name (str): name of the histogram, one of _histogram_definition_dict
+            value (float): the value we observed
+            **labels: the labels of the series we're adding to, e.g. page='/app1'
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+
+        Raises:
+            ValueError if we don't know the histogram
+        """
+        if name not in _histogram_definition_dict:
+            raise ValueError(
+                """histogram ({}) must be one of {}""".format(name, sorted(_histogram_definition_dict))
+            )
+
+        bucket_list = _histogram_definition_dict[name][1]
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        position = bisect.bisect_left(bucket_list, value)  # buckets are inclusive upper bounds
+
+        with self._lock:
+            histogram = self._histogram_dict.get(key)
+            if histogram is None:
+                histogram = self._histogram_dict[key] = [[0] * len(bucket_list), 0.0, 0]
+            if position < len(bucket_list):
+                histogram[0][position] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+        return True
+
+    @contextmanager
+    def time(
+            self,
+            name: str,
+            **labels: Any
+    ) -> Iterator[None]:
+        """time a block of code and add the seconds it took to a histogram, even if it raises
+
+        Args:
+            name (str): name of the histogram, one of _histogram_definition_dict
+            **labels: the labels of the series we're adding to
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self) -> str:
+        """grab every histogram in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histogram_list = sorted(
+                (key, (list(bucket_counts), total, count))
+                for key, (bucket_counts, total, count) in self._histogram_dict.items()
+            )
+
+        line_list = []
+        for name, (help_text, bucket_list) in sorted(_histogram_definition_dict.items()):
+            series_list = [(labels, histogram) for (key_name, labels), histogram in histogram_list if key_name == name]
+            if not series_list:
+                continue
+
+            line_list.append('# HELP {} {}'.format(name, help_text))
+            line_list.append('# TYPE {} histogram'.format(name))
+            for labels, (bucket_counts, total, count) in series_list:
+                cumulative_count = 0
+                for upper_bound, bucket_count in zip(bucket_list, bucket_counts):
+                    cumulative_count += bucket_count
+                    line_list.append('{}_bucket{} {}'.format(
+                        name, _label_string(labels + (('le', repr(float(upper_bound))),)), cumulative_count,
+                    ))
+                line_list.append('{}_bucket{} {}'.format(name, _label_string(labels + (('le', '+Inf'),)), count))
+                line_list.append('{}_sum{} {}'.format(name, _label_string(labels), repr(float(total))))
+                line_list.append('{}_count{} {}'.format(name, _label_string(labels), count))
+
+        return '\n'.join(line_list) + '\n' if line_list else ''
+
+    def clear(self) -> None:
+        """forget everything we've observed"""
+        with self._lock:
+            self._histogram_dict.clear()
+
+
+def _label_string(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """format labels like {page="/app1",phase="filter"}, escaping the values the way Prometheus expects"""
+    if not labels:
+        return ''
+
+    return '{{{}}}'.format(','.join(
+        '{}="{}"'.format(label, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in labels
+    ))
+
+
+# the registry every page and output in this process reports to
+default_registry = metrics_registry()
+
+
+def metric_labels(**labels: Any) -> Dict[str, Any]:
+    """leave out the labels we don't know, e.g. the page of an output that isn't on a page"""
+    return {label: value for label, value in labels.items() if value is not None}
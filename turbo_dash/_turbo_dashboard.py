@@ -1,12 +1,17 @@
 from typing import List, Dict, OrderedDict as ODict, Union, Tuple
 from collections import OrderedDict
+import json
+import threading
+import flask
+import plotly.utils
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 
 from ._turbo_dashboard_page import turbo_dashboard_page
 from ._lookups import _template_lookup
-from ._helpers import generate_random_string
+from ._cache import lru_cache
+from ._metrics import default_registry
 
 
 class turbo_dashboard(object):
@@ -16,9 +21,13 @@ class turbo_dashboard(object):
         run_dashboard: create the app, manage the layouts, run the callbacks, start the server
         _initiate_app: initiate the app and layout
         _header_html: create the html we'll use for the header
-        _urls_names_and_html: grab the url, name, and html based on the provided template for every page
+        _urls_names_and_html: grab the url, name, and page object for every page
+        _page_html: grab the html for a page, building it the first time we need it
+        _page_layout: grab what the layouts callback sends for a page
+        _prewarm_layouts: build the page layouts before anybody visits them, if we want to
         _layouts_callback: run the layouts callback
         _callbacks: run the dash callbacks for the layouts and each page
+        _metrics_route: serve the metrics in the Prometheus text format
         _run_server: run the server
 
     """
@@ -41,6 +50,10 @@ class turbo_dashboard(object):
                 'https://codepen.io/turbo3136/pen/jOqqqgj.css',  # stylesheet for 'turbo-dark' template
             ),
             app_tab_title: str = 'Turbo Dash',
+            prewarm_layouts: str = None,
+            serialize_layouts: bool = True,
+            compress: bool = True,
+            metrics_route: str = None,
     ):
         """create a single or multi-page Plotly Dash dashboard
 
@@ -61,6 +74,22 @@ class turbo_dashboard(object):
                 github doesn't seem to work for some reason
             app_tab_title (:obj: `str`, optional): default `'Turbo Dash'`, the title given to the app's tab
                 in your browser
+            prewarm_layouts (:obj: `str`, optional): default `None`, page layouts are built the first time
+                somebody visits the page and then cached. This controls whether we build them ahead of time.
+                Options include:
+                None: don't, the first visit to each page builds its layout
+                'background': build every layout in a background thread once the dashboard is running
+                'startup': build every layout before run_dashboard returns. Use this with gunicorn's --preload
+                    so every worker inherits the built layouts.
+            serialize_layouts (:obj: `bool`, optional): default `True`, convert each page's layout to plain JSON
+                types once and cache that. Page navigation then hands dash the plain dict, so its JSON encoder
+                doesn't have to walk the whole component tree on every request.
+            compress (:obj: `bool`, optional): default `True`, gzip the responses that can take it, passed to
+                dash.Dash. Page layouts carry every filter's options, so they shrink a lot.
+            metrics_route (:obj: `str`, optional): default `None`, route on the flask server (e.g. '/metrics') that
+                serves histograms of the time each output spends filtering, building, and serializing its figure,
+                the time it takes to route each page's layout, the rows before and after filtering, and the size
+                of each figure, in the Prometheus text format. `None` doesn't serve them.
         """
         self.template = template
         self.dashboard_page_list = dashboard_page_list
@@ -73,12 +102,22 @@ class turbo_dashboard(object):
         self.external_stylesheets_tuple = external_stylesheets_tuple
         self.external_stylesheets = list(self.external_stylesheets_tuple)
         self.app_tab_title = app_tab_title
+        self.prewarm_layouts = prewarm_layouts
+        self.serialize_layouts = serialize_layouts
+        self.compress = compress
+        self.metrics_route = metrics_route
+
+        if self.prewarm_layouts not in (None, 'background', 'startup'):
+            raise ValueError(
+                """Unknown prewarm_layouts string: {}. Options include [None, 'background', 'startup']."""
+                .format(self.prewarm_layouts)
+            )
 
         # set some internal variables
         self._pathname_prefix = '/'  # prefix we need for Dash's pathname property
         self._url_dict_key = 'url'  # string we'll use for the key of the url in _urls_names_and_html
         self._url_name_dict_key = 'name'  # string we'll use for the key of the name in _urls_names_and_html
-        self._html_dict_key = 'html'  # string we'll use for the key of the html in _urls_names_and_html
+        self._page_dict_key = 'page'  # string we'll use for the key of the page object in _urls_names_and_html
         self._url_component_id = 'url'  # Dash component ID for the url
         self._url_component_property = 'pathname'  # Dash component property for the url
 
@@ -106,6 +145,12 @@ class turbo_dashboard(object):
             )
             self.dashboard_page_list.extend([self._homepage, self._fourohfour_page])  # add them to the dashboard list
 
+        # (page url, page data_version) -> page html, built the first time somebody visits the page
+        # keep about one layout per page, so the layouts from before a page refreshed its data get pushed out
+        self._layout_cache = lru_cache(max_items=len(self.dashboard_page_list))
+        # (page url, page data_version) -> page html converted to plain JSON types, for the layouts callback
+        self._serialized_layout_cache = lru_cache(max_items=len(self.dashboard_page_list))
+
     def run_dashboard(
             self,
             app_name: str,
@@ -133,7 +178,7 @@ class turbo_dashboard(object):
             suppress_callback_exceptions=suppress_callback_exceptions,
         )
 
-        # gather all the layouts into an OrderedDict of dicts
+        # gather all the pages into an OrderedDict of dicts, we build their layouts when somebody visits them
         urls_names_and_html = self._urls_names_and_html(
             template=self.template,
         )
@@ -144,6 +189,15 @@ class turbo_dashboard(object):
             urls_names_and_html=urls_names_and_html,
         )
 
+        # serve the metrics, if we want them
+        if self.metrics_route is not None:
+            self._metrics_route(app=app)
+
+        # build the layouts ahead of time, if we want to
+        self._prewarm_layouts(
+            urls_names_and_html=urls_names_and_html,
+        )
+
         # run the server
         self._run_server(
             app=app,
@@ -174,6 +228,7 @@ class turbo_dashboard(object):
             name=app_name,
             suppress_callback_exceptions=suppress_callback_exceptions,
             external_stylesheets=self.external_stylesheets,
+            compress=self.compress,
         )
         app.title = self.app_tab_title
 
@@ -190,14 +245,17 @@ class turbo_dashboard(object):
     def _urls_names_and_html(
             self,
             template: str,
-    ) -> ODict[str, Dict[str, Union[str, str, html.Div]]]:
-        """grab the url, name, and html based on the provided template for every page
+    ) -> ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]]:
+        """grab the url, name, and page object for every page
+
+        We don't build the html here. Building a page's html computes the options of every filter over the
+        page's whole df, so we wait until somebody visits the page (see _page_html).
 
         Args:
             template (str): the template for the layouts
 
         Returns:
-            OrderedDict: OrderedDict of dicts with url, name, and html info in the order provided
+            OrderedDict: OrderedDict of dicts with url, name, and page info in the order provided
 
             The return value looks like:
             OrderedDict([
@@ -206,7 +264,7 @@ class turbo_dashboard(object):
                     {
                         'url': dashboard_page.url,
                         'name': dashboard_page.name,
-                        'html': dashboard_page.create_html(template=template),
+                        'page': dashboard_page,
                     }
                 ),
                 ...
@@ -218,30 +276,107 @@ class turbo_dashboard(object):
         ret = OrderedDict([  # list comprehension on the dashboard page list
             (  # to create an OrderedDict of
                 page.url,  # page url keys
-                {  # connected to dictionaries with page url, name, html
+                {  # connected to dictionaries with page url, name, page object
                     self._url_dict_key: page.url,
                     self._url_name_dict_key: page.name,
-                    self._html_dict_key: page.create_html(
-                        template=template,
-                        header_html=self._header_html(current_page_url=page.url),
-                    ),
+                    self._page_dict_key: page,
                 }
             ) for page in self.dashboard_page_list  # iterate over the dashboard page list
         ])
 
         return ret
 
+    def _page_html(
+            self,
+            urls_names_and_html: ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]],
+            url: str,
+    ) -> html.Div:
+        """grab the html for a page, building it the first time we need it
+
+        The layout cache makes sure each page is only built once, even if multiple requests for the same page
+        come in while we're building it.
+
+        Args:
+            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and pages
+            url (str): the url of the page we want
+
+        Returns:
+            dash_html_components.Div
+        """
+        page = urls_names_and_html[url][self._page_dict_key]
+        return self._layout_cache.get_or_compute(
+            key=(url, page.data_version),
+            compute_function=lambda: page.create_html(
+                template=self.template,
+                header_html=self._header_html(current_page_url=url),
+            ),
+        )
+
+    def _page_layout(
+            self,
+            urls_names_and_html: ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]],
+            url: str,
+    ) -> Union[html.Div, dict]:
+        """grab what the layouts callback sends for a page: its html, or that html as plain JSON types
+
+        Dash runs display_page's return value through its JSON encoder on every request, which means walking
+        the whole component tree each time somebody switches pages. If we want to serialize the layouts, we
+        walk it once and cache the plain dict it turns into, just like the serialized figures.
+
+        Args:
+            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and pages
+            url (str): the url of the page we want
+
+        Returns:
+            dash_html_components.Div, or its plain dict if serialize_layouts is True
+        """
+        if not self.serialize_layouts:
+            return self._page_html(urls_names_and_html=urls_names_and_html, url=url)
+
+        page = urls_names_and_html[url][self._page_dict_key]
+        return self._serialized_layout_cache.get_or_compute(
+            key=(url, page.data_version),
+            compute_function=lambda: json.loads(json.dumps(
+                self._page_html(urls_names_and_html=urls_names_and_html, url=url),
+                cls=plotly.utils.PlotlyJSONEncoder,
+            )),
+        )
+
+    def _prewarm_layouts(
+            self,
+            urls_names_and_html: ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]],
+    ) -> bool:
+        """build the page layouts before anybody visits them, if we want to
+
+        Args:
+            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and pages
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+        """
+        def build_every_layout():
+            for url in urls_names_and_html:
+                self._page_layout(urls_names_and_html=urls_names_and_html, url=url)
+
+        if self.prewarm_layouts == 'startup':
+            build_every_layout()
+
+        if self.prewarm_layouts == 'background':
+            threading.Thread(target=build_every_layout, name='turbo_dash-prewarm-layouts', daemon=True).start()
+
+        return True
+
     def _layouts_callback(
             self,
             app: dash.Dash,
-            urls_names_and_html: ODict[str, Dict[str, Union[str, str, html.Div]]],
+            urls_names_and_html: ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]],
     ) -> bool:
         """run the layouts callback
 
         Args:
             app (dash.Dash): the dash.Dash app object
-            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and layouts we'll use
-                that create each page
+            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and pages we'll use
+                to create each layout
 
         Returns:
             bool: True if successful, raises errors otherwise
@@ -255,14 +390,15 @@ class turbo_dashboard(object):
                 ),
             ],
         )
-        def display_page(pathname: str) -> html.Div:
-            for url in urls_names_and_html:  # search through the page names in this dict
-                if pathname == '{}'.format(url):  # for a url matching the pathname in the url
-                    return urls_names_and_html[url][self._html_dict_key]  # if we find it, return the html for that url
+        def display_page(pathname: str) -> Union[html.Div, dict]:
+            if pathname in urls_names_and_html:  # if we find a url matching the pathname, return the html for it
+                with default_registry.time('turbo_dash_layout_seconds', page=pathname):
+                    return self._page_layout(urls_names_and_html=urls_names_and_html, url=pathname)
 
             # if we didn't find anything, grab the 404 page if there is one, otherwise return an empty Div
             if urls_names_and_html.get(self._fourohfour_url):
-                return urls_names_and_html[self._fourohfour_url][self._html_dict_key]
+                with default_registry.time('turbo_dash_layout_seconds', page=self._fourohfour_url):
+                    return self._page_layout(urls_names_and_html=urls_names_and_html, url=self._fourohfour_url)
             else:
                 return html.Div(children='404 - Make sure your browser\'s url matches one of the page urls')
 
@@ -271,14 +407,14 @@ class turbo_dashboard(object):
     def _callbacks(
             self,
             app: dash.Dash,
-            urls_names_and_html: ODict[str, Dict[str, Union[str, str, html.Div]]],
+            urls_names_and_html: ODict[str, Dict[str, Union[str, str, turbo_dashboard_page]]],
     ) -> bool:
         """run the dash callbacks for the layouts and each page
 
         Args:
             app (dash.Dash): the dash.Dash app object
-            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and layouts we'll use
-                that create each page
+            urls_names_and_html (OrderedDict): an OrderedDict of urls, names, and pages we'll use
+                to create each layout
 
         Returns:
             bool: True if successful, raises errors otherwise
@@ -292,6 +428,29 @@ class turbo_dashboard(object):
 
         return True
 
+    def _metrics_route(
+            self,
+            app: dash.Dash,
+    ) -> bool:
+        """serve the metrics in the Prometheus text format on metrics_route
+
+        Serving them also turns on timing the serialization of figures that aren't cached, which dash would
+        otherwise do on its own, out of our sight.
+
+        Args:
+            app (dash.Dash): the dash.Dash app object
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+        """
+        default_registry.is_enabled = True
+
+        def metrics() -> flask.Response:
+            return flask.Response(default_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+        app.server.add_url_rule(self.metrics_route, endpoint='turbo_dash_metrics', view_func=metrics)
+        return True
+
     def _run_server(
             self,
             app: dash.Dash,
@@ -337,7 +496,7 @@ class turbo_dashboard(object):
 
         # 1. create the logo's html
         logo_html = html.A(
-            id='{} logo - {}'.format(self._homepage_url, generate_random_string()),
+            id='{} logo'.format(self._homepage_url),
             className=self._template_lookup_dict[self.template]['header_logo_className'],
             href='{}'.format(self._homepage_url),
             children=html.Img(
@@ -356,7 +515,7 @@ class turbo_dashboard(object):
             className=self._template_lookup_dict[self.template]['header_links_className'],
             children=[
                 dcc.Link(
-                    id='{} header-link - {}'.format(page_dict[self._url_dict_key], generate_random_string()),
+                    id='{} header-link'.format(page_dict[self._url_dict_key]),
                     href=page_dict[self._url_dict_key],
                     children=[
                         html.Div(
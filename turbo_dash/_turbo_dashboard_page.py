@@ -1,11 +1,26 @@
-from typing import List
+from typing import List, Dict, Any, Callable, Hashable, Optional, Tuple, Union
+import logging
+import os
+import threading
+import time
 import pandas as pd
 import dash
 import dash_html_components as html
 
 from ._turbo_filter import turbo_filter
 from ._turbo_output import turbo_output
-from ._lookups import _template_lookup
+from ._filter_engine import filter_engine, sql_filter_engine
+from ._filter_index import range_index, category_index, build_range_index, build_category_index
+from ._filter_options import extend_filter_options
+from ._cube import aggregate_cube
+from ._data_source import data_source as turbo_data_source
+from ._dtypes import compact_dataframe, memory_report, append_rows
+from ._lookups import _template_lookup, _column_chart_input_list
+from ._helpers import make_hashable
+from ._cache import lru_cache
+from ._metrics import default_registry
+
+_logger = logging.getLogger(__name__)
 
 
 class turbo_dashboard_page(object):
@@ -17,6 +32,11 @@ class turbo_dashboard_page(object):
     Methods:
         create_html: create the html for this page
         callback: create the callback for this page
+        filter_dataframe: filter this page's df based on the values of the menu filters
+        refresh_data: reload this page's data and swap it in without interrupting the callbacks using it
+        append_data: append rows to this page's data, only updating the parts of everything else they touch
+        df: this page's df, loaded from the data source the first time we need it
+        data_version: version of this page's data, bumped every time we refresh it
 
     """
 
@@ -31,6 +51,16 @@ class turbo_dashboard_page(object):
             output_list: List[turbo_output] = (),
             prebuilt_page: str = None,
             prebuilt_page_img_url: str = None,
+            use_range_index: bool = False,
+            cluster_column: str = None,
+            use_category_index: bool = False,
+            filter_cache_max_bytes: int = 128 * 1024 ** 2,
+            callback_mode: str = 'output',
+            precompute_bar_cubes: bool = False,
+            data_source: turbo_data_source = None,
+            prune_columns: bool = True,
+            compact_dtypes: bool = False,
+            refresh_interval: float = None,
     ):
         """Create a Plotly Dash page.
 
@@ -44,14 +74,116 @@ class turbo_dashboard_page(object):
                 options include ['homepage', '404']
             prebuilt_page_img_url (:obj: `str`, optional): default `None`, provides the source url for the image
                 we'll use on the prebuilt page
+            use_range_index (:obj: `bool`, optional): default `False`, build a sorted index for the column of every
+                RangeSlider and DatePickerRange menu filter, so those filters are answered with a binary search
+                instead of scanning the whole column
+            cluster_column (:obj: `str`, optional): default `None`, physically sort the df by this column when the
+                page is created. Range filters on this column become a contiguous slice of rows.
+            use_category_index (:obj: `bool`, optional): default `False`, factorize the column of every Checklist,
+                Dropdown, Dropdown-multi, Dropdown-search, and RadioItems menu filter into integer codes with a list of
+                rows per value, so those filters become unions of row lists instead of comparing every row
+            filter_cache_max_bytes (:obj: `int`, optional): default `128 * 1024 ** 2`, how many bytes of filtered
+                dataframes we'll keep around. Every output on the page shares this cache, so each combination of
+                menu filter values is only filtered once. Set it to 0 to turn the cache off.
+            callback_mode (:obj: `str`, optional): default `'output'`, how we register the dash callbacks.
+                Options include:
+                'output': one callback per output, each listening to every menu filter
+                'page': one callback for the whole page that filters once and updates every output in a single
+                    request. Outputs with a chart_input_list keep their own callback so their chart inputs
+                    only update that output.
+            precompute_bar_cubes (:obj: `bool`, optional): default `False`, for every bar output, precompute a
+                group-by cube summing y over x, color, and the menu filter columns. Callbacks for those outputs
+                filter and sum the (much smaller) cube instead of the raw rows.
+            data_source (:obj: `turbo_dash.data_source`, optional): default `None`, where to load this page's data
+                from, in place of df. Nothing is read until the page needs its data, i.e. the first time somebody
+                visits the page or one of its callbacks runs.
+            prune_columns (:obj: `bool`, optional): default `True`, when loading from a data_source, only read the
+                columns this page's filters and outputs use. If an output has a chart input that lets the user pick
+                a column (like 'x' or 'color'), we read every column.
+                Sources that support pushdown, like sql_data_source, are never loaded whole: every callback sends
+                the menu filters to the database as a WHERE clause and only reads the matching rows.
+            compact_dtypes (:obj: `bool`, optional): default `False`, store the page's df in smaller dtypes when we
+                prepare it: low-cardinality text columns become categoricals, integer columns are downcast, and the
+                columns of DatePickerRange and DatePickerSingle filters are parsed to datetime64. We log the memory
+                saved at INFO level and keep the details in memory_report.
+            refresh_interval (:obj: `float`, optional): default `None`, reload the data from the data_source every
+                refresh_interval seconds in a background thread, see refresh_data. Each process serving the app
+                starts its own thread the first time it uses the page's data. `None` never refreshes on its own.
         """
         self.url = url
         self.name = name
-        self.df = df
         self.menu_filter_list = menu_filter_list
         self.output_list = output_list
         self.prebuilt_page = prebuilt_page
         self.prebuilt_page_img_url = prebuilt_page_img_url
+        self.use_range_index = use_range_index
+        self.cluster_column = cluster_column
+        self.use_category_index = use_category_index
+        self.filter_cache_max_bytes = filter_cache_max_bytes
+        self.callback_mode = callback_mode
+        self.precompute_bar_cubes = precompute_bar_cubes
+        self.data_source = data_source
+        self.prune_columns = prune_columns
+        self.compact_dtypes = compact_dtypes
+        self.memory_report = None  # per column memory before and after compact_dtypes, once we prepare the data
+        self.refresh_interval = refresh_interval
+
+        if df is not None and self.data_source is not None:
+            raise ValueError(
+                """A page takes either a df or a data_source, not both. Check file ({}) for details.""".format(__file__)
+            )
+
+        self._is_pushdown = self.data_source is not None and self.data_source.supports_pushdown
+        if self._is_pushdown and self.precompute_bar_cubes:
+            raise ValueError(
+                """precompute_bar_cubes needs all the data in memory, which a data_source that supports pushdown never
+                loads. Check file ({}) for details.""".format(__file__)
+            )
+
+        if self.refresh_interval is not None and self.data_source is None:
+            raise ValueError(
+                """refresh_interval needs a data_source to reload the data from. Check file ({}) for details."""
+                .format(__file__)
+            )
+
+        if self.callback_mode not in ('output', 'page'):
+            raise ValueError(
+                """Unknown callback_mode string: {}. Check file ({}) for details.""".format(self.callback_mode, __file__)
+            )
+
+        # give every filter and output an id based on this page's url and its position on the page,
+        # so the ids are the same in every process serving the app
+        for index, menu_filter in enumerate(self.menu_filter_list):
+            menu_filter.set_component_id(scope=self.url, position=index)
+        for index, output in enumerate(self.output_list):
+            output.set_component_id(scope=self.url, position=index)
+
+        self._filtered_df_cache = lru_cache(max_bytes=self.filter_cache_max_bytes)
+
+        # prepare the data now if we have it, otherwise wait until somebody needs it
+        # every version of the data lives in a single _page_data, so swapping versions is a single assignment
+        self._data_lock = threading.Lock()  # held while we load or refresh the data, so we only do one at a time
+        self._page_data = self._prepare_data(df=df, data_version=0) if self.data_source is None \
+            else _page_data(data_version=0)
+        self._refresh_thread_pid = None  # the process we started the refresh thread in
+
+        # the database filters the data for us, so we compile the menu filters into a WHERE clause instead
+        self.sql_filter_engine = sql_filter_engine(menu_filter_list=self.menu_filter_list) if self._is_pushdown else None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """this page's df, loaded from the data source the first time we need it"""
+        return self._loaded_page_data().df
+
+    @property
+    def menu_filter_engine(self) -> filter_engine:
+        """the menu filters compiled for this page's df"""
+        return self._loaded_page_data().menu_filter_engine
+
+    @property
+    def data_version(self) -> int:
+        """version of this page's data, caches key on it so they don't hand out results for stale data"""
+        return self._page_data.data_version
 
     def create_html(
             self,
@@ -87,7 +219,7 @@ class turbo_dashboard_page(object):
             children=[
                 menu_filter.create_html(
                     template=template,
-                    df=self.df,
+                    df=self._filter_df(tf=menu_filter),
                     location='menu',
                     template_lookup_dict=self._template_lookup_dict,
                 ) for menu_filter in self.menu_filter_list
@@ -100,7 +232,7 @@ class turbo_dashboard_page(object):
             children=[
                 output.create_html(
                     template=template,
-                    df=self.df,
+                    df=self._column_df(),
                     location='content',
                     template_lookup_dict=self._template_lookup_dict,
                 ) for output in self.output_list
@@ -129,17 +261,561 @@ class turbo_dashboard_page(object):
         Returns:
             bool: True if successful, raises errors otherwise
         """
+        # some menu filters need callbacks of their own, like searching a Dropdown-search's options
+        for menu_filter in self.menu_filter_list:
+            menu_filter.callback(app=app, df_function=lambda tf=menu_filter: self._filter_df(tf=tf))
+
+        # in page mode, every output without chart inputs gets updated by a single callback
+        page_output_list = [output for output in self.output_list if not output.chart_input_list] \
+            if self.callback_mode == 'page' else []
+        if page_output_list:
+            self._page_callback(app=app, template=template, page_output_list=page_output_list)
+
         for output in self.output_list:
+            if output in page_output_list:
+                continue
+
             output.callback(
                 app=app,
-                df=self.df,
                 menu_filter_list=self.menu_filter_list,
                 template=template,
+                snapshot_function=lambda output=output: self._output_snapshot(output=output),
             )
 
         return True
 
+    def filter_dataframe(
+            self,
+            filter_value_list: Tuple[Any, ...],
+            page_data: '_page_data' = None,
+    ) -> pd.DataFrame:
+        """filter this page's df based on the values of the menu filters
+
+        The result is cached, so every output on this page reuses the same filtered df for the same filter values.
+
+        Args:
+            filter_value_list (Tuple[Any, ...]): list of values from the dash inputs of the menu filters
+            page_data (:obj: `_page_data`, optional): default `None`, the version of the data we want to filter,
+                `None` grabs the current one
+
+        Returns:
+            pandas.DataFrame
+        """
+        # grab the df and its filter engine together, a refresh can swap in a new version at any time
+        if page_data is None:
+            page_data = self._page_data_snapshot()
+
+        if self._is_pushdown:
+            return self._filtered_df_cache.get_or_compute(
+                key=(page_data.data_version, make_hashable(filter_value_list)),
+                compute_function=lambda: self._count_rows(filtered_df=self.sql_filter_engine.filter_dataframe(
+                    data_source=self.data_source,
+                    filter_value_list=filter_value_list,
+                    columns=self._referenced_column_list(),
+                )),
+                size_function=self._filtered_df_size,
+            )
+
+        return self._filtered_df_cache.get_or_compute(
+            key=(page_data.data_version, make_hashable(filter_value_list)),
+            compute_function=lambda: self._count_rows(
+                filtered_df=page_data.menu_filter_engine.filter_dataframe(
+                    df=page_data.df,
+                    filter_value_list=filter_value_list,
+                ),
+                df=page_data.df,
+            ),
+            size_function=self._filtered_df_size,
+        )
+
+    def refresh_data(
+            self,
+            df: pd.DataFrame = None,
+            background: bool = False,
+    ) -> Union[bool, threading.Thread]:
+        """reload this page's data and swap it in without interrupting the callbacks using it
+
+        1. grab the new data: the df we're given, otherwise a fresh read of the data_source
+        2. rebuild everything that depends on it off to the side (dtypes, sorting, indexes, aggregate cubes)
+        3. swap the new version in with a single assignment. Callbacks that already grabbed the old version
+            finish with it (its df, indexes, and aggregate cubes), and every callback after that uses the new one.
+        4. clear the filtered dfs, the figure and layout caches are keyed by data_version so they rebuild on their own
+
+        Pages using a data_source that supports pushdown don't keep any data, so we just clear the data_source's
+        caches and bump the data_version.
+
+        Args:
+            df (:obj: `pandas.DataFrame`, optional): default `None`, the new data. `None` reloads the data_source.
+            background (:obj: `bool`, optional): default `False`, refresh in a background thread and return
+                right away
+
+        Returns:
+            bool: True if successful, raises errors otherwise. If background is True, the thread doing the refresh.
+
+        Raises:
+            ValueError if we don't have a df or a data_source to reload
+        """
+        if df is None and self.data_source is None:
+            raise ValueError(
+                """refresh_data needs a df or a data_source to reload. Check file ({}) for details.""".format(__file__)
+            )
+        if df is not None and self._is_pushdown:
+            raise ValueError(
+                """A page using a data_source that supports pushdown can't take a df. Check file ({}) for details."""
+                .format(__file__)
+            )
+
+        if background:
+            thread = threading.Thread(
+                target=self.refresh_data,
+                kwargs={'df': df},
+                name='turbo_dash-refresh-{}'.format(self.url),
+                daemon=True,
+            )
+            thread.start()
+            return thread
+
+        with self._data_lock:
+            data_version = self._page_data.data_version + 1
+
+            # 1
+            if df is None:
+                self.data_source.clear()
+                if not self._is_pushdown:
+                    df = self.data_source.load(columns=self._referenced_column_list())
+
+            # 2
+            page_data = self._prepare_data(df=df, data_version=data_version) if not self._is_pushdown \
+                else _page_data(data_version=data_version)
+
+            # 3
+            self._page_data = page_data
+
+        # 4
+        self._filtered_df_cache.clear()
+
+        _logger.info('refreshed the data for page %s to version %d', self.url, data_version)
+        return True
+
+    def append_data(
+            self,
+            df: pd.DataFrame,
+    ) -> bool:
+        """append rows to this page's data, only updating the parts of everything else they touch
+
+        1. put the new rows in the same columns and dtypes (and the same order, if we're clustering) as the page's df
+        2. merge the new rows into the indexes instead of sorting every row again, and do the same for the
+            filter options, slider settings, and aggregate cubes
+        3. swap the new version in and clear the filtered dfs, just like refresh_data
+
+        If we're clustering the data and the new rows don't come after the old ones in the cluster column, the df
+        isn't sorted anymore, so we rebuild everything from the combined rows instead.
+
+        The rows only live in memory, so refreshing from the data_source drops them unless it has them too.
+
+        Args:
+            df (pandas.DataFrame): the new rows, with (at least) the columns of the page's df
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+
+        Raises:
+            ValueError if the page's data_source supports pushdown (add the rows to the database and refresh instead)
+                or df is missing some of the page's columns
+        """
+        if self._is_pushdown:
+            raise ValueError(
+                """A page using a data_source that supports pushdown doesn't keep any data to append to, add the rows
+                to the database and use refresh_data instead. Check file ({}) for details.""".format(__file__)
+            )
+
+        self._loaded_page_data()  # load the data first if we haven't yet, so we have something to append to
+
+        with self._data_lock:
+            page_data = self._page_data
+            missing_column_list = [column for column in page_data.df.columns if column not in df.columns]
+            if missing_column_list:
+                raise ValueError(
+                    """The appended rows are missing columns {}. Check file ({}) for details."""
+                    .format(missing_column_list, __file__)
+                )
+
+            # 1
+            appended_df = df[page_data.df.columns]
+            if self.compact_dtypes:
+                appended_df = compact_dataframe(df=appended_df, date_column_list=self._date_column_list())
+            if self.cluster_column is not None:
+                appended_df = appended_df.sort_values(by=self.cluster_column, kind='stable')
+            extended_df = append_rows(df=page_data.df, appended_df=appended_df)
+
+            # 2
+            range_index_dict = {}
+            for column, index in page_data.menu_filter_engine.range_index_dict.items():
+                try:
+                    range_index_dict[column] = index.append(values=appended_df[column].to_numpy())
+                except TypeError:  # the new values can't be sorted with the old ones, filters use a mask instead
+                    continue
+
+            if any(index is None for index in range_index_dict.values()):  # the rows aren't clustered anymore
+                extended_page_data = self._prepare_data(df=extended_df, data_version=page_data.data_version + 1)
+            else:
+                extended_page_data = _page_data(
+                    data_version=page_data.data_version + 1,
+                    df=extended_df,
+                    menu_filter_engine=filter_engine(
+                        menu_filter_list=self.menu_filter_list,
+                        range_index_dict=range_index_dict,
+                        category_index_dict={
+                            column: index.append(values=appended_df[column].to_numpy())
+                            for column, index in page_data.menu_filter_engine.category_index_dict.items()
+                        },
+                    ),
+                    is_loaded=True,
+                    aggregate_cube_dict={
+                        output: cube.append(df=appended_df) for output, cube in page_data.aggregate_cube_dict.items()
+                    },
+                )
+                extend_filter_options(df=page_data.df, appended_df=appended_df, extended_df=extended_df)
+
+            # 3
+            self._page_data = extended_page_data
+
+        self._filtered_df_cache.clear()
+
+        _logger.info(
+            'appended %d rows to the data for page %s, version %d',
+            len(appended_df),
+            self.url,
+            extended_page_data.data_version,
+        )
+        return True
+
     """protected methods"""
+    def _prepare_data(
+            self,
+            df: pd.DataFrame,
+            data_version: int,
+    ) -> '_page_data':
+        """build a version of the page's data and everything that depends on it
+
+        1. store the data in smaller dtypes, if we want to
+        2. if we're clustering the data, sort it once up front so range filters on that column become slices
+        3. compile the menu filters once so every output on this page can share them
+        4. precompute the aggregate cubes for bar outputs, if we want them
+
+        Args:
+            df (pandas.DataFrame): the page's df
+            data_version (int): the version of this data
+
+        Returns:
+            _page_data
+        """
+        # 1
+        if df is not None and self.compact_dtypes:
+            compact_df = compact_dataframe(df=df, date_column_list=self._date_column_list())
+            self.memory_report = memory_report(before_df=df, after_df=compact_df)
+            _logger.info(
+                'compacted the df for page %s from %d to %d bytes\n%s',
+                self.url,
+                self.memory_report.loc['total', 'before_bytes'],
+                self.memory_report.loc['total', 'after_bytes'],
+                self.memory_report.to_string(),
+            )
+            df = compact_df
+
+        # 2
+        if df is not None and self.cluster_column is not None:
+            df = df.sort_values(by=self.cluster_column, kind='stable')
+
+        # 3
+        menu_filter_engine = filter_engine(
+            menu_filter_list=self.menu_filter_list,
+            range_index_dict=self._range_index_dict(df=df),
+            category_index_dict=self._category_index_dict(df=df),
+        )
+
+        # 4
+        aggregate_cube_dict = {}
+        if self.precompute_bar_cubes:
+            for output in self.output_list:
+                cube = output.build_aggregate_cube(df=df, menu_filter_list=self.menu_filter_list)
+                if cube is not None:
+                    aggregate_cube_dict[output] = cube
+
+        return _page_data(
+            data_version=data_version,
+            df=df,
+            menu_filter_engine=menu_filter_engine,
+            is_loaded=True,
+            aggregate_cube_dict=aggregate_cube_dict,
+        )
+
+    def _date_column_list(self) -> List[str]:
+        """grab the columns of our date filters, compact_dtypes parses them to datetime64"""
+        return [
+            tf.column for tf in self.menu_filter_list if tf.filter_type in ('DatePickerRange', 'DatePickerSingle')
+        ]
+
+    def _loaded_page_data(self) -> '_page_data':
+        """grab the current version of the page's data, loading it from the data source if we haven't yet"""
+        self._start_refresh_thread()
+
+        page_data = self._page_data
+        if page_data.is_loaded:
+            return page_data
+
+        with self._data_lock:
+            if not self._page_data.is_loaded:  # somebody else might have loaded it while we were waiting
+                self._page_data = self._prepare_data(
+                    df=self.data_source.load(columns=self._referenced_column_list()),
+                    data_version=self._page_data.data_version,
+                )
+            return self._page_data
+
+    def _page_data_snapshot(self) -> '_page_data':
+        """grab the current version of the page's data, pages using pushdown only have a data_version"""
+        if self._is_pushdown:
+            self._start_refresh_thread()
+            return self._page_data
+
+        return self._loaded_page_data()
+
+    def _output_snapshot(
+            self,
+            output: turbo_output,
+    ) -> Tuple[Callable[[Tuple[Any, ...]], pd.DataFrame], Hashable, Optional[aggregate_cube]]:
+        """grab one version of the page's data for an output's callback
+
+        Args:
+            output (turbo_output): the output we're creating the figure for
+
+        Returns:
+            Tuple: the function that filters that version, its data_version, and the output's aggregate cube
+        """
+        page_data = self._page_data_snapshot()
+        return (
+            lambda filter_value_list: self.filter_dataframe(filter_value_list=filter_value_list, page_data=page_data),
+            page_data.data_version,
+            page_data.aggregate_cube_dict.get(output),
+        )
+
+    def _start_refresh_thread(self) -> bool:
+        """start the thread that refreshes the data every refresh_interval seconds, once per process
+
+        Threads don't survive a fork, so we can't start it when the page is created (e.g. with gunicorn --preload,
+        the page is created before the workers are forked). Instead, each process starts its own the first time
+        it uses the page's data.
+
+        Returns:
+            bool: True if we started the thread
+        """
+        if self.refresh_interval is None or self._refresh_thread_pid == os.getpid():
+            return False
+
+        with self._data_lock:
+            if self._refresh_thread_pid == os.getpid():
+                return False
+            self._refresh_thread_pid = os.getpid()
+
+        def refresh_periodically():
+            while True:
+                time.sleep(self.refresh_interval)
+                try:
+                    self.refresh_data()
+                except Exception:  # keep serving the data we have and try again next time
+                    _logger.exception('refreshing the data for page %s failed', self.url)
+
+        threading.Thread(
+            target=refresh_periodically,
+            name='turbo_dash-refresh-every-{}'.format(self.url),
+            daemon=True,
+        ).start()
+        return True
+
+    def _referenced_column_list(self) -> List[str]:
+        """grab the columns this page's filters and outputs use, so we only load those from the data source
+
+        Returns:
+            List[str]: column names, or None if we need every column
+        """
+        if not self.prune_columns:
+            return None
+
+        ret = [self.cluster_column]
+        for tf in self.menu_filter_list:
+            ret.extend([tf.column, tf.label_column])
+
+        for output in self.output_list:
+            if any(chart_input in _column_chart_input_list for chart_input in output.chart_input_list):
+                return None  # the user can pick any column for this output
+
+            for chart_input in _column_chart_input_list:
+                value = output._chart_input_string_default_value_dict[chart_input]
+                ret.extend(value if isinstance(value, (list, tuple)) else [value])
+
+        # de-duplicate the columns, but keep them in order
+        return list(dict.fromkeys(column for column in ret if isinstance(column, str)))
+
+    def _filter_df(
+            self,
+            tf: turbo_filter,
+    ) -> pd.DataFrame:
+        """grab the df a menu filter builds its options from
+
+        That's the page's df, unless the data stays in the database. Then we only grab what the filter needs:
+        the min and max for date pickers, and the distinct values and labels for everything else.
+        """
+        if not self._is_pushdown:
+            return self.df
+
+        if tf.filter_type in ('DatePickerRange', 'DatePickerSingle'):
+            return self.data_source.bounds(column=tf.column)
+        return self.data_source.distinct(columns=[tf.column, tf.label_column])
+
+    def _column_df(self) -> pd.DataFrame:
+        """grab a df with this page's columns for the outputs' chart input filters, without rows if we can"""
+        if not self._is_pushdown:
+            return self.df
+
+        return pd.DataFrame(columns=self.data_source.column_list())
+
+    def _page_callback(
+            self,
+            app: dash.Dash,
+            template: str,
+            page_output_list: List[turbo_output],
+    ) -> bool:
+        """run a single callback that filters the df once and updates every output in page_output_list
+
+        Args:
+            app (dash.Dash): the dash.Dash app object
+            template (str): layout template we want to use
+            page_output_list (List[turbo_output]): the outputs this callback updates, none of them can have
+                chart inputs since dash only lets one callback update an output
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+        """
+        @app.callback(
+            output=[output.dash_dependencies_output for output in page_output_list],
+            inputs=[
+                dash_dependencies_input
+                for tf in self.menu_filter_list
+                for dash_dependencies_input in tf.dash_dependencies_input_list
+            ],
+        )
+        def page_callback_function(*filter_value_list: Any):
+            """filter the df once and create the chart object for every output"""
+            page_data = self._page_data_snapshot()  # every output gets the same version of the data
+            filtered_df_list = []  # filter lazily, if every figure comes from a figure cache we don't filter at all
+
+            def filter_once(value_list: Tuple[Any, ...]) -> pd.DataFrame:
+                if not filtered_df_list:
+                    filtered_df_list.append(self.filter_dataframe(filter_value_list=value_list, page_data=page_data))
+                return filtered_df_list[0]
+
+            return [
+                output.create_figure(
+                    filter_value_list=filter_value_list,
+                    chart_input_values_list=(),
+                    filter_function=filter_once,
+                    template=template,
+                    data_version=page_data.data_version,
+                    cube=page_data.aggregate_cube_dict.get(output),
+                ) for output in page_output_list
+            ]
+
+        return True
+
+    def _count_rows(
+            self,
+            filtered_df: pd.DataFrame,
+            df: pd.DataFrame = None,
+    ) -> pd.DataFrame:
+        """add the rows before and after filtering to the metrics, and pass the filtered df right through
+
+        Args:
+            filtered_df (pandas.DataFrame): the filtered df
+            df (:obj: `pandas.DataFrame`, optional): default `None`, the df we filtered, `None` if the database
+                filtered it for us and we never saw the rows we didn't keep
+
+        Returns:
+            pandas.DataFrame: filtered_df
+        """
+        if df is not None:
+            default_registry.observe('turbo_dash_filter_rows', len(df), page=self.url, stage='before')
+        default_registry.observe('turbo_dash_filter_rows', len(filtered_df), page=self.url, stage='after')
+
+        return filtered_df
+
+    def _filtered_df_size(
+            self,
+            filtered_df: pd.DataFrame,
+    ) -> int:
+        """how many bytes a filtered df adds to the cache
+
+        A filtered df shares the python objects in its object columns with the page's df, so we only count the
+        shallow size. And if nothing was filtered, we get the page's df right back, which costs us nothing.
+        """
+        if filtered_df is self._page_data.df:
+            return 0
+        return int(filtered_df.memory_usage(index=True, deep=False).sum())
+
+    def _range_index_dict(
+            self,
+            df: pd.DataFrame,
+    ) -> Dict[str, range_index]:
+        """build the sorted indexes for the columns of our range filters
+
+        Args:
+            df (pandas.DataFrame): the page's df
+
+        Returns:
+            Dict[str, range_index]: indexes by column name, columns we can't sort are left out
+        """
+        ret = {}
+        if df is None:
+            return ret
+
+        for tf in self.menu_filter_list:
+            is_clustered = tf.column == self.cluster_column
+            if tf.filter_range_bounds_function is None or tf.column in ret:
+                continue
+            if not (self.use_range_index or is_clustered):
+                continue
+
+            index = build_range_index(df=df, column=tf.column, is_clustered=is_clustered)
+            if index is not None:
+                ret[tf.column] = index
+
+        return ret
+
+    def _category_index_dict(
+            self,
+            df: pd.DataFrame,
+    ) -> Dict[str, category_index]:
+        """build the categorical code indexes for the columns of our equality and isin filters
+
+        Args:
+            df (pandas.DataFrame): the page's df
+
+        Returns:
+            Dict[str, category_index]: indexes by column name, columns we can't factorize are left out
+        """
+        ret = {}
+        if df is None or not self.use_category_index:
+            return ret
+
+        for tf in self.menu_filter_list:
+            if tf.filter_category_values_function is None or tf.column in ret:
+                continue
+
+            index = build_category_index(df=df, column=tf.column)
+            if index is not None:
+                ret[tf.column] = index
+
+        return ret
+
     def _prebuilt_page_html(
             self,
             template: str,
@@ -172,3 +848,32 @@ class turbo_dashboard_page(object):
             raise ValueError(
                 """Unknown prebuilt_page string: {}. Check file ({}) for details.""".format(prebuilt_page, __file__)
             )
+
+
+class _page_data(object):
+    """one version of a page's data and everything built from it, swapped in and out as a whole"""
+
+    def __init__(
+            self,
+            data_version: int,
+            df: pd.DataFrame = None,
+            menu_filter_engine: filter_engine = None,
+            is_loaded: bool = False,
+            aggregate_cube_dict: Dict[turbo_output, aggregate_cube] = None,
+    ):
+        """
+
+        Args:
+            data_version (int): the version of this data
+            df (:obj: `pandas.DataFrame`, optional): default `None`, the page's df
+            menu_filter_engine (:obj: `filter_engine`, optional): default `None`, the menu filters compiled for df
+            is_loaded (:obj: `bool`, optional): default `False`, whether we have the data, or still need to load it
+                from the page's data_source
+            aggregate_cube_dict (:obj: `dict`, optional): default `None`, the aggregate cubes built from df, by the
+                output they belong to
+        """
+        self.data_version = data_version
+        self.df = df
+        self.menu_filter_engine = menu_filter_engine
+        self.is_loaded = is_loaded
+        self.aggregate_cube_dict = aggregate_cube_dict if aggregate_cube_dict is not None else {}
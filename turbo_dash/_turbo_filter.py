@@ -1,12 +1,14 @@
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, List, Union, Callable
 import pandas as pd
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 
-from ._helpers import generate_random_string
+from ._helpers import generate_component_id_suffix
+from ._filter_options import get_filter_options, get_slider_settings, get_search_index
 from ._lookups import (
-    _filter_type_lookup, _chart_input_to_filter_type_lookup, _list_of_chart_strings, _arg_options_lookup_dict
+    _filter_type_lookup, _chart_input_to_filter_type_lookup, _list_of_chart_strings, _arg_options_lookup_dict,
+    _column_chart_input_list,
 )
 
 
@@ -15,11 +17,14 @@ class turbo_filter(object):
 
     Methods:
         create_html: create the html for this filter
+        callback: create the callbacks this filter needs for itself, e.g. searching a Dropdown-search's options
+        set_component_id: set the dash component id for this filter
     """
 
     _filter_type_lookup_dict = _filter_type_lookup
     _chart_input_to_filter_type_lookup_dict = _chart_input_to_filter_type_lookup
     _list_of_chart_strings_lookup = _list_of_chart_strings
+    _column_chart_input_list = _column_chart_input_list
     _list_of_projection_options = _arg_options_lookup_dict['projection']
     _list_of_locationmode_options = _arg_options_lookup_dict['locationmode']
 
@@ -30,6 +35,8 @@ class turbo_filter(object):
             column: str = None,
             label_column: str = None,
             default_value: Any = None,
+            max_marks: int = 50,
+            max_search_results: int = 50,
     ):
         """
 
@@ -45,6 +52,12 @@ class turbo_filter(object):
             label_column (:obj: `str`, optional): string representing the column of the dataframe
                 used for the labels of this filter
             default_value (:obj: `Any`, optional): default value for this filter
+            max_marks (:obj: `int`, optional): default `50`, for Slider and RangeSlider filters, the most marks we'll
+                put on the slider. Columns with more distinct values get evenly spaced marks and a step computed
+                from the column, instead of a mark for every value.
+            max_search_results (:obj: `int`, optional): default `50`, for Dropdown-search filters, the most options
+                we'll send back for what the user typed. Dropdown-search filters don't send any options with the
+                layout, they search the column's options on the server instead.
         """
         # if we provided a chart_input_filter_type, that overrides the filter type
         self.filter_type = filter_type if chart_input_filter_type is None else \
@@ -53,21 +66,24 @@ class turbo_filter(object):
         self.column = column
         self.label_column = label_column if label_column is not None else self.column
         self.default_value = default_value
+        self.max_marks = max_marks
+        self.max_search_results = max_search_results
         self.label_string = self.label_column if self.chart_input_filter_type is None else self.chart_input_filter_type
 
         # grab some important data
-        self.component_id = '{}-{} - {}'.format(self.filter_type, self.column, generate_random_string())
         self.persistence = True  # todo: do we want to allow different values for persistence and persistence_type?
         self.persistence_type = 'memory'
 
         self._filter_input_property_list = self._filter_type_lookup_dict[self.filter_type]['input_property_list']
-        self.filter_input_lambda_function_list = self._filter_type_lookup_dict[self.filter_type]['lambda_function_list']
+        self.filter_input_mask_function_list = self._filter_type_lookup_dict[self.filter_type]['mask_function_list']
+        self.filter_sql_clause_function_list = \
+            self._filter_type_lookup_dict[self.filter_type]['sql_clause_function_list']
+        self.filter_range_bounds_function = self._filter_type_lookup_dict[self.filter_type].get('range_bounds_function')
+        self.filter_category_values_function = \
+            self._filter_type_lookup_dict[self.filter_type].get('category_values_function')
 
-        # assemble the dash dependencies input list, this is an important part
-        self.dash_dependencies_input_list = [  # comprehend the list of dash.dependencies.Input
-            dash.dependencies.Input(component_id=self.component_id, component_property=input_property)
-            for input_property in self._filter_input_property_list
-        ]
+        # set the component id and the dash dependencies input list, the page sets them again with its url
+        self.set_component_id()
 
     def create_html(
             self,
@@ -116,6 +132,77 @@ class turbo_filter(object):
                 filter_class_name=filter_class_name,
             )
 
+    def callback(
+            self,
+            app: dash.Dash,
+            df_function: Callable[[], pd.DataFrame],
+    ) -> bool:
+        """create the callbacks this filter needs for itself, only Dropdown-search filters have one
+
+        As the user types, the Dropdown-search filter sends its search_value to the server and we answer with the
+        options that match it, plus the options that are already selected so they stay visible.
+
+        Args:
+            app (dash.Dash): the dash.Dash app object
+            df_function (Callable[[], pandas.DataFrame]): function that returns the dataframe for this filter, so
+                we don't need the data until somebody searches
+
+        Returns:
+            bool: True if successful, raises errors otherwise
+        """
+        if self.filter_type != 'Dropdown-search':
+            return True
+
+        @app.callback(
+            dash.dependencies.Output(component_id=self.component_id, component_property='options'),
+            [dash.dependencies.Input(component_id=self.component_id, component_property='search_value')],
+            [dash.dependencies.State(component_id=self.component_id, component_property='value')],
+        )
+        def search_options(search_value: str, value: List[Any]) -> List[Dict[str, Any]]:
+            filter_search_index = get_search_index(df=df_function(), column=self.column, label_column=self.label_column)
+            selected_options = filter_search_index.options_for_values(value_list=value)
+            selected_value_set = {option['value'] for option in selected_options}
+
+            return selected_options + [
+                option for option in filter_search_index.search(search_value=search_value, limit=self.max_search_results)
+                if option['value'] not in selected_value_set
+            ]
+
+        return True
+
+    def set_component_id(
+            self,
+            scope: str = None,
+            position: int = None,
+    ) -> str:
+        """set the dash component id for this filter and assemble the dash dependencies input list
+
+        The id only depends on where the filter lives and how it's configured, so every process serving the app
+        (e.g. each gunicorn worker) creates the same ids and the callback map matches the layout.
+
+        Args:
+            scope (:obj: `str`, optional): default `None`, where this filter lives, e.g. the url of its page
+            position (:obj: `int`, optional): default `None`, the position of this filter within its scope
+
+        Returns:
+            str: the component id
+        """
+        self.component_id = '{}-{} - {}'.format(
+            self.filter_type,
+            self.column,
+            generate_component_id_suffix(
+                scope, position, self.filter_type, self.chart_input_filter_type, self.column, self.label_column,
+            ),
+        )
+
+        # assemble the dash dependencies input list, this is an important part
+        self.dash_dependencies_input_list = [  # comprehend the list of dash.dependencies.Input
+            dash.dependencies.Input(component_id=self.component_id, component_property=input_property)
+            for input_property in self._filter_input_property_list
+        ]
+
+        return self.component_id
+
     """protected methods"""
     def _assemble_html_for_filter(
             self,
@@ -137,13 +224,8 @@ class turbo_filter(object):
         """
         if self.filter_type == 'Checklist':
             # if it's a Checklist, we'll create a list of dicts that look like {'label': label, 'value': value}
-            filter_options = [
-                # groupby objects are cool, they create a list of grouped values and their dfs
-                # since we're grouping by both label and value, we get a tuple returned with the df
-                # note that we don't use the df
-                {'label': label_value_tuple[0], 'value': label_value_tuple[1]}
-                for label_value_tuple, label_value_df in df.groupby([self.label_column, self.column])
-            ]
+            # these are computed once per df, column, and label_column, even if other filters or pages share them
+            filter_options = get_filter_options(df=df, column=self.column, label_column=self.label_column)
 
             # for a Checklist, we need to change the default value to an empty list if it's None
             if self.default_value is None:
@@ -182,13 +264,8 @@ class turbo_filter(object):
 
         if self.filter_type == 'Dropdown':
             # if it's a Dropdown, we'll create a list of dicts that look like {'label': label, 'value': value}
-            filter_options = [
-                # groupby objects are cool, they create a list of grouped values and their dfs
-                # since we're grouping by both label and value, we get a tuple returned with the df
-                # note that we don't use the df
-                {'label': label_value_tuple[0], 'value': label_value_tuple[1]}
-                for label_value_tuple, label_value_df in df.groupby([self.label_column, self.column])
-            ]
+            # these are computed once per df, column, and label_column, even if other filters or pages share them
+            filter_options = get_filter_options(df=df, column=self.column, label_column=self.label_column)
 
             return self._assemble_dropdown_html(
                 filter_options=filter_options,
@@ -199,13 +276,8 @@ class turbo_filter(object):
 
         if self.filter_type == 'Dropdown-multi':
             # if it's a Dropdown, we'll create a list of dicts that look like {'label': label, 'value': value}
-            filter_options = [
-                # groupby objects are cool, they create a list of grouped values and their dfs
-                # since we're grouping by both label and value, we get a tuple returned with the df
-                # note that we don't use the df
-                {'label': label_value_tuple[0], 'value': label_value_tuple[1]}
-                for label_value_tuple, label_value_df in df.groupby([self.label_column, self.column])
-            ]
+            # these are computed once per df, column, and label_column, even if other filters or pages share them
+            filter_options = get_filter_options(df=df, column=self.column, label_column=self.label_column)
 
             return self._assemble_dropdown_multi_html(
                 filter_options=filter_options,
@@ -214,15 +286,25 @@ class turbo_filter(object):
                 filter_class_name=filter_class_name,
             )
 
+        if self.filter_type == 'Dropdown-search':
+            # if it's a Dropdown-search, we only send the options for the default values, the rest come from search
+            filter_options = get_search_index(
+                df=df,
+                column=self.column,
+                label_column=self.label_column,
+            ).options_for_values(value_list=self.default_value) if self.default_value else []
+
+            return self._assemble_dropdown_search_html(
+                filter_options=filter_options,
+                wrapper_class_name=wrapper_class_name,
+                label_class_name=label_class_name,
+                filter_class_name=filter_class_name,
+            )
+
         if self.filter_type == 'RadioItems':
             # if it's a RadioItem, we'll create a list of dicts that look like {'label': label, 'value': value}
-            filter_options = [
-                # groupby objects are cool, they create a list of grouped values and their dfs
-                # since we're grouping by both label and value, we get a tuple returned with the df
-                # note that we don't use the df
-                {'label': label_value_tuple[0], 'value': label_value_tuple[1]}
-                for label_value_tuple, label_value_df in df.groupby([self.label_column, self.column])
-            ]
+            # these are computed once per df, column, and label_column, even if other filters or pages share them
+            filter_options = get_filter_options(df=df, column=self.column, label_column=self.label_column)
 
             return self._assemble_radioitems_html(
                 filter_options=filter_options,
@@ -232,32 +314,29 @@ class turbo_filter(object):
             )
 
         if self.filter_type == 'RangeSlider':
-            values = sorted(df[self.column].unique())  # grab the values in order
-            minimum = min(values)
-            maximum = max(values)
-            # todo: support different columns for labels and values
-            marks = {str(val): {'label': str(val), 'style': {'transform': 'rotate(45deg)'}} for val in values}
+            # columns with lots of distinct values only get max_marks marks, the step lets us pick the rest
+            slider_settings = get_slider_settings(df=df, column=self.column, max_marks=self.max_marks)
 
             return self._assemble_rangeslider_html(
-                minimum=minimum,
-                maximum=maximum,
-                marks=marks,
+                minimum=slider_settings['minimum'],
+                maximum=slider_settings['maximum'],
+                marks=slider_settings['marks'],
+                step=slider_settings['step'],
                 wrapper_class_name=wrapper_class_name,
                 label_class_name=label_class_name,
                 filter_class_name=filter_class_name,
             )
 
         if self.filter_type == 'Slider':
-            values = sorted(df[self.column].unique())  # grab the values in order
-            minimum = min(values)
-            maximum = max(values)
-            # todo: support different columns for labels and values
-            marks = {str(val): {'label': str(val), 'style': {'transform': 'rotate(45deg)'}} for val in values}
+            # columns with lots of distinct values only get max_marks marks. A Slider filters on equality, so it
+            # snaps to the marks (step=None) instead of stepping onto values that aren't in the column
+            slider_settings = get_slider_settings(df=df, column=self.column, max_marks=self.max_marks)
 
             return self._assemble_slider_html(
-                minimum=minimum,
-                maximum=maximum,
-                marks=marks,
+                minimum=slider_settings['minimum'],
+                maximum=slider_settings['maximum'],
+                marks=slider_settings['marks'],
+                step=None,
                 wrapper_class_name=wrapper_class_name,
                 label_class_name=label_class_name,
                 filter_class_name=filter_class_name,
@@ -288,7 +367,7 @@ class turbo_filter(object):
         Returns:
             html.Div
         """
-        if self.chart_input_filter_type in ('x', 'y', 'z', 'color', 'size', 'hover_name', 'hover_data', 'locations'):
+        if self.chart_input_filter_type in self._column_chart_input_list:
             # for these chart_input_filter_types we want a list of columns as the filter options
             filter_options = [{'label': col, 'value': col} for col in df.columns.values]
 
@@ -488,6 +567,33 @@ class turbo_filter(object):
             ],
         )
 
+    def _assemble_dropdown_search_html(
+            self,
+            filter_options: List[Dict[str, str]] = None,
+            wrapper_class_name: str = None,
+            label_class_name: str = None,
+            filter_class_name: str = None,
+    ):
+        return html.Div(
+            className=wrapper_class_name,
+            children=[
+                html.Div(
+                    className=label_class_name,
+                    children=self.label_string,
+                ),
+                dcc.Dropdown(
+                    id=self.component_id,
+                    className=filter_class_name,
+                    multi=True,
+                    options=filter_options,
+                    value=self.default_value,
+                    placeholder='Type to search...',
+                    persistence=self.persistence,
+                    persistence_type=self.persistence_type,
+                ),
+            ],
+        )
+
     def _assemble_radioitems_html(
             self,
             filter_options: List[Dict[str, str]] = None,
@@ -518,6 +624,7 @@ class turbo_filter(object):
             minimum: Any = None,
             maximum: Any = None,
             marks: dict = None,
+            step: Any = None,
             wrapper_class_name: str = None,
             label_class_name: str = None,
             filter_class_name: str = None,
@@ -536,7 +643,7 @@ class turbo_filter(object):
                     max=maximum,
                     value=self.default_value if self.default_value is not None else [minimum, maximum],
                     marks=marks,
-                    step=None,
+                    step=step,
                     persistence=self.persistence,
                     persistence_type=self.persistence_type,
                 ),
@@ -548,6 +655,7 @@ class turbo_filter(object):
             minimum: Any = None,
             maximum: Any = None,
             marks: dict = None,
+            step: Any = None,
             wrapper_class_name: str = None,
             label_class_name: str = None,
             filter_class_name: str = None,
@@ -566,7 +674,7 @@ class turbo_filter(object):
                     max=maximum,
                     value=self.default_value if self.default_value is not None else [minimum, maximum],
                     marks=marks,
-                    step=None,
+                    step=step,
                     persistence=self.persistence,
                     persistence_type=self.persistence_type,
                 ),
@@ -1,12 +1,20 @@
-from typing import List, Dict, Any, Callable, Tuple
+from typing import List, Dict, Any, Callable, Hashable, Tuple, Optional
+import json
 import pandas as pd
+import plotly.io
 import plotly.express as px
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 
 from ._turbo_filter import turbo_filter
-from ._helpers import generate_random_string
+from ._filter_engine import filter_engine
+from ._helpers import generate_component_id_suffix, make_hashable
+from ._cache import lru_cache
+from ._metrics import default_registry, metric_labels
+from ._downsample import downsample_dataframe
+from ._cube import aggregate_cube, build_aggregate_cube
+from ._figure_builder import build_fast_figure
 from ._lookups import _template_lookup
 
 
@@ -16,6 +24,10 @@ class turbo_output(object):
     Methods:
         create_html: create the html for this output
         callback: create the callback for this output
+        create_figure: create the chart object for a set of menu filter values and chart input values
+        build_aggregate_cube: precompute a group-by cube for a bar output
+        set_component_id: set the dash component id for this output and its chart input filters
+        figure_cache_stats: grab the hit/miss counters and the size of the figure cache
     """
 
     _template_lookup_dict = _template_lookup
@@ -36,6 +48,13 @@ class turbo_output(object):
             chart_input_list: List[str] = (),
             output_component_property: str = 'figure',
             output_name: str = None,
+            figure_cache_size: int = 0,
+            figure_cache_ttl: float = None,
+            max_points: int = None,
+            downsample: bool = True,
+            render_mode: str = 'auto',
+            webgl_threshold: int = 1000,
+            figure_builder: str = 'px',
     ):
         """
 
@@ -57,6 +76,28 @@ class turbo_output(object):
                 output we want the callback to update. Generally, we want the inputs to update the
                 'figure' property of our dcc.Graph object.
             output_name (:obj: `str`, optional): default `None`, the name we'll display for this output
+            figure_cache_size (:obj: `int`, optional): default `0`, how many serialized figures we'll keep for
+                this output, keyed by the menu filter values, the chart input values, and the version of the data.
+                Repeated views (like the default filter state) are then a dictionary lookup. 0 turns the cache off.
+            figure_cache_ttl (:obj: `float`, optional): default `None`, how many seconds a cached figure stays valid,
+                `None` means cached figures don't expire
+            max_points (:obj: `int`, optional): default `None`, for line and area outputs, the most points we'll
+                send to the browser per trace (i.e. per color). Larger traces are downsampled with
+                Largest-Triangle-Three-Buckets, which keeps the visual shape of the line.
+            downsample (:obj: `bool`, optional): default `True`, set to `False` to render every point exactly,
+                even if max_points is set
+            render_mode (:obj: `str`, optional): default `'auto'`, how the browser draws scatter and line outputs.
+                Options include:
+                'svg': always use SVG traces, fully vectorized but slow for lots of points
+                'webgl': always use WebGL (scattergl) traces
+                'auto': decide on every callback, WebGL if the filtered df has more than webgl_threshold rows
+            webgl_threshold (:obj: `int`, optional): default `1000`, row count above which 'auto' uses WebGL
+            figure_builder (:obj: `str`, optional): default `'px'`, how we build scatter, line, area, and bar figures.
+                Options include:
+                'px': always use plotly express
+                'fast': build the traces directly from the df's columns, skipping plotly express's argument
+                    processing and validation. Falls back to plotly express for anything it can't handle
+                    (e.g. continuous colors or chart inputs that aren't columns).
         """
         self.output_type = output_type
         self.x = x
@@ -72,6 +113,22 @@ class turbo_output(object):
         self.chart_input_list = chart_input_list
         self.output_component_property = output_component_property
         self.output_name = output_name
+        self.figure_cache_size = figure_cache_size
+        self.figure_cache_ttl = figure_cache_ttl
+        self.max_points = max_points
+        self.downsample = downsample
+        self.render_mode = render_mode
+        self.webgl_threshold = webgl_threshold
+        self.figure_builder = figure_builder
+
+        if self.render_mode not in ('auto', 'svg', 'webgl'):
+            raise ValueError(
+                """Unknown render_mode string: {}. Options include ['auto', 'svg', 'webgl'].""".format(self.render_mode)
+            )
+        if self.figure_builder not in ('px', 'fast'):
+            raise ValueError(
+                """Unknown figure_builder string: {}. Options include ['px', 'fast'].""".format(self.figure_builder)
+            )
 
         # create a dictionary so we know which input string corresponds to which instance variable
         self._chart_input_string_default_value_dict = {
@@ -92,15 +149,15 @@ class turbo_output(object):
         self.chart_input_turbo_filter_list = self._create_chart_input_turbo_filter_list_from_chart_input_list()
 
         # grab some important data
-        self.component_id = '{} - {}'.format(self.output_type, generate_random_string())
         self.persistence = True  # todo: do we want to allow different values for persistence and persistence_type?
         self.persistence_type = 'memory'
 
-        # this is important! This is the dash output that the callback will update
-        self.dash_dependencies_output = dash.dependencies.Output(
-            component_id=self.component_id,
-            component_property=self.output_component_property,
-        )
+        # cache for the serialized figures, if we want one
+        self._figure_cache = lru_cache(max_items=self.figure_cache_size, ttl=self.figure_cache_ttl) \
+            if self.figure_cache_size else None
+
+        # set the component id and the dash output, the page sets them again with its url
+        self.set_component_id()
 
     def create_html(
             self,
@@ -136,12 +193,15 @@ class turbo_output(object):
             df: pd.DataFrame = None,
             menu_filter_list: List[turbo_filter] = (),
             template: str = None,
+            snapshot_function: Callable[
+                [], Tuple[Callable[[Tuple[Any, ...]], pd.DataFrame], Hashable, Optional[aggregate_cube]]
+            ] = None,
     ) -> bool:
         """the dash callback for this output
 
         1. do the fancy dash decorator and create a function within this function
-        2. filter the df based on the menu_filter_list, if necessary
-        3. assemble and return the chart object based on the original inputs and/or the chart inputs
+        2. split the dash input values into menu filter values and chart input values
+        3. grab one version of the data, and create and return the chart object from it
 
         Args:
             app (dash.Dash): the dash.Dash app object
@@ -149,42 +209,192 @@ class turbo_output(object):
             menu_filter_list (:obj: `list`, optional): default `()`, list of turbo_filter objects
             template (:obj: `str`, optional): layout template we want to use. Options include:
                 ['default', 'turbo', 'turbo-dark']
+            snapshot_function (:obj: `Callable`, optional): default `None`, function that grabs one version of the
+                data, usually the page's: a function that takes the menu filter values and returns the filtered df,
+                the data_version, and this output's aggregate cube (or `None`). Everything in the figure comes from
+                that version, even if the data is refreshed while we build it. If `None`, we'll compile the
+                menu_filter_list and filter the df ourselves.
 
         Returns:
             bool: True if successful, raises errors otherwise
         """
+        if snapshot_function is None:
+            menu_filter_engine = filter_engine(menu_filter_list=menu_filter_list)
+
+            def filter_function(filter_value_list: Tuple[Any, ...]) -> pd.DataFrame:
+                return menu_filter_engine.filter_dataframe(df=df, filter_value_list=filter_value_list)
+
+            def snapshot_function():
+                return filter_function, None, None
+
+        # there's one dash input value per input property of each menu filter
+        filter_value_count = len([dummy for tf in menu_filter_list for dummy in tf.dash_dependencies_input_list])
+
         @app.callback(
             output=self.dash_dependencies_output,
             inputs=self._dash_dependencies_input_list(menu_filter_list=menu_filter_list),
         )
         def callback_function(*dash_input_values_list: Any):
             """filter the df and create the chart object we want to display in the output"""
-            filtered_df = df  # we need this reference so we don't filter a df that's already been filtered
-
             # 2
             df_filter_start_index = 0  # we can assume the dataframe filter values start at 0
-            # and there are len([list of lambda functions]) values to filter on
-            df_filter_stop_index = len(
-                [func for tf in menu_filter_list for func in tf.filter_input_lambda_function_list]
-            )
-            filtered_df = self._filter_dataframe_from_turbo_filter_list(
-                df=filtered_df,
-                filter_column_list=self._filter_column_list(menu_filter_list=menu_filter_list),
-                filter_lambda_function_list=self._filter_lambda_function_list(menu_filter_list=menu_filter_list),
-                filter_value_list=dash_input_values_list[df_filter_start_index:df_filter_stop_index],
-            )
-
-            # 3
+            df_filter_stop_index = filter_value_count
             chart_input_start_index = df_filter_stop_index
             chart_input_stop_index = len(dash_input_values_list)
-            return self._assemble_chart_object_from_filtered_df_and_chart_input_list(
-                df=filtered_df,
+
+            # 3
+            filter_function, data_version, cube = snapshot_function()
+            return self.create_figure(
+                filter_value_list=dash_input_values_list[df_filter_start_index:df_filter_stop_index],
                 chart_input_values_list=dash_input_values_list[chart_input_start_index:chart_input_stop_index],
+                filter_function=filter_function,
                 template=template,
+                data_version=data_version,
+                cube=cube,
             )
 
         return True
 
+    def create_figure(
+            self,
+            filter_value_list: Tuple[Any, ...],
+            chart_input_values_list: Tuple[Any, ...],
+            filter_function: Callable[[Tuple[Any, ...]], pd.DataFrame],
+            template: str = None,
+            data_version: Hashable = None,
+            cube: aggregate_cube = None,
+    ) -> Any:
+        """create the chart object for a set of menu filter values and chart input values
+
+        1. filter the df based on the menu filter values, or the aggregate cube if we got one we can use
+        2. assemble the chart object based on the original inputs and/or the chart inputs
+        3. if we have a figure cache, only do 1 and 2 when we don't already have the serialized figure
+
+        Each step is timed in the metrics registry. Without a figure cache, dash serializes the figure, so we only
+        serialize it ourselves (and time it) when the metrics are enabled.
+
+        Args:
+            filter_value_list (Tuple[Any, ...]): values of the menu filters' dash inputs
+            chart_input_values_list (Tuple[Any, ...]): values of this output's chart inputs
+            filter_function (Callable[[Tuple[Any, ...]], pandas.DataFrame]): function that takes the menu filter
+                values and returns the filtered df
+            template (:obj: `str`, optional): layout template we want to use. Options include:
+                ['default', 'turbo', 'turbo-dark']
+            data_version (:obj: `Hashable`, optional): default `None`, the version of the data filter_function
+                and cube come from, so cached figures from an older version aren't reused
+            cube (:obj: `aggregate_cube`, optional): default `None`, this output's aggregate cube for the same
+                version of the data
+
+        Returns:
+            plotly.graph_objs._figure.Figure, or its serialized dict if it came from the figure cache
+        """
+        def assemble_figure() -> Any:
+            # 1
+            with default_registry.time('turbo_dash_callback_phase_seconds', phase='filter', **self._metric_label_dict):
+                is_aggregated = self._can_use_aggregate_cube(chart_input_values_list=chart_input_values_list, cube=cube)
+                if is_aggregated:
+                    filtered_df = cube.aggregate(filter_value_list=filter_value_list)
+                else:
+                    filtered_df = filter_function(filter_value_list)
+            default_registry.observe('turbo_dash_output_rows', len(filtered_df), **self._metric_label_dict)
+
+            # 2
+            with default_registry.time('turbo_dash_callback_phase_seconds', phase='figure', **self._metric_label_dict):
+                return self._assemble_chart_object_from_filtered_df_and_chart_input_list(
+                    df=filtered_df,
+                    chart_input_values_list=chart_input_values_list,
+                    template=template,
+                    is_aggregated=is_aggregated,
+                )
+
+        if self._figure_cache is None:
+            figure = assemble_figure()
+            return self._serialize_figure(figure=figure) if default_registry.is_enabled else figure
+
+        # 3
+        return self._figure_cache.get_or_compute(
+            key=(
+                self.component_id,
+                make_hashable(filter_value_list),
+                make_hashable(chart_input_values_list),
+                data_version,
+            ),
+            compute_function=lambda: self._serialize_figure(figure=assemble_figure()),
+        )
+
+    def build_aggregate_cube(
+            self,
+            df: pd.DataFrame,
+            menu_filter_list: List[turbo_filter] = (),
+    ) -> Optional[aggregate_cube]:
+        """precompute a group-by cube for a bar output, summing y over x, color, and the menu filter columns
+
+        Callbacks are then answered by filtering and summing the cube instead of the raw rows. Since the cube
+        only keeps x, y, and color, the figure won't have hover_name or hover_data, and we fall back to the raw
+        rows whenever the chart inputs change the output type, x, y, or color.
+
+        Args:
+            df (pandas.DataFrame): the page's dataframe
+            menu_filter_list (:obj: `list`, optional): default `()`, list of turbo_filter objects
+
+        The cube belongs to one version of the data, so we hand it back instead of keeping it. The page keeps it
+        with the rest of that version and passes it to create_figure.
+
+        Returns:
+            aggregate_cube, or None if this output can't use one
+        """
+        if self.output_type != 'bar' or df is None:
+            return None
+
+        return build_aggregate_cube(
+            df=df,
+            x=self.x,
+            y=self.y,
+            color=self.color,
+            menu_filter_list=menu_filter_list,
+        )
+
+    def set_component_id(
+            self,
+            scope: str = None,
+            position: int = None,
+    ) -> str:
+        """set the dash component id for this output and its chart input filters, and create the dash output
+
+        The id only depends on where the output lives and how it's configured, so every process serving the app
+        (e.g. each gunicorn worker) creates the same ids and the callback map matches the layout.
+
+        Args:
+            scope (:obj: `str`, optional): default `None`, where this output lives, e.g. the url of its page
+            position (:obj: `int`, optional): default `None`, the position of this output within its scope
+
+        Returns:
+            str: the component id
+        """
+        self.component_id = '{} - {}'.format(
+            self.output_type,
+            generate_component_id_suffix(
+                scope, position, self.output_component_property, self._chart_input_string_default_value_dict,
+            ),
+        )
+        self._metric_label_dict = metric_labels(page=scope, output=self.component_id)  # labels for our metrics
+
+        # the chart input filters live inside this output
+        for index, input_turbo_filter in enumerate(self.chart_input_turbo_filter_list):
+            input_turbo_filter.set_component_id(scope=self.component_id, position=index)
+
+        # this is important! This is the dash output that the callback will update
+        self.dash_dependencies_output = dash.dependencies.Output(
+            component_id=self.component_id,
+            component_property=self.output_component_property,
+        )
+
+        return self.component_id
+
+    def figure_cache_stats(self) -> Dict[str, int]:
+        """grab the hit/miss counters and the size of the figure cache, empty if we don't have one"""
+        return self._figure_cache.stats() if self._figure_cache is not None else {}
+
     """protected methods"""
     def _create_chart_input_turbo_filter_list_from_chart_input_list(self) -> List[turbo_filter]:
         return [
@@ -226,6 +436,22 @@ class turbo_output(object):
             ],
         )
 
+    def _serialize_figure(
+            self,
+            figure: Any,
+    ) -> Dict[str, Any]:
+        """serialize a figure once so we can cache it
+
+        Dash runs whatever the callback returns through its own JSON encoder, so instead of the JSON string
+        we keep the plain dict it decodes to: no numpy arrays or plotly objects left for the encoder to convert.
+        """
+        with default_registry.time('turbo_dash_callback_phase_seconds', phase='serialize', **self._metric_label_dict):
+            figure_json = plotly.io.to_json(figure, validate=False)
+            ret = json.loads(figure_json)
+        default_registry.observe('turbo_dash_payload_bytes', len(figure_json.encode('utf-8')), **self._metric_label_dict)
+
+        return ret
+
     def _complete_turbo_filter_list(
             self,
             menu_filter_list: List[turbo_filter],
@@ -259,104 +485,114 @@ class turbo_output(object):
             for dash_dependencies_input in tf.dash_dependencies_input_list
         ]
 
-    @staticmethod
-    def _filter_column_list(menu_filter_list: List[turbo_filter]) -> List[str]:
-        """grab the list of column names for each of our filters"""
-        # this is more than just grabbing the column for each menu filter
-        # each menu filter can have 1 or more input properties associated with it
-        # (e.g. DatePickerRange has [start_date, end_date])
-        # so we have to loop through two lists instead of just the top-level list
-        return [tf.column for tf in menu_filter_list for dummy in tf.dash_dependencies_input_list]
-
-    @staticmethod
-    def _filter_lambda_function_list(
-            menu_filter_list: List[turbo_filter]
-    ) -> List[Callable[[pd.DataFrame, str, Any], pd.DataFrame]]:
-        """grab the list of lambda functions for each of our filters"""
-        # this is more than just grabbing the lambda function for each menu filter
-        # each menu filter can have 1 or more input properties associated with it
-        # (e.g. DatePickerRange has [start_date, end_date])
-        # so we have to loop through the functions for each of those properties instead of just the top-level list
-        return [lambda_func for tf in menu_filter_list for lambda_func in tf.filter_input_lambda_function_list]
-
-    @staticmethod
-    def _filter_dataframe_from_turbo_filter_list(
-            df: pd.DataFrame,
-            filter_column_list: List[str],
-            filter_lambda_function_list: List[Callable[[pd.DataFrame, str, Any], pd.DataFrame]],
-            filter_value_list: Tuple[Any],
-    ) -> pd.DataFrame:
-        """filter a dataframe based on a list of values and turbo_filters
-
-        Args:
-            df (pandas.DataFrame): dataframe we want to filter
-            filter_column_list (List[Any]):
-            filter_lambda_function_list (List[Callable[[pd.DataFrame, str, Any], pd.DataFrame]]): if the typing doesn't
-                help, this is a list of lambda functions that takes three arguments. The lambdas look like:
-                lambda dataframe (pd.DataFrame), column (str), value (Any): return_value (pd.DataFrame)
-            filter_value_list (List[Any]): list of values we'll filter the df on
-
-        Returns:
-            pandas.DataFrame
+    def _figure_values_dict(
+            self,
+            chart_input_values_list: Tuple[Any],
+    ) -> Dict[str, Any]:
+        """create a dict with all the original (default) values and updated values (from the chart inputs)
 
         Raises:
-            ValueError if filter_value_list and turbo_filter_list are not the same length
+            ValueError if chart_input_values_list doesn't have the same length as self.chart_input_list
         """
-        if len(filter_value_list) != len(filter_column_list) \
-                or len(filter_value_list) != len(filter_lambda_function_list):
+        if len(chart_input_values_list) != len(self.chart_input_list):
             raise ValueError(
-                '''filter_value_list ({}) and filter_column_list ({}) and filter_lambda_function_list ({}) 
-                must be the same size'''.format(filter_value_list, filter_column_list, filter_lambda_function_list)
+                '''chart_input_values_list ({}) and chart_input_list ({}) must have the same length'''
+                .format(chart_input_values_list, self.chart_input_list)
             )
 
-        ret = df
-
-        # loop through the list of filter values and apply the lambda function for each value
-        for index, filter_value in enumerate(filter_value_list):
-            ret = filter_lambda_function_list[index](ret, filter_column_list[index], filter_value)
-            # remember, these lambda functions look like:
-            #   lambda dataframe (pd.DataFrame), column (str), value (Any): return_value (pd.DataFrame)
+        ret = dict(self._chart_input_string_default_value_dict)
+        for index, chart_input_value in enumerate(chart_input_values_list):
+            ret[self.chart_input_list[index]] = chart_input_value
 
         return ret
 
+    def _can_use_aggregate_cube(
+            self,
+            chart_input_values_list: Tuple[Any],
+            cube: aggregate_cube = None,
+    ) -> bool:
+        """we can only answer from the aggregate cube if the chart inputs didn't change what the cube is built on"""
+        if cube is None:
+            return False
+
+        figure_values_dict = self._figure_values_dict(chart_input_values_list=chart_input_values_list)
+        return figure_values_dict['output_type'] == 'bar' \
+            and figure_values_dict['x'] == cube.x \
+            and figure_values_dict['y'] == cube.y \
+            and figure_values_dict['color'] == cube.color
+
+    def _resolve_render_mode(
+            self,
+            df: pd.DataFrame,
+    ) -> str:
+        """decide between 'svg' and 'webgl' traces for the df we're about to plot"""
+        if self.render_mode != 'auto':
+            return self.render_mode
+        return 'webgl' if len(df) > self.webgl_threshold else 'svg'
+
     def _assemble_chart_object_from_filtered_df_and_chart_input_list(
             self,
             df: pd.DataFrame,
             chart_input_values_list: Tuple[Any],
             template: str = None,
+            is_aggregated: bool = False,
     ) -> Any:
         """take a dataframe and a list of chart input values from the dash callback, produce a plotly figure
 
         1. create a dict with all the original (default) values and updated values (from the chart inputs)
-        2. create and return the figure based on that data
+        2. create and return the figure based on that data, downsampling line and area outputs if we want to
+        3. if we're using the fast figure builder and it can handle this figure, skip plotly express
 
         Args:
             df (pandas.DataFrame): dataframe we want to filter
             chart_input_values_list (Tuple[Any]): list of values we'll use to update the chart
             template (:obj: `str`, optional): layout template we want to use. Options include:
                 ['default', 'turbo', 'turbo-dark']
+            is_aggregated (:obj: `bool`, optional): default `False`, whether the df came from the aggregate cube
 
         Returns:
-            plotly.graph_objs._figure.Figure (plotly.express.bar, line, etc)
+            plotly.graph_objs._figure.Figure (plotly.express.bar, line, etc), or a figure dict from the fast builder
 
         Raises:
             ValueError if chart_input_values_list doesn't have the same length as self.chart_input_list
         """
-        if len(chart_input_values_list) != len(self.chart_input_list):
-            raise ValueError(
-                '''chart_input_values_list ({}) and chart_input_list ({}) must have the same length'''
-                .format(chart_input_values_list, self.chart_input_list)
-            )
-
         # 1
-        figure_values_dict = dict(self._chart_input_string_default_value_dict)
-        for index, chart_input_value in enumerate(chart_input_values_list):
-            figure_values_dict[self.chart_input_list[index]] = chart_input_value
+        figure_values_dict = self._figure_values_dict(chart_input_values_list=chart_input_values_list)
+        if is_aggregated:  # the aggregate cube only has the x, y, and color columns
+            figure_values_dict['hover_name'] = None
+            figure_values_dict['hover_data'] = ()
 
         # 2
+        if figure_values_dict['output_type'] in ('line', 'area') and self.downsample and self.max_points:
+            df = downsample_dataframe(
+                df=df,
+                x=figure_values_dict['x'],
+                y=figure_values_dict['y'],
+                color=figure_values_dict['color'],
+                max_points=self.max_points,
+            )
+
+        # 3
+        if self.figure_builder == 'fast':
+            fast_figure = build_fast_figure(
+                df=df,
+                output_type=figure_values_dict['output_type'],
+                x=figure_values_dict['x'],
+                y=figure_values_dict['y'],
+                color=figure_values_dict['color'],
+                size=figure_values_dict['size'],
+                hover_name=figure_values_dict['hover_name'],
+                hover_data=figure_values_dict['hover_data'],
+                chart_template=self._template_lookup_dict[template]['chart_template'],
+                render_mode=self._resolve_render_mode(df=df),
+            )
+            if fast_figure is not None:
+                return fast_figure
+
         if figure_values_dict['output_type'] == 'scatter':
             return px.scatter(
                 data_frame=df,
+                render_mode=self._resolve_render_mode(df=df),
                 x=figure_values_dict['x'],
                 y=figure_values_dict['y'],
                 color=figure_values_dict['color'],
@@ -369,6 +605,7 @@ class turbo_output(object):
         if figure_values_dict['output_type'] == 'line':
             return px.line(
                 data_frame=df,
+                render_mode=self._resolve_render_mode(df=df),
                 x=figure_values_dict['x'],
                 y=figure_values_dict['y'],
                 color=figure_values_dict['color'],
@@ -1,6 +1,24 @@
 """built-in datasets for examples and testing"""
+from typing import List, Dict, Any
+import hashlib
+import os
+import threading
 import pandas as pd
 
+from .._data_source import arrow_data_source
+
+# name -> how to read the dataset, see register_dataset
+_dataset_registry = {}
+_dataset_dict = {}  # name -> loaded dataframe, so each dataset is only read once per process
+_dataset_lock = threading.Lock()
+
+# where we keep the columnar copies of the datasets, so we only parse each CSV once per machine
+# set TURBO_DASH_DATA_CACHE_DIR to move it, or to an empty string to never write anything
+_columnar_cache_dir = os.environ.get(
+    'TURBO_DASH_DATA_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'turbo_dash', 'datasets'),
+)
+
 
 def gapminder() -> pd.DataFrame:
     """function to grab the gapminder dataframe
@@ -10,7 +28,69 @@ def gapminder() -> pd.DataFrame:
             'country', 'continent', 'year', 'lifeExp', 'pop', 'gdpPercap', 'iso_alpha', 'iso_num'
         ]
     """
-    return _get_df('gapminder')
+    return load_dataset('gapminder')
+
+
+def register_dataset(
+        name: str,
+        path: str,
+        dtype: Dict[str, Any] = None,
+        **read_csv_kwargs: Any
+) -> bool:
+    """register a CSV file (compressed or not) so we can grab it with load_dataset
+
+    Args:
+        name (str): name we'll load the dataset by, registering a name again replaces the dataset
+        path (str): path of the CSV file
+        dtype (:obj: `Dict[str, Any]`, optional): default `None`, dtype for each column, like pandas.read_csv.
+            Setting them skips type inference, and 'category' stores a text column as integer codes.
+        **read_csv_kwargs: any other arguments for pandas.read_csv, like parse_dates
+
+    Returns:
+        bool: True if successful, raises errors otherwise
+    """
+    with _dataset_lock:
+        _dataset_registry[name] = {'path': path, 'dtype': dtype, 'read_csv_kwargs': read_csv_kwargs}
+        _dataset_dict.pop(name, None)
+
+    return True
+
+
+def list_datasets() -> List[str]:
+    """grab the names of the registered datasets"""
+    return sorted(_dataset_registry)
+
+
+def load_dataset(name: str) -> pd.DataFrame:
+    """grab a registered dataset as a dataframe
+
+    The first call in a process reads the columnar copy of the dataset, building it from the CSV if we haven't
+    yet (or the CSV changed). Later calls reuse the frame we already loaded.
+
+    The columnar copies live in ~/.cache/turbo_dash/datasets, or the TURBO_DASH_DATA_CACHE_DIR environment
+    variable if it's set. An empty TURBO_DASH_DATA_CACHE_DIR turns them off, and if we can't write there
+    (e.g. a read-only home in a container) we just read the CSV.
+
+    Args:
+        name (str): name of the dataset, see list_datasets
+
+    Returns:
+        pandas.DataFrame: a shallow copy, so adding or dropping columns doesn't change the dataset for anybody
+            else. Copy it before modifying its values in place.
+
+    Raises:
+        ValueError if the dataset isn't registered
+    """
+    if name not in _dataset_registry:
+        raise ValueError(
+            '''dataset ({}) must be one of {}'''.format(name, list_datasets())
+        )
+
+    with _dataset_lock:
+        if name not in _dataset_dict:
+            _dataset_dict[name] = _read_dataset(**_dataset_registry[name])
+
+        return _dataset_dict[name].copy(deep=False)
 
 
 def _get_df(df_name: str) -> pd.DataFrame:
@@ -22,13 +102,63 @@ def _get_df(df_name: str) -> pd.DataFrame:
     Returns:
         pandas.DataFrame
     """
-    import os
-
-    return pd.read_csv(
-        os.path.join(  # get the path to the dataset by
-            os.path.dirname(os.path.dirname(__file__)),  # finding the dirname for this file (i.e. the turbo_dash dir)
-            'package_data',  # move into package_data/
-            'datasets',  # then into datasets/
-            '{}.csv.gz'.format(df_name),  # finally grab the .csv.gz we're looking for
-        )
+    return load_dataset(df_name)
+
+
+def _read_dataset(
+        path: str,
+        dtype: Dict[str, Any] = None,
+        read_csv_kwargs: Dict[str, Any] = None,
+) -> pd.DataFrame:
+    """read the columnar copy of a dataset, building it from the CSV first if we need to
+
+    1. find the columnar copy for this version of the CSV and these read options, and read it if we have it
+    2. otherwise parse the CSV
+    3. write the columnar copy and read it back, or keep the parsed CSV if we can't write it here
+        (e.g. the cache directory isn't writable or pyarrow isn't installed)
+    """
+    read_csv_kwargs = read_csv_kwargs if read_csv_kwargs is not None else {}
+    if not _columnar_cache_dir:
+        return pd.read_csv(path, dtype=dtype, **read_csv_kwargs)
+
+    # 1
+    file_stat = os.stat(path)
+    version = hashlib.sha1(repr((
+        os.path.abspath(path), file_stat.st_size, file_stat.st_mtime_ns, dtype, sorted(read_csv_kwargs.items()),
+    )).encode('utf-8')).hexdigest()[:16]
+    columnar_path = os.path.join(
+        _columnar_cache_dir,
+        '{}-{}.arrow'.format(os.path.basename(path).split('.')[0], version),
     )
+
+    if os.path.exists(columnar_path):
+        try:
+            return arrow_data_source(path=columnar_path).load()
+        except (ImportError, OSError):  # e.g. pyarrow isn't installed, so we read the CSV instead
+            pass
+
+    # 2
+    df = pd.read_csv(path, dtype=dtype, **read_csv_kwargs)
+
+    # 3
+    try:
+        os.makedirs(_columnar_cache_dir, exist_ok=True)
+        return arrow_data_source.from_dataframe(df=df, path=columnar_path).load()
+    except (ImportError, OSError):
+        return df
+
+
+register_dataset(
+    name='gapminder',
+    path=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'package_data', 'datasets', 'gapminder.csv.gz'),
+    dtype={
+        'country': 'object',
+        'continent': 'object',
+        'year': 'int64',
+        'lifeExp': 'float64',
+        'pop': 'int64',
+        'gdpPercap': 'float64',
+        'iso_alpha': 'object',
+        'iso_num': 'int64',
+    },
+)